@@ -1,6 +1,10 @@
 import streamlit as st
-import time
-from services.simulation import SimulationEngine, BagStatus
+import uuid
+from services.models import BagStatus
+from services.airports import AIRPORTS
+from services.data_hub import get_hub, SIMULATION, REAL_API
+from services.map_lod import Viewport
+from services.stats_history import StatsHistory, fleet_stats
 from services.websocket_client import setup_realtime_updates, show_websocket_status
 from components.map_view import render_map
 from components.metrics import render_metrics
@@ -10,7 +14,8 @@ from components.auth import render_login
 from components.ml_prediction import render_ml_prediction
 from components.notifications import check_notifications, render_notification_center
 from components.passenger_view import render_passenger_bag_details
-import pandas as pd
+from components.render_timings import region_timer, render_timings_panel
+import config
 
 # --- Page Config ---
 st.set_page_config(
@@ -33,36 +38,35 @@ if 'user_role' not in st.session_state:
     st.session_state.user_role = None
 
 if 'data_source' not in st.session_state:
-    st.session_state.data_source = "Simulation"
+    st.session_state.data_source = SIMULATION
+
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 if 'is_running' not in st.session_state:
     st.session_state.is_running = False
 
 if 'stats_history' not in st.session_state:
-    st.session_state.stats_history = []
+    st.session_state.stats_history = StatsHistory()
 
-def capture_stats():
-    """Captures current simulation state for analytics history."""
-    df = st.session_state.simulation.get_dataframe()
-    tick_time = len(st.session_state.stats_history)
+# Bag data lives in a process-wide hub shared by every session; this
+# session only keeps its filters, stats history and notifications
+hub = get_hub(st.session_state.data_source)
 
-    stats = {
-        'timestamp': tick_time,
-        'Total Active': len(df),
-        'In Transit': len(df[df['status'] == 'In Transit']),
-        'Landed': len(df[df['status'].isin(['Landed', 'Baggage Claim'])]),
-        'Lost': len(df[df['status'] == 'Lost'])
-    }
-    st.session_state.stats_history.append(stats)
+def capture_stats(status_counts):
+    """Captures current fleet state (bags per status value) for analytics history."""
+    st.session_state.stats_history.record(fleet_stats(status_counts), hub.now())
 
-    # Check for notifications
-    check_notifications(st.session_state.simulation.bags)
+    # Notifications from the status transitions since this session's last check
+    changes = hub.transitions_since(st.session_state.get('transition_seq'))
+    st.session_state.transition_seq = changes.seq
+    check_notifications(changes)
 
 # --- Auth Check ---
 if st.session_state.user_role is None:
     # Pass api_service if in API mode
-    if st.session_state.data_source == "Real Backend API" and 'simulation' in st.session_state:
-        render_login(st.session_state.simulation)
+    if st.session_state.data_source == REAL_API:
+        render_login(hub.service)
     else:
         render_login()
     st.stop()
@@ -74,30 +78,21 @@ with st.sidebar:
     # Mode Selection
     source_option = st.radio(
         "Data Source",
-        ["Simulation", "Real Backend API"],
-        index=0 if st.session_state.data_source == "Simulation" else 1
+        [SIMULATION, REAL_API],
+        index=0 if st.session_state.data_source == SIMULATION else 1
     )
 
     # Handle Mode Switching
     if source_option != st.session_state.data_source:
+        # Leave the old hub; the new one is created once per process
+        hub.unsubscribe(st.session_state.session_id)
         st.session_state.data_source = source_option
+        st.session_state.transition_seq = None  # cursor into the old hub's transitions
         st.session_state.is_running = False # Stop running on switch
-
-        # Re-initialize the correct service
-        if source_option == "Simulation":
-            st.session_state.simulation = SimulationEngine(num_bags=100)
-        else:
-            # Lazy import to avoid circular defaults
-            from services.api_service import RealTimeService
-            st.session_state.simulation = RealTimeService()
         st.rerun()
 
-    # Initialize generic 'service' wrapper if not present (handled by re-init above generally, but for first load):
-    if 'simulation' not in st.session_state:
-        st.session_state.simulation = SimulationEngine(num_bags=100)
-
     # Dynamic Controls based on Mode
-    if st.session_state.data_source == "Simulation":
+    if st.session_state.data_source == SIMULATION:
         st.subheader("Simulation Controls")
         st.caption("Press Start to begin real-time tracking updates.")
 
@@ -110,18 +105,35 @@ with st.sidebar:
 
         with col_tick:
             if st.button("Step +1"):
-                st.session_state.simulation.tick()
-                capture_stats()
+                hub.tick()
+
+        # Time warp: run the ticks in one go, keeping only per-tick stats
+        col_100, col_1000 = st.columns(2)
+        for col, jump in ((col_100, 100), (col_1000, 1000)):
+            with col:
+                if st.button(f"⏩ +{jump}"):
+                    start = hub.now()
+                    counts = hub.advance(jump)
+                    st.session_state.stats_history.record_counts(counts, start, hub.interval)
 
         # Show current simulation tick/time
-        st.metric("Simulation Ticks", len(st.session_state.simulation.bags[0].history) if st.session_state.simulation.bags else 0)
+        st.metric("Simulation Ticks", hub.ticks)
+
+        # Snapshot: the next start resumes from here instead of a new fleet
+        if config.SIMULATION_SNAPSHOT_PATH and st.button("💾 Save Snapshot"):
+            hub.save_snapshot(config.SIMULATION_SNAPSHOT_PATH)
+            st.toast(f"Simulation saved to {config.SIMULATION_SNAPSHOT_PATH}", icon="💾")
 
     else:
         st.subheader("API Connection")
         st.warning("📡 Connecting to http://localhost:8000...")
         if st.button("🔄 Fetch Live Data"):
-            st.session_state.simulation.tick()
-            capture_stats()
+            hub.tick()
+
+        # Background page loading progress
+        loaded, total = hub.service.ingest_progress
+        if hub.service.ingesting:
+            st.caption(f"⏳ Loading bags: {loaded:,} / {total:,}" if total else f"⏳ Loading bags: {loaded:,}")
 
         # Auto-refresh toggle for API
         auto_refresh = st.checkbox("Auto-polling (5s)", value=False)
@@ -131,7 +143,7 @@ with st.sidebar:
             st.session_state.is_running = False
 
         # Show WebSocket status
-        show_websocket_status()
+        show_websocket_status(hub.live_feed)
 
 
     st.divider()
@@ -139,6 +151,11 @@ with st.sidebar:
     # Map Settings
     st.subheader("Map Settings")
     show_heatmap = st.checkbox("Show Heatmap", value=False)
+    # The server picks what to draw for this view (pydeck doesn't report pans back)
+    map_focus = st.selectbox("Focus", ["World"] + sorted(AIRPORTS))
+    map_zoom = st.slider("Zoom", min_value=1.0, max_value=10.0,
+                         value=1.5 if map_focus == "World" else float(config.DEFAULT_MAP_ZOOM), step=0.5)
+    show_timings = st.checkbox("Show render timings", value=config.SHOW_PERFORMANCE_METRICS)
 
     # Filters
     st.subheader("Filters")
@@ -148,10 +165,9 @@ with st.sidebar:
         default=[s.value for s in BagStatus]
     )
 
-    # Search
+    # Search by id: a list of every bag would grow with the fleet on each rerun
     st.subheader("Find Bag")
-    all_bag_ids = [b.id for b in st.session_state.simulation.bags]
-    search_id = st.selectbox("Select Bag ID", ["None"] + all_bag_ids)
+    search_id = st.text_input("Bag ID", placeholder="e.g. BAG-1000").strip() or "None"
 
 # --- Auto-Run Logic ---
     st.divider()
@@ -165,6 +181,7 @@ with st.sidebar:
     if st.button("Log Out"):
         st.session_state.user_role = None
         st.session_state.target_bag_id = None
+        st.session_state.api_token = None
         st.rerun()
 
     st.divider()
@@ -172,12 +189,12 @@ with st.sidebar:
     if st.session_state.user_role == 'admin':
         render_notification_center()
 
-# --- Auto-Run Logic (Only for Admin) ---
-if st.session_state.user_role == 'admin' and st.session_state.is_running:
-    st.session_state.simulation.tick()
-    capture_stats()
-    time.sleep(0.5) # Throttle speed
-    st.rerun()
+# --- Live Mode (Only for Admin) ---
+# The hub ticks in the background; while live only the metrics and map
+# fragments below rerun on a timer, not the whole script
+is_live = st.session_state.user_role == 'admin' and st.session_state.is_running
+refresh_every = hub.interval if is_live else None
+hub.subscribe(st.session_state.session_id, live=is_live)
 
 # --- Main Layout ---
 if st.session_state.user_role == 'passenger':
@@ -186,22 +203,66 @@ else:
     st.title("🌍 Global Luggage Operations")
 
 # Data preparation
-# Data preparation
-df_bags = st.session_state.simulation.get_dataframe()
-
-# Apply Passenger Constraints
+def current_snapshot():
+    """Latest hub snapshot; records one stats point per new hub version."""
+    snapshot = hub.snapshot()
+    # Heartbeat, so the session stays live while only fragments rerun
+    hub.subscribe(st.session_state.session_id, live=is_live)
+    if st.session_state.get('stats_version') != snapshot.version:
+        st.session_state.stats_version = snapshot.version
+        capture_stats(snapshot.status_counts)
+    return snapshot
+
+def current_bags():
+    return current_snapshot().dataframe
+
+def map_viewport():
+    """View for the map: the selected bag, else the focused airport, else the world."""
+    if search_id and search_id != "None":
+        bag = hub.get_bag(search_id)
+        if bag:
+            return Viewport(bag.current_lat, bag.current_lon, max(map_zoom, config.DEFAULT_MAP_ZOOM))
+    if map_focus != "World":
+        airport = AIRPORTS[map_focus]
+        return Viewport(airport.lat, airport.lon, map_zoom)
+    return Viewport(zoom=map_zoom)
+
+def filter_bags(df):
+    # Apply Passenger Constraints
+    if st.session_state.user_role == 'passenger':
+        # Force filter to only this bag
+        return df[df['id'] == st.session_state.get('target_bag_id')]
+    return df[df['status'].isin(status_filter)]
+
+@st.fragment(run_every=refresh_every)
+def live_metrics():
+    with region_timer("metrics"):
+        # Metrics are admin-only and the admin filter is by status, so the
+        # hub's status counter answers them without scanning the fleet
+        counts = current_snapshot().status_counts
+        render_metrics(status_counts={s: n for s, n in counts.items() if s in status_filter})
+
+@st.fragment(run_every=refresh_every)
+def live_map():
+    with region_timer("map"):
+        # Heatmap cells are pre-binned by the hub; keep the ones the status filter shows
+        heat = None
+        if show_heatmap:
+            heat = hub.heat_cells()
+            heat = heat[heat['status'].isin(status_filter)]
+        render_map(filter_bags(current_bags()), show_heatmap=show_heatmap, viewport=map_viewport(), heat=heat)
+    if show_timings:
+        render_timings_panel()
+
+df_bags = current_bags()
+filtered_df = filter_bags(df_bags)
 if st.session_state.user_role == 'passenger':
-    target_id = st.session_state.get('target_bag_id')
-    # Force filter to only this bag
-    filtered_df = df_bags[df_bags['id'] == target_id]
-    search_id = target_id
+    search_id = st.session_state.get('target_bag_id')
     # Hide sidebar filters effectively for passenger (or ignore them)
-else:
-    filtered_df = df_bags[df_bags['status'].isin(status_filter)]
 
 # 1. Top Level Metrics (Admin Only)
 if st.session_state.user_role == 'admin':
-    render_metrics(filtered_df)
+    live_metrics()
 
 st.write("") # Spacer
 
@@ -216,28 +277,28 @@ if st.session_state.user_role == 'admin':
     tab_map, tab_analytics, tab_ml, tab_data = st.tabs(["🗺️ Live Map", "📈 Analytics", "🤖 ML Prediction", "📂 Raw Data"])
 
     with tab_map:
-        render_map(filtered_df, show_heatmap=show_heatmap)
+        live_map()
 
         # 3. Drill Down / Details
         if search_id != "None":
-            bag = next((b for b in st.session_state.simulation.bags if b.id == search_id), None)
+            bag = hub.get_bag(search_id)
             if bag:
                 render_bag_details(bag)
             else:
                 st.error("Bag not found!")
 
     with tab_analytics:
-        history_df = pd.DataFrame(st.session_state.stats_history)
         # Pass api_service if in API mode
-        if st.session_state.data_source == "Real Backend API":
-            render_analytics(filtered_df, history_df, api_service=st.session_state.simulation)
+        if st.session_state.data_source == REAL_API:
+            render_analytics(filtered_df, st.session_state.stats_history, api_service=hub.service,
+                             bundle=hub.analytics_bundle())
         else:
-            render_analytics(filtered_df, history_df)
+            render_analytics(filtered_df, st.session_state.stats_history)
 
     with tab_ml:
         # ML Prediction Tab
-        if st.session_state.data_source == "Real Backend API":
-            render_ml_prediction(st.session_state.simulation)
+        if st.session_state.data_source == REAL_API:
+            render_ml_prediction(hub.service)
         else:
             st.warning("🔌 La predicción ML requiere conexión al backend API")
             st.info("Cambia a **'Real Backend API'** en la barra lateral para acceder a esta función")
@@ -263,12 +324,12 @@ if st.session_state.user_role == 'admin':
 
 else:
     # PASSENGER VIEW (Enhanced)
-    render_map(filtered_df, show_heatmap=False)
+    render_map(filtered_df, show_heatmap=False, viewport=map_viewport())
 
     if search_id:
-        bag = next((b for b in st.session_state.simulation.bags if b.id == search_id), None)
+        bag = hub.get_bag(search_id)
         if bag:
             # Use enhanced passenger view
-            render_passenger_bag_details(bag, st.session_state.simulation)
+            render_passenger_bag_details(bag, hub.service)
         else:
             st.warning("We are currently unable to locate your bag. It might not be in the system yet.")
@@ -0,0 +1,1334 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the OmniTrack data layer.
+Runs fully offline against local data; no backend required.
+
+Usage:
+    python benchmark.py              # run every benchmark
+    python benchmark.py dataframe    # run a single benchmark
+"""
+
+import io
+import json
+import math
+import os
+import sys
+import time
+import contextlib
+import tracemalloc
+import statistics
+
+import numpy as np
+import pandas as pd
+
+# Try to import colorama for colored output, fallback to no colors
+try:
+    from colorama import init, Fore, Style
+    init(autoreset=True)
+except ImportError:
+    class Fore:
+        GREEN = RED = YELLOW = CYAN = MAGENTA = ""
+    class Style:
+        RESET_ALL = ""
+
+from services.models import BagStatus
+from services.simulation import SimulationEngine
+
+
+def print_header(text):
+    """Print a formatted header."""
+    print(f"\n{Fore.CYAN}{'=' * 60}")
+    print(f"{Fore.CYAN}{text:^60}")
+    print(f"{Fore.CYAN}{'=' * 60}{Style.RESET_ALL}")
+
+
+def timed(fn, repeat=5):
+    """Median wall time of `fn()` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def peak_memory(fn):
+    """Peak Python allocation of `fn()` in MB (tracemalloc)."""
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def quiet(fn, *args, **kwargs):
+    """Call `fn` with its debug prints suppressed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def report(label, old_ms, new_ms, old_mb=None, new_mb=None):
+    speedup = old_ms / new_ms if new_ms else float("inf")
+    line = f"{Fore.GREEN}✓ {label}: {old_ms:9.2f} ms → {new_ms:9.2f} ms ({speedup:,.1f}x)"
+    if old_mb is not None:
+        line += f" | {old_mb:8.1f} MB → {new_mb:8.1f} MB"
+    print(line)
+
+
+# ==================== DATAFRAME EXPORT ====================
+
+def legacy_dataframe(bags):
+    """Reference implementation: one dict per bag, rebuilt on every call."""
+    data = []
+    for bag in bags:
+        data.append({
+            "id": bag.id,
+            "lat": bag.current_lat,
+            "lon": bag.current_lon,
+            "status": bag.status.value,
+            "origin": bag.origin.name,
+            "destination": bag.destination.name,
+            "owner": bag.owner,
+            "color": bag.color,
+            "size_scale": 200 if bag.status == BagStatus.LOST else 50,
+            "dest_lat": bag.destination.lat,
+            "dest_lon": bag.destination.lon,
+        })
+    return pd.DataFrame(data)
+
+
+def bench_dataframe(sizes=(10_000, 500_000)):
+    print_header("DataFrame export (per-bag dicts vs columnar store)")
+    for n in sizes:
+        engine = SimulationEngine(num_bags=n)
+        bags = list(engine.bags)
+        engine.tick()
+
+        old_ms = timed(lambda: legacy_dataframe(bags), repeat=3)
+        old_mb = peak_memory(lambda: legacy_dataframe(bags))
+
+        # First call wraps the store columns; after a tick the same view is reused
+        engine.store._frame = None
+        first_mb = peak_memory(engine.get_dataframe)
+        engine.store._frame = None
+        first_ms = timed(engine.get_dataframe, repeat=1)
+        engine.tick()
+        new_ms = timed(engine.get_dataframe)
+
+        report(f"{n:>9,} bags", old_ms, max(new_ms, 1e-3), old_mb, first_mb)
+        print(f"  {Fore.CYAN}→ first view build: {first_ms:.2f} ms, later reruns reuse it")
+
+
+# ==================== SIMULATION TICK ====================
+
+def legacy_tick(bags):
+    """Reference implementation: the per-bag loop of the original SimulationEngine.tick()."""
+    import random
+
+    def interpolate_pos(origin, dest, t):
+        lat = origin.lat + (dest.lat - origin.lat) * t
+        lon = origin.lon + (dest.lon - origin.lon) * t
+        return lat, lon
+
+    for bag in bags:
+        if bag.status == BagStatus.CHECK_IN:
+            if random.random() < 0.1:
+                bag.status = BagStatus.SECURITY
+                bag.update_history("Cleared Check-in")
+
+        elif bag.status == BagStatus.SECURITY:
+            if random.random() < 0.1:
+                bag.status = BagStatus.AT_GATE
+                bag.update_history("Cleared Security")
+
+        elif bag.status == BagStatus.AT_GATE:
+            if random.random() < 0.05:
+                bag.status = BagStatus.IN_TRANSIT
+                bag.progress = 0.0
+                bag.update_history("Boarded Flight")
+
+        elif bag.status == BagStatus.IN_TRANSIT:
+            bag.progress += 0.02 # Move 2% per tick
+            if bag.progress >= 1.0:
+                bag.status = BagStatus.LANDED
+                bag.current_lat, bag.current_lon = bag.destination.lat, bag.destination.lon
+                bag.update_history(f"Landed at {bag.destination.name}")
+            else:
+                lat, lon = interpolate_pos(bag.origin, bag.destination, bag.progress)
+                bag.current_lat = lat
+                bag.current_lon = lon
+
+        elif bag.status == BagStatus.LANDED:
+            if random.random() < 0.1:
+                bag.status = BagStatus.BAGGAGE_CLAIM
+                bag.update_history("Unloaded to Baggage Claim")
+
+        elif bag.status == BagStatus.BAGGAGE_CLAIM:
+            if random.random() < 0.05:
+                bag.status = BagStatus.CLAIMED
+                bag.update_history("Picked up by owner")
+
+
+def bench_tick(sizes=(1_000, 100_000, 1_000_000), ticks=5):
+    print_header("Simulation tick (per-bag loop vs array engine)")
+    for n in sizes:
+        engine = quiet(SimulationEngine, num_bags=n)
+        bags = list(engine.bags)
+        old_ms = timed(lambda: legacy_tick(bags), repeat=ticks)
+        del bags
+        new_ms = timed(engine.tick, repeat=ticks)
+        report(f"{n:>9,} bags", old_ms, new_ms)
+        print(f"  {Fore.CYAN}→ {1000 / old_ms:,.1f} → {1000 / new_ms:,.1f} ticks/s")
+
+
+def legacy_status_scans(df):
+    """Reference implementation: render_metrics + capture_stats, one boolean mask per status."""
+    metrics = (len(df), len(df[df['status'] == 'Lost']), len(df[df['status'] == 'In Transit']),
+               len(df[df['status'] == 'Baggage Claim']) + len(df[df['status'] == 'Landed']))
+    stats = (len(df), len(df[df['status'] == 'In Transit']),
+             len(df[df['status'].isin(['Landed', 'Baggage Claim'])]), len(df[df['status'] == 'Lost']))
+    return metrics, stats
+
+
+def bench_status_counts(sizes=(10_000, 500_000), ticks=20):
+    import numpy as np
+    from services.bag_decoder import decode_updates
+    from services.bag_store import STATUS_VALUES, count_statuses
+
+    print_header("Status counts (per-status scans vs incremental counter)")
+    for n in sizes:
+        engine = SimulationEngine(num_bags=n)
+        engine.tick()
+        df = engine.get_dataframe()
+        old_ms = timed(lambda: legacy_status_scans(df))
+        pass_ms = timed(lambda: count_statuses(df))
+        new_ms = timed(engine.store.status_counts)
+        report(f"{n:>9,} bags", old_ms, max(new_ms, 1e-3))
+        print(f"  {Fore.CYAN}→ single value_counts fallback: {pass_ms:.2f} ms")
+
+    # The counter must track every way rows change
+    store = engine.store
+    rng = np.random.default_rng(0)
+    for _ in range(ticks):
+        engine.tick()
+    batch = store.new_batch()
+    bags = [store.make_bag(i) for i in rng.integers(0, len(store), 500)]
+    bags += [store.make_bag(i) for i in range(5)]
+    for k, bag in enumerate(bags[-5:]):
+        bag.id = f"NEW-{k}"
+    batch.load_bags(bags)
+    batch.set_status(slice(None), rng.integers(0, len(STATUS_VALUES), len(batch)))
+    store.merge(batch)
+    ids = [store.ids[i] for i in rng.integers(0, len(store), 1000)]
+    store.apply_updates(decode_updates([{"bag_id": b, "new_status": rng.choice(["LOST", "LANDED"])}
+                                        for b in ids + ids[:100]]))
+    store.remove_ids(ids[:50] + ["MISSING"])
+    same = store.status_counts() == {s: count_statuses(store.dataframe()).get(s, 0) for s in STATUS_VALUES}
+    mark = f"{Fore.GREEN}✓" if same else f"{Fore.RED}✗"
+    print(f"{mark} counter {'matches' if same else 'DIFFERS from'} a full recount after "
+          f"{ticks} ticks, merge, live updates and removals")
+
+
+def bench_scheduler(sizes=(100_000, 1_000_000), ticks=10):
+    # Equivalence of the two schedulers is checked in test_simulation.py
+    def engines(n):
+        """A dice engine and an event-queue engine starting from the same fleet (same RNG seed)."""
+        return (SimulationEngine(num_bags=n, scheduler="dice", seed=0),
+                SimulationEngine(num_bags=n, scheduler="events", seed=0))
+
+    def run(engine, ticks):
+        """Per-tick (transition work ms: picking + rescheduling, tick ms, bags picked)."""
+        work, total, picked = [0.0] * ticks, [], []
+        moving, schedule = engine._moving, engine._schedule
+
+        def timed(fn, count=False):
+            def wrapper(arg):
+                start = time.perf_counter()
+                result = fn(arg)
+                work[len(total)] += (time.perf_counter() - start) * 1000
+                if count:
+                    picked.append(len(result))
+                return result
+            return wrapper
+        engine._moving, engine._schedule = timed(moving, count=True), timed(schedule)
+        for _ in range(ticks):
+            start = time.perf_counter()
+            engine.tick()
+            total.append((time.perf_counter() - start) * 1000)
+        return statistics.median(work), statistics.median(total), statistics.mean(picked)
+
+    print_header("Status transitions (dice roll per bag vs event queue)")
+    for n in sizes:
+        dice, events = engines(n)
+        old_pick, old_tick, _ = run(dice, ticks)
+        new_pick, new_tick, picked = run(events, ticks)
+        report(f"{n:>9,} bags, pick + reschedule transitions", old_pick, new_pick)
+        report(f"{n:>9,} bags, whole tick", old_tick, new_tick)
+        print(f"  {Fore.CYAN}→ {n:,} dice rolls vs {picked:,.0f} queued transitions per tick "
+              f"({len(events.schedule):,} bags waiting)")
+
+
+def bench_warp(sizes=((10_000, 500), (100_000, 100))):
+    from services.data_hub import DataHub
+    from services.stats_history import StatsHistory, fleet_stats
+
+    print_header("Fast-forward (Step +1 per tick vs advance)")
+    for n, ticks in sizes:
+        # A fresh fleet for each (bags end up claimed or lost, which makes later ticks cheaper)
+        def step():
+            # What each "Step +1" rerun did server-side: tick, shared snapshot, stats point
+            for _ in range(ticks):
+                hub.tick()
+                history.record(fleet_stats(hub.snapshot().status_counts), hub.now())
+
+        def warp():
+            start = hub.now()
+            history.record_counts(hub.advance(ticks), start, hub.interval)
+
+        elapsed = {}
+        for name, run in (("step", step), ("warp", warp)):
+            hub = DataHub(SimulationEngine(num_bags=n), interval=0.5)
+            history = StatsHistory()
+            elapsed[name] = timed(run, repeat=1)
+        old_ms, new_ms = elapsed["step"], elapsed["warp"]
+        report(f"{n:>7,} bags, {ticks} ticks", old_ms, new_ms)
+        print(f"  {Fore.CYAN}→ {ticks / old_ms * 1000:,.0f} → {ticks / new_ms * 1000:,.0f} simulated ticks/s "
+              f"({ticks * hub.interval:,.0f} s of simulated time in {new_ms / 1000:.2f} s)")
+
+
+def bench_snapshot(n=1_000_000, warmup=5):
+    # Replaying ticks after a restore is checked in test_simulation.py
+    import tempfile
+
+    print_header("Simulation snapshot (rebuild vs restore)")
+    build_ms = timed(lambda: SimulationEngine(num_bags=n, seed=1), repeat=1)
+    engine = SimulationEngine(num_bags=n, seed=1)
+    for _ in range(warmup):
+        engine.tick()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "simulation.npz")
+        save_ms = timed(lambda: engine.save_snapshot(path), repeat=1)
+        size_mb = os.path.getsize(path) / 1e6
+        load_ms = timed(lambda: SimulationEngine.load_snapshot(path), repeat=1)
+
+    report(f"{n:,} bags, restart (new fleet vs load)", build_ms, load_ms)
+    events = len(engine.events)
+    print(f"  {Fore.CYAN}→ save {save_ms:,.0f} ms, {size_mb:,.1f} MB on disk "
+          f"({size_mb * 1e6 / n:,.0f} bytes/bag with {events / n:.1f} history events/bag)")
+
+
+def bench_event_log(events=1_000_000, bags=250_000):
+    import datetime
+    from services.airports import AIRPORTS
+    from services.event_log import EventLog
+
+    print_header("Bag tracking history (tuple lists vs columnar event log)")
+    airports = list(AIRPORTS.values())
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, bags, events)
+    dest = rng.integers(0, len(airports), events)
+    batches = np.array_split(np.arange(events), 100)  # ~100 ticks' worth of transitions
+
+    def legacy():
+        # Reference implementation: one (datetime, f-string) tuple per event in per-bag lists
+        history = [[] for _ in range(bags)]
+        for batch in batches:
+            for i, d in zip(rows[batch].tolist(), dest[batch].tolist()):
+                history[i].append((datetime.datetime.now(), f"Landed at {airports[d].name}"))
+        return history
+
+    def columnar():
+        log = EventLog()
+        kind = log.kind("Landed at {airport}")
+        for batch in batches:
+            log.append(rows[batch], kind, dest[batch])
+        return log
+
+    old_mb = peak_memory(legacy)
+    new_mb = peak_memory(columnar)
+    old_ms = timed(legacy, repeat=1)
+    new_ms = timed(columnar, repeat=1)
+    report(f"{events:,} events over {bags:,} bags, append", old_ms, new_ms,
+           old_mb * 1e6 / events, new_mb * 1e6 / events)
+    log = columnar()
+    history = legacy()
+    busiest = int(np.bincount(rows).argmax())
+    lookup_ms = timed(lambda: log.timeline(busiest, airports))
+    same = [m for _, m in log.timeline(busiest, airports)] == [m for _, m in history[busiest]]
+    print(f"  {Fore.CYAN}→ MB per million events (peak allocation); {log.nbytes / events:.0f} bytes/event held; "
+          f"one bag's timeline ({len(history[busiest])} events) built in {lookup_ms:.3f} ms, "
+          f"{'same' if same else 'DIFFERENT'} messages")
+
+
+def bench_models(n=1_000_000):
+    import dataclasses
+    from services.models import Airport, Bag
+
+    print_header("Bag objects (plain dataclasses vs slotted / compact models)")
+
+    @dataclasses.dataclass
+    class LegacyAirport:
+        code: str
+        name: str
+        lat: float
+        lon: float
+
+    @dataclasses.dataclass
+    class LegacyBag:
+        id: str
+        owner: str
+        origin: LegacyAirport
+        destination: LegacyAirport
+        current_lat: float
+        current_lon: float
+        status: BagStatus
+        color: list
+        history: list = dataclasses.field(default_factory=list)
+        progress: float = 0.0
+
+    engine = quiet(SimulationEngine, num_bags=n)
+    store = engine.store
+    holder = []
+
+    def legacy():
+        # Reference: bags decoded one by one, each with its own airports and color list
+        bags = []
+        for i in range(n):
+            bag = store.make_bag(i)
+            o, d = bag.origin, bag.destination
+            bags.append(LegacyBag(bag.id, bag.owner, LegacyAirport(o.code, o.name, o.lat, o.lon),
+                                  LegacyAirport(d.code, d.name, d.lat, d.lon), bag.current_lat,
+                                  bag.current_lon, bag.status, list(bag.color), [], bag.progress))
+        holder[:] = bags
+
+    def slotted():
+        # Same decoding with the slotted models: airports equal by value but separate objects
+        bags = []
+        for i in range(n):
+            bag = store.make_bag(i)
+            o, d = bag.origin, bag.destination
+            bags.append(Bag(bag.id, bag.owner, Airport(o.code, o.name, o.lat, o.lon),
+                            Airport(d.code, d.name, d.lat, d.lon), bag.current_lat,
+                            bag.current_lon, bag.status, list(bag.color), [], bag.progress))
+        holder[:] = bags
+
+    def compact():
+        holder[:] = [store.make_compact_bag(i) for i in range(n)]
+
+    # Ids/owners and floats are shared with the store in every variant; the gap is the model overhead
+    results = []
+    for fn in (legacy, slotted, compact):
+        results.append((timed(fn, repeat=1), peak_memory(fn)))
+        holder.clear()
+    (old_ms, old_mb), *variants = results
+    for label, (new_ms, new_mb) in zip(("slotted Bag", "CompactBag"), variants):
+        report(f"{n:,} bags, {label}", old_ms, new_ms, old_mb, new_mb)
+
+    compact()
+    bags = holder
+    fields_match = all(
+        (c.id, c.origin.code, c.destination.code, c.status, c.color, c.current_lat) ==
+        (b.id, b.origin.code, b.destination.code, b.status, b.color, b.current_lat)
+        for c, b in zip(bags[:1000], map(store.make_bag, range(1000))))
+    airports = len({id(a) for b in bags for a in (b.origin, b.destination)})
+    print(f"  {Fore.CYAN}→ {airports} distinct Airport objects behind {n:,} compact bags; "
+          f"attributes {'match' if fields_match else 'DIFFER from'} Bag")
+    holder.clear()
+
+
+def bench_history(lengths=(1_000, 28_800, 200_000)):
+    from datetime import datetime, timedelta
+    from services.stats_history import StatsHistory
+
+    print_header("Stats history (growing list vs ring buffers + rollups)")
+    start = datetime(2026, 1, 1, 6, 0)
+    for n in lengths:
+        points = [{'Total Active': 10_000, 'In Transit': k % 500, 'Landed': k % 300, 'Lost': k % 7}
+                  for k in range(n)]
+
+        def legacy():
+            history = []
+            for k, stats in enumerate(points):
+                history.append({'timestamp': k, **stats})
+            return history
+
+        def bounded():
+            history = StatsHistory()
+            for k, stats in enumerate(points):
+                history.record(stats, start + timedelta(seconds=k))
+            return history
+
+        legacy_history, history = legacy(), bounded()
+        old_mb = peak_memory(legacy)
+        new_mb = history.nbytes / 1e6
+        old_ms = timed(lambda: pd.DataFrame(legacy_history).melt('timestamp'))
+        new_ms = timed(lambda: history.frame("1 min").melt('timestamp'))
+        report(f"{n:>7,} ticks ({n / 3600:4.1f} h at 1/s), chart prep", old_ms, new_ms, old_mb, new_mb)
+    print(f"  {Fore.CYAN}→ {len(history.frame('Raw'))} raw points, {len(history.frame('1 min'))} "
+          f"1-minute and {len(history.frame('1 h'))} 1-hour means kept ({history.nbytes / 1e3:.0f} KB, fixed)")
+
+
+def legacy_notifications(bags, previous_states, log):
+    """Reference implementation: diff every bag against the previous rerun; returns toasts shown."""
+    toasts = 0
+    for bag in bags:
+        prev_status = previous_states.get(bag.id)
+        if prev_status and prev_status != bag.status:
+            msg = None
+            if bag.status == BagStatus.LOST:
+                msg = f"⚠️ CRITICAL: {bag.id} reported LOST at {bag.origin.name}!"
+            elif bag.status == BagStatus.LANDED:
+                msg = f"🛬 {bag.id} has landed at {bag.destination.name}."
+            if msg:
+                toasts += 1
+                log.insert(0, {"time": pd.Timestamp.now().strftime("%H:%M:%S"), "message": msg})
+        previous_states[bag.id] = bag.status
+    return toasts
+
+
+def bench_notifications(sizes=(10_000, 100_000), ticks=10):
+    import streamlit as st
+    from components import notifications
+
+    print_header("Notifications (full-fleet diff vs transition events)")
+    toasts = []
+    notifications.st.toast = lambda *args, **kwargs: toasts.append(args)
+    for n in sizes:
+        engine = SimulationEngine(num_bags=n)
+        previous_states, legacy_log = {}, []
+        legacy_notifications(engine.bags, previous_states, legacy_log)
+        st.session_state.pop('notification_log', None)
+        cursor = engine.transitions.since(None).seq
+        old_ms, new_ms, old_toasts = [], [], 0
+        toasts.clear()
+        for _ in range(ticks):
+            engine.tick()
+            start = time.perf_counter()
+            old_toasts += legacy_notifications(list(engine.bags), previous_states, legacy_log)
+            old_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            changes = engine.transitions.since(cursor)
+            cursor = changes.seq
+            notifications.check_notifications(changes)
+            new_ms.append((time.perf_counter() - start) * 1000)
+        report(f"{n:>9,} bags, per tick", statistics.median(old_ms), statistics.median(new_ms))
+        print(f"  {Fore.CYAN}→ toasts over {ticks} ticks: {old_toasts:,} → {len(toasts)}; "
+              f"log entries: {len(legacy_log):,} → {len(st.session_state.notification_log)} (capped)")
+
+
+def legacy_deck(df):
+    """Reference implementation: every bag as a point and every in-transit bag as an arc."""
+    import pydeck as pdk
+    layers = [pdk.Layer("ScatterplotLayer", df, get_position=["lon", "lat"], get_color="color",
+                        get_radius="size_scale", radius_scale=500, pickable=True)]
+    in_transit = df[df['status'].isin(['In Transit', 'IN_TRANSIT', 'In Flight'])]
+    if len(in_transit) > 0:
+        layers.append(pdk.Layer("ArcLayer", data=in_transit, get_source_position=["lon", "lat"],
+                                get_target_position=["dest_lon", "dest_lat"], get_width=2, pickable=True))
+    return pdk.Deck(initial_view_state=pdk.ViewState(latitude=20.0, longitude=0.0, zoom=1.5), layers=layers)
+
+
+def bench_map(sizes=(10_000, 100_000)):
+    import pydeck as pdk
+    from services.airports import AIRPORTS
+    from services.map_lod import Viewport, level_of_detail
+
+    print_header("Map payload (every bag vs level of detail + culling)")
+    jfk = AIRPORTS["JFK"]
+    views = {"world": Viewport(), "JFK zoom 6": Viewport(jfk.lat, jfk.lon, 6)}
+    for n in sizes:
+        engine = SimulationEngine(num_bags=n)
+        df = engine.get_dataframe()
+        old_json = legacy_deck(df).to_json()
+        old_ms = timed(lambda: legacy_deck(df).to_json(), repeat=3)
+        for name, view in views.items():
+            def lod_deck():
+                lod = level_of_detail(df, view)
+                layers = [pdk.Layer("ScatterplotLayer", data, get_position=["lon", "lat"])
+                          for data in (lod.clusters, lod.points, lod.arcs) if len(data)]
+                return pdk.Deck(initial_view_state=pdk.ViewState(latitude=view.latitude, longitude=view.longitude,
+                                                                 zoom=view.zoom), layers=layers), lod
+            deck, lod = lod_deck()
+            new_json = deck.to_json()
+            new_ms = timed(lambda: lod_deck()[0].to_json(), repeat=3)
+            report(f"{n:>7,} bags, {name:<10} render", old_ms, new_ms,
+                   len(old_json) / 1e6, len(new_json) / 1e6)
+            print(f"  {Fore.CYAN}→ {lod.visible:,} in view: {len(lod.points):,} points, "
+                  f"{len(lod.clusters):,} clusters, {len(lod.arcs):,} arcs (MB = JSON payload)")
+
+
+def bench_heatmap(sizes=(10_000, 100_000), ticks=10):
+    import pydeck as pdk
+    from services.heat_grid import HeatGrid, heat_cells
+
+    print_header("Heatmap (every bag vs incrementally binned grid)")
+    for n in sizes:
+        engine = SimulationEngine(num_bags=n)
+        store = engine.store
+        grid = HeatGrid()
+        grid.update(store.lat, store.lon, store.status)
+
+        def deck(data, weight):
+            layer = pdk.Layer("HeatmapLayer", data=data, get_position=["lon", "lat"], get_weight=weight)
+            return pdk.Deck(layers=[layer]).to_json()
+
+        old_ms, new_ms, rebin_ms, moved = [], [], [], 0
+        for _ in range(ticks):
+            engine.tick()
+            df = engine.get_dataframe()
+            start = time.perf_counter()
+            old_json = deck(df, 1)
+            old_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            moved += grid.update(store.lat, store.lon, store.status)
+            new_json = deck(grid.cells()[["lon", "lat", "weight"]], "weight")
+            new_ms.append((time.perf_counter() - start) * 1000)
+            rebin_ms.append(timed(lambda: heat_cells(df), repeat=1))
+
+        fresh = heat_cells(engine.get_dataframe())
+        cells = grid.cells()
+        same = (len(fresh) == len(cells) and np.array_equal(fresh['weight'], cells['weight'])
+                and np.allclose(fresh[['lat', 'lon']], cells[['lat', 'lon']]))
+        report(f"{n:>7,} bags, heatmap per tick", statistics.mean(old_ms), statistics.mean(new_ms),
+               len(old_json) / 1e6, len(new_json) / 1e6)
+        print(f"  {Fore.CYAN}→ {len(cells):,} occupied cells, {moved // ticks:,} bags re-binned per tick "
+              f"(full rebin {statistics.mean(rebin_ms):.1f} ms), matches full rebin: {same} (MB = JSON payload)")
+
+
+def bench_transport(n=100_000):
+    import gzip
+    import pydeck as pdk
+    from components.map_view import CompactDeck
+    from services.heat_grid import heat_cells
+    from services.map_lod import Viewport, compact, level_of_detail
+
+    print_header("Map transport (pretty-printed vs compact deck JSON)")
+    engine = SimulationEngine(num_bags=n)
+    for _ in range(5):
+        engine.tick()
+    df = engine.get_dataframe()
+    lod = level_of_detail(df, Viewport())
+    heat = heat_cells(df)[["lon", "lat", "weight"]]
+
+    def spec(deck_class, prepare):
+        layers = [pdk.Layer("HeatmapLayer", prepare(heat), get_position=["lon", "lat"], get_weight="weight"),
+                  pdk.Layer("ScatterplotLayer", prepare(lod.clusters), get_position=["lon", "lat"],
+                            get_fill_color="color", get_radius="radius"),
+                  pdk.Layer("ScatterplotLayer", prepare(lod.points), get_position=["lon", "lat"],
+                            get_color="color", get_radius="size_scale"),
+                  pdk.Layer("ArcLayer", prepare(lod.arcs), get_source_position=["lon", "lat"],
+                            get_target_position=["dest_lon", "dest_lat"])]
+        return deck_class(initial_view_state=pdk.ViewState(latitude=20.0, longitude=0.0, zoom=1.5),
+                          layers=layers).to_json()
+
+    old_json = spec(pdk.Deck, lambda frame: frame).encode()
+    new_json = spec(CompactDeck, compact).encode()
+    report(f"{n:,} bags, deck spec build", timed(lambda: spec(pdk.Deck, lambda frame: frame)),
+           timed(lambda: spec(CompactDeck, compact)), len(old_json) / 1e6, len(new_json) / 1e6)
+    # The browser parses the spec before deck.gl builds its buffers; json.loads stands in for it
+    report("  spec parse (json.loads, client-side proxy)", timed(lambda: json.loads(old_json)),
+           timed(lambda: json.loads(new_json)))
+    print(f"  {Fore.CYAN}→ gzip: {len(gzip.compress(old_json)) / 1e3:,.0f} KB → "
+          f"{len(gzip.compress(new_json)) / 1e3:,.0f} KB; layers: {len(heat):,} heat cells, "
+          f"{len(lod.clusters):,} clusters, {len(lod.points):,} points, {len(lod.arcs):,} arcs (MB = spec size)")
+
+
+def legacy_great_circle(airports, origin, dest, t):
+    """Reference implementation: great-circle position from scratch for each bag."""
+    lat, lon = np.empty(len(t)), np.empty(len(t))
+    for i, (o, d, f) in enumerate(zip(origin.tolist(), dest.tolist(), t.tolist())):
+        a, b = airports[o], airports[d]
+        lat1, lon1, lat2, lon2 = map(math.radians, (a.lat, a.lon, b.lat, b.lon))
+        delta = 2 * math.asin(math.sqrt(math.sin((lat2 - lat1) / 2) ** 2 +
+                                        math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2))
+        wa, wb = math.sin((1 - f) * delta) / math.sin(delta), math.sin(f * delta) / math.sin(delta)
+        x = wa * math.cos(lat1) * math.cos(lon1) + wb * math.cos(lat2) * math.cos(lon2)
+        y = wa * math.cos(lat1) * math.sin(lon1) + wb * math.cos(lat2) * math.sin(lon2)
+        z = wa * math.sin(lat1) + wb * math.sin(lat2)
+        lat[i] = math.degrees(math.atan2(z, math.hypot(x, y)))
+        lon[i] = math.degrees(math.atan2(y, x))
+    return lat, lon
+
+
+def bench_routes(sizes=(100_000, 1_000_000)):
+    from services.airports import AIRPORTS, GreatCircleRoutes
+
+    print_header("Flight positions (per-bag great circle vs vectorized)")
+    airports = list(AIRPORTS.values())
+    codes = list(AIRPORTS)
+    routes = GreatCircleRoutes()
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        origin = rng.integers(0, len(airports), n)
+        dest = (origin + rng.integers(1, len(airports), n)) % len(airports)
+        t = rng.random(n)
+        old_ms = timed(lambda: legacy_great_circle(airports, origin, dest, t), repeat=1)
+        new_ms = timed(lambda: routes.position(airports, origin, dest, t))
+        report(f"{n:>9,} bags in flight, positions per tick", old_ms, new_ms)
+        ap_lat = np.array([a.lat for a in airports])
+        ap_lon = np.array([a.lon for a in airports])
+        linear_ms = timed(lambda: (ap_lat[origin] + (ap_lat[dest] - ap_lat[origin]) * t,
+                                   ap_lon[origin] + (ap_lon[dest] - ap_lon[origin]) * t))
+        print(f"  {Fore.CYAN}→ previous linear lat/lon interpolation (wrong path): {linear_ms:.2f} ms")
+        lat, lon = routes.position(airports, origin[:1000], dest[:1000], t[:1000])
+        ref_lat, ref_lon = legacy_great_circle(airports, origin[:1000], dest[:1000], t[:1000])
+        error = max(np.abs(lat - ref_lat).max(), np.abs((lon - ref_lon + 180) % 360 - 180).max())
+        print(f"  {Fore.CYAN}→ max difference from the per-bag path: {error:.1e}°")
+
+    syd, lax = codes.index("SYD"), codes.index("LAX")
+    lat, lon = routes.position(airports, np.array([syd] * 3), np.array([lax] * 3), np.array([0.25, 0.5, 0.75]))
+    print(f"  {Fore.CYAN}→ SYD → LAX at 25/50/75%: " +
+          ", ".join(f"({a:.1f}, {o:.1f})" for a, o in zip(lat, lon)) + " (crosses the antimeridian)")
+
+
+# ==================== HTTP TRANSPORT ====================
+
+def bench_http(num_requests=200, consoles=4):
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+    from mock_backend import MockBackend
+    from services.http_client import ApiTransport
+
+    print_header("HTTP transport (bare requests vs pooled session)")
+    backend = MockBackend(num_bags=100).start()
+    paths = ["/api/bags", "/api/analytics/dashboard", "/api/analytics/losses",
+             "/api/analytics/top-airports", "/api/analytics/hub-statistics"]
+
+    def run(get):
+        """Each console polls the endpoints round-robin; returns per-request ms."""
+        def console(_):
+            samples = []
+            for i in range(num_requests // consoles):
+                start = time.perf_counter()
+                get(paths[i % len(paths)]).content
+                samples.append((time.perf_counter() - start) * 1000)
+            return samples
+        with ThreadPoolExecutor(consoles) as pool:
+            return [s for samples in pool.map(console, range(consoles)) for s in samples]
+
+    backend.reset_stats()
+    old = run(lambda path: requests.get(f"{backend.url}{path}", timeout=5))
+    old_conns = backend.connections
+
+    transport = ApiTransport(backend.url)
+    backend.reset_stats()
+    new = run(transport.get)
+    new_conns = backend.connections
+    pool = transport.stats()
+    transport.close()
+    backend.stop()
+
+    report(f"{num_requests} requests, median latency", statistics.median(old), statistics.median(new))
+    print(f"  {Fore.CYAN}→ TCP connections opened: {old_conns} → {new_conns} "
+          f"(client pool: {pool['connections']} connections, {pool['requests']} requests)")
+
+
+# ==================== ANALYTICS FAN-OUT ====================
+
+def bench_analytics(latency=0.1, sessions=20):
+    from mock_backend import MockBackend
+    from services.api_service import RealTimeService
+
+    print_header("Analytics tab fetch (sequential vs parallel)")
+    backend = MockBackend(num_bags=100, latency=latency).start()
+    service = RealTimeService(base_url=backend.url)
+
+    def sequential():
+        service.get_analytics_dashboard()
+        service.get_loss_analytics()
+        service.get_top_airports()
+        service.get_hub_statistics()
+
+    old_ms = timed(sequential)
+    new_ms = timed(service.get_analytics_bundle)
+    report(f"4 endpoints @ {latency * 1000:.0f} ms each", old_ms, new_ms)
+
+    # Many sessions opening the tab at once: each fans out through the
+    # process-wide pool, or all share the hub's fetch
+    from concurrent.futures import ThreadPoolExecutor
+    from services.data_hub import DataHub
+
+    def concurrent(fetch):
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            bundles = list(pool.map(lambda _: fetch(), range(sessions)))
+        return sum(len(b["missing"]) for b in bundles)
+
+    per_session_ms = timed(lambda: concurrent(service.get_analytics_bundle), repeat=1)
+    missing = concurrent(service.get_analytics_bundle)
+    hub = DataHub(service, interval=1.0)
+    shared_ms = timed(lambda: concurrent(hub.analytics_bundle), repeat=1)
+    backend.stop()
+    report(f"{sessions} sessions at once (per-session fetch vs hub)", per_session_ms, shared_ms)
+    print(f"  {Fore.CYAN}→ per-session fetches queue on the shared pool; {missing} calls missed the deadline")
+
+
+# ==================== DELTA SYNC ====================
+
+def bench_delta(num_bags=20_000, polls=5):
+    from mock_backend import MockBackend
+    from services.api_service import RealTimeService
+    from services.bag_store import STATUS_LIST
+
+    print_header("Bag polling (full refetch vs delta sync)")
+    backend = MockBackend(num_bags=num_bags).start()
+    service = quiet(RealTimeService, base_url=backend.url)
+    quiet(service.tick)  # first sync is a full snapshot
+
+    full_ms, full_bytes, delta_ms, delta_bytes = [], [], [], []
+    for _ in range(polls):
+        backend.advance()
+
+        backend.reset_stats()
+        start = time.perf_counter()
+        quiet(service._fetch_all_bags, limit=num_bags, wait=True)
+        full_ms.append((time.perf_counter() - start) * 1000)
+        full_bytes.append(backend.bytes_sent)
+        quiet(service.tick)  # resync the watermark after the full fetch
+
+        backend.advance()
+        backend.reset_stats()
+        start = time.perf_counter()
+        quiet(service.tick)
+        delta_ms.append((time.perf_counter() - start) * 1000)
+        delta_bytes.append(backend.bytes_sent)
+
+    # Deletions arrive as tombstones
+    deleted = [backend.engine.store.ids[i] for i in range(0, num_bags, 1000)]
+    backend.delete_bags(deleted)
+    backend.advance()
+    quiet(service.tick)
+
+    # The merged store must match the backend exactly
+    store, truth = service.store, backend.engine.store
+    alive = {truth.ids[i]: i for i in range(len(truth)) if backend._alive[i]}
+    consistent = len(store) == len(alive) and all(
+        store.status[store.row_of(b)] == truth.status[i] and store.lat[store.row_of(b)] == truth.lat[i]
+        for b, i in alive.items()
+    )
+    backend.stop()
+
+    report(f"{num_bags:,} bags, poll time", statistics.median(full_ms), statistics.median(delta_ms))
+    print(f"  {Fore.CYAN}→ bytes per poll (gzip): {statistics.median(full_bytes) / 1e3:,.0f} KB → "
+          f"{statistics.median(delta_bytes) / 1e3:,.0f} KB")
+    mark = f"{Fore.GREEN}✓" if consistent else f"{Fore.RED}✗"
+    print(f"{mark} Delta-synced store matches backend after {len(deleted)} deletions "
+          f"({len(service.tombstones)} tombstones)")
+
+
+# ==================== PAGINATED INGESTION ====================
+
+def bench_ingest(num_bags=100_000, latency=0.02):
+    import config
+    from mock_backend import MockBackend
+    from services.api_service import RealTimeService
+
+    print_header("Fleet ingestion (single request vs concurrent pages)")
+    backend = MockBackend(num_bags=num_bags).start()
+    service = quiet(RealTimeService, base_url=backend.url)
+    # Simulated server/network time per request; the mock runs in this
+    # process, so its JSON encoding competes with the client for the GIL
+    backend.latency = latency
+    print(f"{Fore.CYAN}  {num_bags:,} bags, {latency * 1000:.0f} ms backend latency per request")
+
+    # Old path: the whole fleet as one JSON array
+    page_size = config.BAG_PAGE_SIZE
+    config.BAG_PAGE_SIZE = num_bags
+    start = time.perf_counter()
+    quiet(service._fetch_all_bags, wait=True)
+    single_s = time.perf_counter() - start
+    config.BAG_PAGE_SIZE = page_size
+
+    print(f"{Fore.GREEN}✓ single request: {num_bags / single_s:10,.0f} bags/s "
+          f"(first bag visible after {single_s * 1000:,.0f} ms)")
+
+    concurrency = config.INGEST_CONCURRENCY
+    for workers in (1, concurrency):
+        config.INGEST_CONCURRENCY = workers
+        start = time.perf_counter()
+        quiet(service._fetch_all_bags)
+        first_ms = (time.perf_counter() - start) * 1000
+        service._ingest_thread.join()
+        total_s = time.perf_counter() - start
+        ok = len(service.store) == num_bags
+        mark = f"{Fore.GREEN}✓" if ok else f"{Fore.RED}✗"
+        print(f"{mark} {page_size}-bag pages x{workers}: {num_bags / total_s:10,.0f} bags/s "
+              f"(first page visible after {first_ms:,.0f} ms, {len(service.store):,} loaded)")
+    config.INGEST_CONCURRENCY = concurrency
+    backend.stop()
+
+
+# ==================== AIRPORT LOOKUP ====================
+
+def bench_airports(num_airports=5_000, num_bags=20_000):
+    import numpy as np
+    from services.airports import AirportRegistry
+    from services.models import Airport
+
+    print_header("Airport lookup while parsing (linear scan vs registry)")
+    rng = np.random.default_rng(7)
+    airports = [
+        Airport(f"A{i:04d}", f"Airport {i}", float(np.degrees(np.arcsin(rng.uniform(-1, 1)))),
+                float(rng.uniform(-180, 180)))
+        for i in range(num_airports)
+    ]
+    codes = [a.code for a in airports] + ["UNKNOWN"]
+    payload = [
+        {"id": f"BAG-{i}", "status": "IN_TRANSIT", "owner_name": "x",
+         "origin_code": codes[rng.integers(len(codes))],
+         "destination_code": codes[rng.integers(len(codes))]}
+        for i in range(num_bags)
+    ]
+
+    registry = AirportRegistry(airports)
+
+    def linear_lookup(code):
+        for airport in airports:
+            if airport.code == code:
+                return airport
+        return Airport(code=code, name=code, lat=0.0, lon=0.0)
+
+    old_ms = timed(lambda: legacy_parse(payload, linear_lookup), repeat=1)
+    new_ms = timed(lambda: legacy_parse(payload, registry.get_or_placeholder), repeat=3)
+    report(f"{num_bags:,} bags x {num_airports:,} airports", old_ms, new_ms)
+
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, 1000)))
+    lon = rng.uniform(-180, 180, 1000)
+    def haversine_scan(qlat, qlon):
+        """Reference: great-circle distance to every airport, one by one."""
+        def dist(a):
+            p1, p2 = math.radians(qlat), math.radians(a.lat)
+            h = (math.sin((p2 - p1) / 2) ** 2 +
+                 math.cos(p1) * math.cos(p2) * math.sin(math.radians(a.lon - qlon) / 2) ** 2)
+            return h
+        return min(airports, key=dist)
+
+    scan_ms = timed(lambda: [haversine_scan(a, b) for a, b in zip(lat[:100], lon[:100])], repeat=1) * 10
+    index_ms = timed(lambda: [registry.nearest(a, b) for a, b in zip(lat, lon)], repeat=3)
+    batch_ms = timed(lambda: registry.nearest_many(lat, lon), repeat=3)
+    report("1,000 nearest-airport queries", scan_ms, index_ms)
+    print(f"  {Fore.CYAN}→ batched nearest_many(): {batch_ms:.2f} ms")
+    same = all(haversine_scan(a, b) is registry.nearest(a, b) for a, b in zip(lat[:50], lon[:50]))
+    print(f"{Fore.GREEN if same else Fore.RED}{'✓' if same else '✗'} index agrees with haversine scan")
+
+
+# ==================== BAG PARSING ====================
+
+def legacy_parse(data, lookup_airport):
+    """Reference implementation: one Bag object per item, errors printed."""
+    from services.models import Bag
+    bags = []
+    for item in data:
+        try:
+            status_map = {s.name: s for s in BagStatus}
+            status = status_map.get(item.get("status", "CHECK_IN"), BagStatus.CHECK_IN)
+            origin = lookup_airport(item.get("origin_code", item.get("origin", "JFK")))
+            destination = lookup_airport(item.get("destination_code", item.get("destination", "LHR")))
+            bags.append(Bag(
+                id=item["id"],
+                owner=item.get("owner_name", item.get("owner", "Unknown")),
+                origin=origin,
+                destination=destination,
+                current_lat=item.get("current_lat", item.get("lat", 0.0)),
+                current_lon=item.get("current_lon", item.get("lon", 0.0)),
+                status=status,
+                color=item.get("color", [0, 255, 0, 255]),
+                progress=item.get("progress", 0.0)
+            ))
+        except Exception as e:
+            print(f"❌ Error parsing bag: {e}")
+    return bags
+
+
+def bench_parse(num_bags=100_000):
+    from mock_backend import MockBackend
+    from services.airports import AIRPORTS
+    from services.bag_decoder import decode_bags, load_json
+    from services.bag_store import BagStore
+
+    print_header("Bag parsing (Bag objects vs columnar decoder)")
+    backend = MockBackend(num_bags=num_bags)
+    raw = json.dumps([backend.bag_json(i) for i in range(num_bags)]).encode()
+    print(f"  payload: {num_bags:,} bags, {len(raw) / 1e6:.1f} MB")
+
+    def old():
+        bags = quiet(legacy_parse, json.loads(raw), AIRPORTS.get_or_placeholder)
+        store = BagStore()
+        store.load_bags(bags)  # what get_dataframe() needed next
+        return store
+
+    def new(loads):
+        store = BagStore()
+        decode_bags(loads(raw), AIRPORTS, store)
+        return store
+
+    old_ms = timed(old, repeat=1)
+    new_ms = timed(lambda: new(json.loads), repeat=3)
+    report(f"{num_bags:,} records (json)", old_ms, new_ms)
+    if load_json is not json.loads:
+        fast_ms = timed(lambda: new(load_json), repeat=3)
+        report(f"{num_bags:,} records (orjson)", old_ms, fast_ms)
+    data = json.loads(raw)
+    decode_ms = timed(lambda: decode_bags(data, AIRPORTS, BagStore()), repeat=3)
+    print(f"  {Fore.CYAN}→ decode only (JSON already parsed): {decode_ms:.1f} ms, "
+          f"{num_bags / decode_ms * 1000:,.0f} records/s")
+
+    a, b = old(), new(json.loads)
+    same = (list(a.ids) == list(b.ids) and (a.status == b.status).all() and (a.lat == b.lat).all()
+            and [a.airports[i].code for i in a.dest] == [b.airports[i].code for i in b.dest])
+    print(f"{Fore.GREEN if same else Fore.RED}{'✓' if same else '✗'} decoder matches Bag-object parsing")
+
+    payload = json.loads(raw[:2000].rsplit(b"},", 1)[0] + b"}]")
+    payload += [{"current_lat": 1.0}, {"id": "BAD-1", "current_lat": "n/a"}, "oops"]
+    report_ = decode_bags(payload, AIRPORTS, BagStore())
+    print(f"  malformed rows reported: {[(e['index'], e['reason']) for e in report_.errors]}")
+
+
+# ==================== CONCURRENT SESSIONS ====================
+
+def session_worker(mode, sessions, url, duration, interval):
+    """
+    Child process for bench_sessions: `sessions` threads behaving like
+    browser sessions in live mode for `duration` seconds. Prints READY once
+    loaded, then a JSON line with its peak RSS.
+    """
+    import resource
+    import threading
+    from services.api_service import RealTimeService
+    from services.data_hub import DataHub
+
+    statuses = ["In Transit", "Lost"]
+    if mode == "hub":
+        hub = DataHub(RealTimeService(url), interval=interval)
+
+        def session(i, deadline):
+            version = -1
+            while time.monotonic() < deadline:
+                hub.subscribe(f"session-{i}", live=True)
+                version = hub.wait_for_update(version, timeout=2 * interval)
+                df = hub.snapshot().dataframe
+                len(df[df["status"].isin(statuses)])
+    else:
+        # Pre-hub layout: every session owns a service and polls it itself
+        services = [RealTimeService(url) for _ in range(sessions)]
+
+        def session(i, deadline):
+            while time.monotonic() < deadline:
+                services[i].tick()
+                df = services[i].get_dataframe()
+                len(df[df["status"].isin(statuses)])
+                time.sleep(interval)
+
+    # Let the initial background page loads finish before measuring
+    for service in ([hub.service] if mode == "hub" else services):
+        while service.ingesting:
+            time.sleep(0.05)
+    print("READY", flush=True)
+    start = time.monotonic()
+    threads = [threading.Thread(target=session, args=(i, start + duration)) for i in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    print(json.dumps({"rss_mb": rss_mb, "elapsed": elapsed}), flush=True)
+
+
+def bench_sessions(counts=(1, 10, 50), num_bags=5_000, duration=5.0, interval=1.0):
+    import subprocess
+    import threading
+    from mock_backend import MockBackend
+
+    print_header("Concurrent sessions (per-session pollers vs shared hub)")
+    backend = MockBackend(num_bags=num_bags).start()
+    stop = threading.Event()
+
+    def ticker():
+        while not stop.wait(interval):
+            backend.advance()
+    threading.Thread(target=ticker, daemon=True).start()
+    print(f"{Fore.CYAN}  {num_bags:,} bags, backend ticks and sessions poll every {interval:g} s, "
+          f"{duration:g} s per run")
+
+    def run(mode, sessions):
+        proc = subprocess.Popen(
+            [sys.executable, __file__, "--session-worker", mode, str(sessions),
+             backend.url, str(duration), str(interval)],
+            stdout=subprocess.PIPE, text=True
+        )
+        for line in proc.stdout:
+            if line.strip() == "READY":
+                break
+        backend.reset_stats()
+        out = proc.stdout.read()
+        proc.wait()
+        result = json.loads(out.strip().splitlines()[-1])
+        return backend.requests / result["elapsed"], result["rss_mb"]
+
+    for sessions in counts:
+        old_rate, old_rss = run("per-session", sessions)
+        new_rate, new_rss = run("hub", sessions)
+        print(f"{Fore.GREEN}✓ {sessions:>2} sessions: {old_rate:7.1f} → {new_rate:5.1f} backend req/s"
+              f" | peak RSS {old_rss:7.1f} MB → {new_rss:7.1f} MB")
+    stop.set()
+    backend.stop()
+
+
+# ==================== LIVE FEED ====================
+
+def bench_websocket(num_bags=20_000, samples=200, ticks=20):
+    import numpy as np
+    from mock_backend import MockBackend
+    from services.api_service import RealTimeService
+    from services.data_hub import DataHub
+    from services.websocket_client import WebSocketClient
+
+    print_header("Live updates (REST delta polling vs WebSocket feed)")
+    backend = MockBackend(num_bags=num_bags).start()
+    service = quiet(RealTimeService, base_url=backend.url)
+    while service.ingesting:
+        time.sleep(0.05)
+    hub = DataHub(service, interval=config_polling_s())
+    feed = WebSocketClient(backend.url.replace("http", "ws", 1) + "/ws/live-updates")
+    quiet(hub.attach_live_feed, feed)
+    while not backend.ws_subscribers:
+        time.sleep(0.01)
+
+    # Latency: server-side change -> visible in the client's bag store
+    store = service.store
+    bag_id, row = store.ids[0], 0
+    latencies = []
+    for k in range(samples):
+        lat = 10.0 + k * 1e-3
+        start = time.perf_counter()
+        backend.broadcast([{"type": "BAG_UPDATE", "bag_id": bag_id, "lat": lat, "lon": 0.0}])
+        while store.lat[row] != lat:
+            time.sleep(0)
+        latencies.append((time.perf_counter() - start) * 1000)
+    poll_ms = config_polling_s() * 1000
+    print(f"{Fore.GREEN}✓ update latency: REST polling ~{poll_ms / 2:,.0f} ms avg (every {poll_ms:,.0f} ms) "
+          f"→ WebSocket p50 {np.median(latencies):.2f} ms, p95 {np.percentile(latencies, 95):.2f} ms")
+
+    # Throughput: simulation ticks streamed as one event per changed bag
+    backend.reset_stats()
+    received = feed.received
+    start = time.perf_counter()
+    quiet(backend.advance, ticks)
+    while feed.received - received < backend.ws_messages:
+        time.sleep(0.01)
+    feed.buffer.wait_idle()
+    elapsed = time.perf_counter() - start
+    events = feed.received - received
+    metrics = feed.buffer.metrics()
+    server = backend.engine.store
+    rows = np.array([store.row_of(b) for b in server.ids[1:]])  # bag 0 carries the latency probes
+    same = (np.array_equal(store.status[rows], server.status[1:])
+            and np.array_equal(store.lon[rows], server.lon[1:]))
+    print(f"{Fore.GREEN}✓ {events:,} events from {ticks} ticks applied in {elapsed * 1000:,.0f} ms "
+          f"({events / elapsed:,.0f} events/s, {backend.requests} REST requests)")
+    print(f"  {Fore.CYAN}→ {metrics['batches']:,} batches, coalesce ratio {metrics['coalesce_ratio']:.2f}x, "
+          f"max queue depth {metrics['max_depth']:,}, dropped {metrics['dropped']:,}")
+    print(f"{Fore.GREEN if same else Fore.RED}{'✓' if same else '✗'} store matches backend without REST polling")
+    feed.close()
+    backend.stop()
+
+
+def bench_reconnect(num_bags=5_000, duration=10.0, tick_rate=20, drop_rate=1.0):
+    import threading
+    import numpy as np
+    from mock_backend import MockBackend
+    from services.api_service import RealTimeService
+    from services.data_hub import DataHub
+    from services.websocket_client import WebSocketClient
+
+    print_header("Live-feed reconnects (server dropping connections at random)")
+    print(f"{Fore.CYAN}  {num_bags:,} bags, {tick_rate} ticks/s for {duration:g} s, "
+          f"each connection dropped {drop_rate:g}x/s on average")
+
+    for name, replay in (("resume from seq", 100_000), ("REST delta fallback", 10)):
+        backend = MockBackend(num_bags=num_bags, ws_replay=replay, ws_drop_rate=drop_rate).start()
+        service = quiet(RealTimeService, base_url=backend.url)
+        while service.ingesting:
+            time.sleep(0.05)
+        hub = DataHub(service, interval=0.2)
+        hub.subscribe("bench", live=True)
+        feed = WebSocketClient(backend.url.replace("http", "ws", 1) + "/ws/live-updates")
+        earlier = set(threading.enumerate())
+        quiet(hub.attach_live_feed, feed)
+        backend.reset_stats()
+
+        threads = set()
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            quiet(backend.advance)
+            hub.subscribe("bench", live=True)
+            threads.update(t for t in threading.enumerate() if t.name == "ws-live-updates" and t not in earlier)
+            time.sleep(1 / tick_rate)
+
+        # Let the last reconnect and resync land, then compare with the server
+        backend.ws_drop_rate = 0.0
+        deadline = time.perf_counter() + 30
+        while time.perf_counter() < deadline and not (
+                feed.is_connected() and feed.buffer.last_seq == backend.ws_seq
+                and feed.buffer.wait_idle(0.1) and not hub._resync.is_set()):
+            time.sleep(0.05)
+        time.sleep(0.5)  # a resync requested by the last gap may still be in flight
+        with service.lock:
+            server, store = backend.engine.store, service.store
+            rows = np.array([store.row_of(b) for b in server.ids])
+            same = (np.array_equal(store.status[rows], server.status)
+                    and np.array_equal(store.lat[rows], server.lat))
+        metrics = feed.buffer.metrics()
+        mark = f"{Fore.GREEN}✓" if same else f"{Fore.RED}✗"
+        print(f"{mark} {name:<20} {feed.reconnects:3d} reconnects ({backend.ws_resumed} resumed) | "
+              f"{metrics['gaps']} gaps → {backend.requests} REST syncs | {metrics['duplicates']:,} replayed dupes "
+              f"skipped | {len(threads)} connection thread(s) | store {'matches' if same else 'DIFFERS from'} backend")
+        hub.stop()
+        feed.close()
+        backend.stop()
+
+
+def rss_mb():
+    """Current resident set size of this process in MB (Linux)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def bench_backpressure(rate=50_000, duration=5.0, num_bags=20_000, slow_apply=0.5):
+    import queue
+    import socket
+    import subprocess
+    import threading
+    import requests
+    import websocket
+    from services.api_service import RealTimeService
+    from services.update_buffer import UpdateBuffer
+
+    print_header("Live-feed flood (unbounded queue vs bounded coalescing buffer)")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, "mock_backend.py", "--port", str(port), "--bags", str(num_bags), "--flood", str(rate)],
+        stdout=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{url}/health", timeout=1)
+            break
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    service = quiet(RealTimeService, base_url=url)
+    while service.ingesting:
+        time.sleep(0.05)
+    print(f"{Fore.CYAN}  server floods {rate:,} msgs/s for {duration:g} s per run, {num_bags:,} bags; "
+          f"store writes stalled {slow_apply * 1000:.0f} ms per batch (slow rerun holding the lock)")
+
+    def slow(apply):
+        def wrapped(events):
+            time.sleep(slow_apply)
+            return apply(events)
+        return wrapped
+
+    def run(name, on_message, metrics):
+        """Stream for `duration` s, sampling RSS, and print the buffer metrics."""
+        base = rss_mb()
+        peak = base
+        count = [0]
+
+        def handler(ws, message):
+            count[0] += 1
+            on_message(message)
+        ws = websocket.WebSocketApp(url.replace("http", "ws", 1) + "/ws/live-updates", on_message=handler)
+        threading.Thread(target=ws.run_forever, daemon=True).start()
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            time.sleep(0.05)
+            peak = max(peak, rss_mb())
+        ws.close()
+        # Measurement only: the bounded-depth guarantee of each policy is
+        # asserted in test_update_buffer.py
+        print(f"  {name:<22} {count[0] / duration:9,.0f} msgs/s | peak RSS +{peak - base:6.1f} MB | {metrics()}")
+
+    for policy in ("drop_oldest", "drop_newest", "block"):
+        buffer = UpdateBuffer(slow(service.apply_live_updates), policy=policy)
+        buffer.start()
+        run(f"buffer ({policy})", buffer.put, lambda: (
+            f"max depth {buffer.max_depth:,}/{buffer.capacity:,}, coalesce "
+            f"{buffer.metrics()['coalesce_ratio']:.1f}x, dropped {buffer.dropped:,}, "
+            f"blocked {buffer.blocked_s:.1f} s"))
+        buffer.stop()
+
+    # Old client: json.loads on the socket thread into an unbounded queue,
+    # drained by the same stalled consumer
+    backlog = queue.Queue()
+
+    def drain():
+        while True:
+            events = [backlog.get()]
+            while len(events) < 5000:
+                try:
+                    events.append(backlog.get_nowait())
+                except queue.Empty:
+                    break
+            slow(service.apply_live_updates)(events)
+    threading.Thread(target=drain, daemon=True).start()
+    run("unbounded queue (old)", lambda message: backlog.put(json.loads(message)),
+        lambda: f"queue depth {backlog.qsize():,} and growing")
+    server.terminate()
+    server.wait()
+
+
+def config_polling_s():
+    import config
+    return config.POLLING_INTERVAL_MS / 1000
+
+
+BENCHMARKS = {
+    "tick": bench_tick,
+    "dataframe": bench_dataframe,
+    "http": bench_http,
+    "analytics": bench_analytics,
+    "delta": bench_delta,
+    "ingest": bench_ingest,
+    "airports": bench_airports,
+    "parse": bench_parse,
+    "sessions": bench_sessions,
+    "status": bench_status_counts,
+    "scheduler": bench_scheduler,
+    "warp": bench_warp,
+    "snapshot": bench_snapshot,
+    "events": bench_event_log,
+    "models": bench_models,
+    "history": bench_history,
+    "notifications": bench_notifications,
+    "map": bench_map,
+    "heatmap": bench_heatmap,
+    "transport": bench_transport,
+    "routes": bench_routes,
+    "websocket": bench_websocket,
+    "backpressure": bench_backpressure,
+    "reconnect": bench_reconnect,
+}
+
+
+def main():
+    if sys.argv[1:2] == ["--session-worker"]:
+        mode, sessions, url, duration, interval = sys.argv[2:7]
+        session_worker(mode, int(sessions), url, float(duration), float(interval))
+        return
+    names = sys.argv[1:] or list(BENCHMARKS)
+    print(f"\n{Fore.MAGENTA}⏱  OmniTrack Performance Benchmarks")
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"{Fore.RED}✗ Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            continue
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}Benchmark interrupted by user.")
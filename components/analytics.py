@@ -2,35 +2,44 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 from typing import Optional
+from services.stats_history import RESOLUTIONS, StatsHistory
 
-def render_analytics(df: pd.DataFrame, history_df: pd.DataFrame, api_service=None):
+def render_analytics(df: pd.DataFrame, history: StatsHistory, api_service=None,
+                     bundle: Optional[dict] = None):
     """
     Renders the analytics dashboard with various charts.
     Now integrates with backend API for real analytics data.
 
     Args:
         df: Current snapshot of all bags (for local simulation).
-        history_df: Historical data of metrics over time (for local simulation).
+        history: Session stats history of the fleet (for local simulation).
         api_service: Optional RealTimeService instance for API mode.
+        bundle: Analytics already fetched for API mode (DataHub.analytics_bundle,
+            shared by all sessions); fetched from `api_service` if omitted.
     """
 
     st.header("📊 Operational Analytics")
 
     # If API service is available, use backend analytics
     if api_service:
-        _render_api_analytics(api_service)
+        _render_api_analytics(api_service, bundle)
     else:
-        _render_simulation_analytics(df, history_df)
+        _render_simulation_analytics(df, history)
 
 
-def _render_api_analytics(api_service):
+def _render_api_analytics(api_service, bundle: Optional[dict] = None):
     """Render analytics using backend API data."""
 
-    # Fetch analytics data
-    dashboard_data = api_service.get_analytics_dashboard()
-    loss_data = api_service.get_loss_analytics()
-    top_airports = api_service.get_top_airports()
-    hub_stats = api_service.get_hub_statistics()
+    # Fetch analytics data (in parallel, bounded by an overall deadline)
+    if bundle is None:
+        bundle = api_service.get_analytics_bundle()
+    dashboard_data = bundle["dashboard"]
+    loss_data = bundle["losses"]
+    top_airports = bundle["top_airports"]
+    hub_stats = bundle["hub_statistics"]
+
+    if bundle["missing"]:
+        st.caption(f"⏱️ Sin respuesta a tiempo: {', '.join(bundle['missing'])}")
 
     # === SECTION 1: STATUS DISTRIBUTION & BUSIEST AIRPORTS ===
     col1, col2 = st.columns(2)
@@ -201,7 +210,7 @@ def _render_api_analytics(api_service):
             )
 
 
-def _render_simulation_analytics(df: pd.DataFrame, history_df: pd.DataFrame):
+def _render_simulation_analytics(df: pd.DataFrame, history: StatsHistory):
     """Render analytics using local simulation data (fallback)."""
 
     st.info("📡 Mostrando datos de simulación local. Conecta al backend para analytics en tiempo real.")
@@ -212,7 +221,9 @@ def _render_simulation_analytics(df: pd.DataFrame, history_df: pd.DataFrame):
     with c1:
         st.subheader("Bag Status Distribution")
 
-        status_counts = df['status'].value_counts().reset_index()
+        # Categorical columns also report empty categories; drop them
+        status_counts = df['status'].value_counts()
+        status_counts = status_counts[status_counts > 0].reset_index()
         status_counts.columns = ['status', 'count']
 
         # Donut Chart for Status
@@ -233,7 +244,8 @@ def _render_simulation_analytics(df: pd.DataFrame, history_df: pd.DataFrame):
 
     with c2:
         st.subheader("Busiest Airports (Origin)")
-        origin_counts = df['origin'].value_counts().reset_index().head(5)
+        origin_counts = df['origin'].value_counts()
+        origin_counts = origin_counts[origin_counts > 0].reset_index().head(5)
         origin_counts.columns = ['airport', 'count']
 
         bar_chart = alt.Chart(origin_counts).mark_bar().encode(
@@ -247,12 +259,16 @@ def _render_simulation_analytics(df: pd.DataFrame, history_df: pd.DataFrame):
     # 2. Trends Over Time (Session)
     st.subheader("Live Operations Trend (Current Session)")
 
-    if not history_df.empty:
+    if len(history):
+        # Bounded point count at every resolution, however long the session
+        resolution = st.radio("Resolution", RESOLUTIONS, horizontal=True, key="trend_resolution")
+        history_df = history.frame(resolution)
+
         # Transform wide to long for multi-line chart
         history_melted = history_df.melt('timestamp', var_name='Metric', value_name='Count')
 
         line_chart = alt.Chart(history_melted).mark_line().encode(
-            x=alt.X('timestamp', title='Time (Ticks)'),
+            x=alt.X('timestamp:T', title='Time'),
             y=alt.Y('Count', title='Count'),
             color='Metric',
             tooltip=['timestamp', 'Metric', 'Count']
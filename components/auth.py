@@ -67,7 +67,9 @@ def _render_api_login(api_service):
                     if "error" in result:
                         st.error(f"❌ {result['error']}")
                     else:
-                        # Successful login
+                        # Successful login; the token stays with this session
+                        # (the service is shared by all sessions)
+                        st.session_state.api_token = result.get("token")
                         role = result.get("role")
                         target_bag_id = result.get("target_bag_id")
                         user_id = result.get("user_id")
@@ -80,8 +82,9 @@ def _render_api_login(api_service):
                         elif role == "PASSENGER":
                             st.session_state.user_role = 'passenger'
                             st.session_state.user_id = user_id
-                            # Fetch passenger's specific bag and get the actual ID
-                            actual_bag_id = api_service.fetch_bags_for_passenger(target_bag_id)
+                            # Resolve the passenger's bag; the fleet is shared, so the
+                            # session filters by this id instead of narrowing it
+                            actual_bag_id = api_service.locate_bag(target_bag_id, st.session_state.api_token)
                             if actual_bag_id:
                                 st.session_state.target_bag_id = actual_bag_id
                                 st.success(f"✅ Bienvenido! Rastreando maleta: {actual_bag_id}")
@@ -1,15 +1,42 @@
+import json
 import streamlit as st
 import pydeck as pdk
 import pandas as pd
+from typing import Optional
+from pydeck.bindings.json_tools import default_serialize
+from services.heat_grid import heat_cells
+from services.map_lod import Viewport, compact, level_of_detail
 
-def render_map(df: pd.DataFrame, show_heatmap: bool = False):
-    """Renders the main map visualization using Pydeck."""
+
+class CompactDeck(pdk.Deck):
+    """
+    Deck whose JSON spec (what st.pydeck_chart sends to the browser) is
+    minified: pydeck pretty-prints it with a 2-space indent, which puts
+    every row field and color channel on its own indented line.
+    """
+
+    def to_json(self):
+        return json.dumps(self, default=default_serialize, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def render_map(df: pd.DataFrame, show_heatmap: bool = False, viewport: Optional[Viewport] = None,
+               heat: Optional[pd.DataFrame] = None):
+    """
+    Renders the main map visualization using Pydeck.
+    Only the level of detail for `viewport` is sent to the browser (see
+    services.map_lod): bags in view, clustered when zoomed out, and at most
+    config.MAX_BAGS_DISPLAY points and config.MAX_ARCS_DISPLAY arcs.
+    The heatmap draws grid cells weighted by bag count (`heat`, e.g.
+    DataHub.heat_cells(); binned from `df` if not given), not every bag.
+    """
+    viewport = viewport or Viewport()
+    lod = level_of_detail(df, viewport)
 
     # 1. View State
     view_state = pdk.ViewState(
-        latitude=20.0,
-        longitude=0.0,
-        zoom=1.5,
+        latitude=viewport.latitude,
+        longitude=viewport.longitude,
+        zoom=viewport.zoom,
         pitch=20,
     )
 
@@ -18,20 +45,40 @@ def render_map(df: pd.DataFrame, show_heatmap: bool = False):
 
     # Heatmap Layer (Optional)
     if show_heatmap:
+        if heat is None:
+            heat = heat_cells(df)
+        heat = heat[viewport.contains(heat['lat'].to_numpy(), heat['lon'].to_numpy())]
         heatmap_layer = pdk.Layer(
             "HeatmapLayer",
-            data=df,
+            data=compact(heat[["lon", "lat", "weight"]]),
             get_position=["lon", "lat"],
             opacity=0.4,
-            get_weight=1,
+            get_weight="weight",
             radius_pixels=50,
         )
         layers.append(heatmap_layer)
 
+    # Clusters standing in for the bags not drawn individually
+    if len(lod.clusters):
+        cluster_layer = pdk.Layer(
+            "ScatterplotLayer",
+            compact(lod.clusters),
+            get_position=["lon", "lat"],
+            get_fill_color="color",
+            get_radius="radius",
+            radius_units="pixels",
+            radius_scale=2,
+            radius_min_pixels=4,
+            radius_max_pixels=40,
+            pickable=True,
+            opacity=0.5,
+        )
+        layers.append(cluster_layer)
+
     # Bag Scatter Layer
     scatter_layer = pdk.Layer(
         "ScatterplotLayer",
-        df,
+        compact(lod.points),
         get_position=["lon", "lat"],
         get_color="color",
         get_radius="size_scale",
@@ -46,13 +93,11 @@ def render_map(df: pd.DataFrame, show_heatmap: bool = False):
     )
     layers.append(scatter_layer)
 
-    # Flight Arcs (for bags in transit)
-    # Check for multiple possible status values
-    in_transit = df[df['status'].isin(['In Transit', 'IN_TRANSIT', 'In Flight'])]
-    if len(in_transit) > 0:
+    # Flight Arcs (sampled from the bags in transit)
+    if len(lod.arcs) > 0:
         arc_layer = pdk.Layer(
             "ArcLayer",
-            data=in_transit,
+            data=compact(lod.arcs),
             get_source_position=["lon", "lat"],
             get_target_position=["dest_lon", "dest_lat"],
             get_source_color=[0, 191, 255, 150],
@@ -66,7 +111,7 @@ def render_map(df: pd.DataFrame, show_heatmap: bool = False):
     tooltip = {
         "html": "<b>{id}</b><br/>"
                 "{status}<br/>"
-                "<i>{origin} ➝ {destination}</i>",
+                "<i>{route}</i>",
         "style": {
             "backgroundColor": "#111827",
             "color": "white",
@@ -77,7 +122,7 @@ def render_map(df: pd.DataFrame, show_heatmap: bool = False):
 
     # 4. Deck
     # Using Carto Dark to ensure no API key key needed and avoid black map issues
-    r = pdk.Deck(
+    r = CompactDeck(
         map_style="https://basemaps.cartocdn.com/gl/dark-matter-gl-style/style.json",
         initial_view_state=view_state,
         layers=layers,
@@ -85,3 +130,9 @@ def render_map(df: pd.DataFrame, show_heatmap: bool = False):
     )
 
     st.pydeck_chart(r, use_container_width=True)
+
+    if lod.visible > len(lod.points):
+        st.caption(f"Showing {len(lod.points):,} of {lod.visible:,} bags in view "
+                   f"({lod.total:,} total)"
+                   + (f", the rest as {len(lod.clusters):,} clusters" if len(lod.clusters) else "")
+                   + f" · {len(lod.arcs):,} flight arcs")
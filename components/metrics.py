@@ -1,13 +1,21 @@
 import streamlit as st
 import pandas as pd
+from typing import Dict, Optional
+from services.bag_store import count_statuses
 
-def render_metrics(df: pd.DataFrame):
-    """Displays key performance indicators."""
-    
-    total = len(df)
-    lost = len(df[df['status'] == 'Lost'])
-    flying = len(df[df['status'] == 'In Transit'])
-    landed = len(df[df['status'] == 'Baggage Claim']) + len(df[df['status'] == 'Landed'])
+def render_metrics(df: Optional[pd.DataFrame] = None, status_counts: Optional[Dict[str, int]] = None):
+    """
+    Displays key performance indicators.
+    Reads `status_counts` (bags per status value) when given, e.g. from the
+    data hub snapshot; otherwise counts the statuses of `df` in one pass.
+    """
+    if status_counts is None:
+        status_counts = count_statuses(df)
+
+    total = sum(status_counts.values())
+    lost = status_counts.get('Lost', 0)
+    flying = status_counts.get('In Transit', 0)
+    landed = status_counts.get('Baggage Claim', 0) + status_counts.get('Landed', 0)
 
     st.markdown("""
     <style>
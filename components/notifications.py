@@ -1,64 +1,75 @@
+import itertools
+from collections import deque
+
+import numpy as np
+import pandas as pd
 import streamlit as st
+
+import config
+from services.bag_store import STATUS_CODES
 from services.models import BagStatus
+from services.transitions import Transitions
 
-def check_notifications(current_bags):
+# Statuses that raise an alert: code -> (message template, airport, icon, type)
+ALERTS = {
+    STATUS_CODES[BagStatus.LOST]: ("⚠️ CRITICAL: {id} reported LOST at {airport}!", "origin", "🚨", "error"),
+    STATUS_CODES[BagStatus.LANDED]: ("🛬 {id} has landed at {airport}.", "dest", "✅", "info"),
+}
+if getattr(BagStatus, "WRONG_DESTINATION", None) is not None:  # Future proofing
+    ALERTS[STATUS_CODES[BagStatus.WRONG_DESTINATION]] = (
+        "❌ ALARM: {id} arrived at WRONG destination!", "dest", "🛑", "error")
+ALERT_CODES = np.array(list(ALERTS), dtype=np.int8)
+
+
+def check_notifications(changes: Transitions):
     """
-    Checks for status changes and generates notifications.
-    This should be called after a simulation tick.
+    Generates notifications from the status transitions since the last
+    check (see DataHub.transitions_since).
+
+    Only the newest `config.NOTIFICATION_LOG_SIZE` alerts are formatted
+    and logged, and at most `config.MAX_TOASTS_PER_UPDATE` toasts are
+    shown per update (errors first); the rest are summed up in one toast.
     """
-    if 'previous_states' not in st.session_state:
-        st.session_state.previous_states = {}
-    
     if 'notification_log' not in st.session_state:
-        st.session_state.notification_log = []
+        st.session_state.notification_log = deque(maxlen=config.NOTIFICATION_LOG_SIZE)
+    log = st.session_state.notification_log
 
-    for bag in current_bags:
-        prev_status = st.session_state.previous_states.get(bag.id)
-        
-        # Detect Change
-        if prev_status and prev_status != bag.status:
-            # Generate Notification
-            msg = None
-            icon = None
-            type_ = "info"
-            
-            if bag.status == BagStatus.LOST:
-                msg = f"⚠️ CRITICAL: {bag.id} reported LOST at {bag.origin.name}!"
-                icon = "🚨"
-                type_ = "error"
-            elif bag.status == BagStatus.LANDED:
-                msg = f"🛬 {bag.id} has landed at {bag.destination.name}."
-                icon = "✅"
-            elif bag.status == BagStatus.WRONG_DESTINATION: # Future proofing
-                msg = f"❌ ALARM: {bag.id} arrived at WRONG destination!"
-                icon = "🛑"
-                type_ = "error"
-                
-            if msg:
-                # Toast for immediate visual
-                st.toast(msg, icon=icon)
-                
-                # Log for history
-                st.session_state.notification_log.insert(0, {
-                    "time": pd.Timestamp.now().strftime("%H:%M:%S"),
-                    "message": msg,
-                    "type": type_
-                })
-        
-        # Update State
-        st.session_state.previous_states[bag.id] = bag.status
+    alerts = np.flatnonzero(np.isin(changes.status, ALERT_CODES))
+    if not len(alerts):
+        return
+    newest = alerts[-log.maxlen:]
+
+    notes = []
+    for i in newest:
+        template, airport, icon, type_ = ALERTS[changes.status[i]]
+        airport_idx = changes.origin[i] if airport == "origin" else changes.dest[i]
+        notes.append({
+            "time": pd.Timestamp.fromtimestamp(changes.times[i]).strftime("%H:%M:%S"),
+            "message": template.format(id=changes.ids[i], airport=changes.airports[airport_idx].name),
+            "type": type_,
+            "icon": icon,
+        })
+    # Log for history, newest first
+    log.extendleft(notes)
+
+    # Toasts for immediate visual, rate limited
+    limit = config.MAX_TOASTS_PER_UPDATE
+    toasts = sorted(reversed(notes), key=lambda note: note["type"] != "error")[:limit]
+    for note in toasts:
+        st.toast(note["message"], icon=note["icon"])
+    if len(alerts) > len(toasts):
+        st.toast(f"+{len(alerts) - len(toasts)} more alerts in the Alerts Center", icon="🔔")
 
-import pandas as pd
 
 def render_notification_center():
     """Renders the notification history."""
     st.subheader("🔔 Alerts Center")
-    
+
     if 'notification_log' not in st.session_state or not st.session_state.notification_log:
         st.caption("No alerts yet.")
         return
 
-    for note in st.session_state.notification_log[:10]: # Show last 10
+    for note in itertools.islice(st.session_state.notification_log, 10): # Show last 10
         if note['type'] == 'error':
             st.error(f"[{note['time']}] {note['message']}")
         else:
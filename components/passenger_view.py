@@ -193,7 +193,8 @@ def handle_report_submission(bag, report_type, current_location, expected_locati
     # Try to submit to backend if API service is available
     if api_service and hasattr(api_service, 'report_bag_issue'):
         with st.spinner("📡 Submitting report and analyzing..."):
-            result = api_service.report_bag_issue(bag.id, report_data)
+            result = api_service.report_bag_issue(bag.id, report_data,
+                                                 token=st.session_state.get('api_token'))
 
             if "error" in result:
                 st.error(f"❌ Error submitting report: {result['error']}")
@@ -0,0 +1,47 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+import config
+
+
+@contextmanager
+def region_timer(region: str):
+    """Time the render of a page region and keep the last few samples in session state."""
+    timings = st.session_state.setdefault('render_timings', {})
+    samples = timings.setdefault(region, deque(maxlen=config.RENDER_TIMING_WINDOW))
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append((time.perf_counter() - start) * 1000)
+
+
+def frame_time_ms() -> float:
+    """Latest render time of all live regions together (one frame)."""
+    timings = st.session_state.get('render_timings', {})
+    return sum(samples[-1] for samples in timings.values() if samples)
+
+
+def render_timings_panel():
+    """Per-region render times against the live frame budget."""
+    timings = st.session_state.get('render_timings', {})
+    if not timings:
+        return
+    budget = config.LIVE_FRAME_BUDGET_MS
+    frame = frame_time_ms()
+    over = frame > budget
+    st.caption(f"{'⚠️' if over else '⏱️'} Frame: {frame:.0f} ms / {budget} ms budget")
+
+    with st.expander("Render timings"):
+        rows = [{
+            "Region": region,
+            "Last (ms)": round(samples[-1], 1),
+            "p50 (ms)": round(pd.Series(samples).median(), 1),
+            "Max (ms)": round(max(samples), 1),
+            "Samples": len(samples),
+        } for region, samples in timings.items() if samples]
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
@@ -5,12 +5,20 @@
 # URL of the backend API server
 BACKEND_API_URL = "http://localhost:8000"
 
-# WebSocket URL for real-time updates
-WEBSOCKET_URL = "ws://localhost:8000/ws"
+# WebSocket URL for real-time updates (BAG_UPDATE / ALERT events)
+WEBSOCKET_URL = "ws://localhost:8000/ws/live-updates"
 
 # API request timeout (seconds)
 API_TIMEOUT = 5
 
+# Per-endpoint timeout overrides (seconds, matched by path prefix)
+API_ENDPOINT_TIMEOUTS = {
+    "/health": 2,
+}
+
+# Keep-alive connections kept open per backend host (shared by all sessions)
+API_POOL_SIZE = 10
+
 # ==================== REAL-TIME UPDATES ====================
 # Auto-refresh interval for real-time data (milliseconds)
 AUTO_REFRESH_INTERVAL_MS = 5000  # 5 seconds
@@ -18,9 +26,45 @@ AUTO_REFRESH_INTERVAL_MS = 5000  # 5 seconds
 # Enable WebSocket for real-time updates (if available)
 ENABLE_WEBSOCKET = True
 
+# Automatic reconnection of the live feed: jittered exponential backoff
+# between attempts (seconds), and keepalive pings to detect dead connections
+WS_RECONNECT_BASE_S = 0.5
+WS_RECONNECT_MAX_S = 30.0
+WS_PING_INTERVAL_S = 20
+
+# A reconnect counts as resumed only if the server's first message is a
+# HELLO at the requested sequence number; without one within this many
+# seconds the missed events are resynced over REST
+WS_HELLO_TIMEOUT_S = 5.0
+
+# Live-feed buffer between the WebSocket thread and the bag store:
+# raw messages waiting to be applied, and what happens when it is full
+# ("drop_oldest", "drop_newest" or "block" to push back on the server)
+WS_BUFFER_SIZE = 10000
+WS_OVERFLOW_POLICY = "drop_oldest"
+
+# Raw messages parsed and coalesced per batch applied to the store
+WS_MAX_BATCH = 5000
+
 # Polling interval when WebSocket is not available (milliseconds)
 POLLING_INTERVAL_MS = 5000
 
+# Bags per request when loading the fleet from /api/bags (limit/offset pages)
+BAG_PAGE_SIZE = 1000
+
+# Pages fetched in parallel while the rest of the fleet loads in the background
+INGEST_CONCURRENCY = 4
+
+# Poll only bags changed since the last sync (GET /api/bags/changes),
+# falling back to a full refetch when the backend does not support it
+ENABLE_DELTA_SYNC = True
+
+# Render-time target for one live refresh of the metrics + map regions (milliseconds)
+LIVE_FRAME_BUDGET_MS = 200
+
+# Render timings kept per region for the timings panel
+RENDER_TIMING_WINDOW = 50
+
 # ==================== SIMULATION MODE ====================
 # Number of bags to simulate in local mode
 SIMULATION_NUM_BAGS = 100
@@ -28,6 +72,17 @@ SIMULATION_NUM_BAGS = 100
 # Simulation tick speed (seconds)
 SIMULATION_TICK_SPEED = 0.5
 
+# How random status transitions are drawn: "events" (each bag's next
+# transition tick is sampled once and queued) or "dice" (every waiting bag
+# rolls each tick); statistically equivalent
+SIMULATION_SCHEDULER = "events"
+
+# Random seed of the simulation (None: a different run every start)
+SIMULATION_SEED = None
+
+# Engine snapshot file: restored on startup if present, written by "Save Snapshot"
+SIMULATION_SNAPSHOT_PATH = ".omnitrack/simulation.npz"
+
 # ==================== UI SETTINGS ====================
 # Default map view
 DEFAULT_MAP_CENTER = [40.6413, -73.7781]  # JFK Airport
@@ -36,6 +91,20 @@ DEFAULT_MAP_ZOOM = 4
 # Maximum number of bags to display on map
 MAX_BAGS_DISPLAY = 1000
 
+# Flight arcs drawn at most (sampled from the in-transit bags in view)
+MAX_ARCS_DISPLAY = 300
+
+# Below this zoom, bags beyond MAX_BAGS_DISPLAY are drawn as grid clusters
+# (2**MAP_CLUSTER_DETAIL cells across a 256 px map tile, ~16 px cells)
+MAP_CLUSTER_ZOOM = 4
+MAP_CLUSTER_DETAIL = 4
+
+# Decimals kept for map coordinates sent to the browser (4: ~10 m)
+MAP_COORD_DECIMALS = 4
+
+# Heatmap grid cell size (degrees); the heatmap gets one weighted point per occupied cell
+HEATMAP_CELL_DEG = 1.0
+
 # Show heatmap by default
 DEFAULT_SHOW_HEATMAP = False
 
@@ -43,6 +112,13 @@ DEFAULT_SHOW_HEATMAP = False
 # Token storage location (session_state, local_storage, etc.)
 TOKEN_STORAGE = "session_state"
 
+# Account of the shared background poller (fleet REST syncs, see
+# DataHub). /api/bags answers by role, so the poller logs in on its own
+# as an operations user; each session's login token is only used for
+# that user's requests. Empty username: poll without a token.
+POLLER_USERNAME = "admin"
+POLLER_PASSWORD = "password"
+
 # Test user credentials (for development only)
 TEST_USERS = {
     "admin": {
@@ -65,9 +141,25 @@ TEST_USERS = {
 # Maximum number of airports to show in top airports chart
 MAX_TOP_AIRPORTS = 10
 
+# Overall deadline for the parallel analytics fetch (seconds).
+# Calls still pending at the deadline are rendered as unavailable.
+ANALYTICS_DEADLINE = 6
+
+# Worker threads of the process-wide analytics pool (4 calls per fetch)
+ANALYTICS_WORKERS = 8
+
+# Seconds an analytics fetch is shared by all sessions before the next
+# one goes to the backend (see DataHub.analytics_bundle)
+ANALYTICS_REFRESH_S = 30
+
 # Historical data retention (number of ticks)
 MAX_HISTORY_LENGTH = 100
 
+# Rolled-up stats history kept beyond the raw ticks: 12 h of 1-minute
+# means and 2 days of 1-hour means (number of points)
+HISTORY_MINUTE_POINTS = 720
+HISTORY_HOUR_POINTS = 48
+
 # ==================== NOTIFICATIONS ====================
 # Enable desktop notifications
 ENABLE_DESKTOP_NOTIFICATIONS = False
@@ -75,6 +167,15 @@ ENABLE_DESKTOP_NOTIFICATIONS = False
 # Notification check interval (seconds)
 NOTIFICATION_CHECK_INTERVAL = 10
 
+# Status transitions kept for the notification centers to read (shared by all sessions)
+TRANSITION_LOG_SIZE = 10000
+
+# Alerts kept in each session's Alerts Center
+NOTIFICATION_LOG_SIZE = 100
+
+# Toasts shown per update; further alerts are summed up in one toast
+MAX_TOASTS_PER_UPDATE = 3
+
 # ==================== ML PREDICTION ====================
 # Available airports for ML prediction
 ML_AIRPORTS = ["JFK", "LHR", "DXB", "HND", "CDG", "AMS", "FRA", "BCN",
@@ -0,0 +1,3 @@
+# test_integration.py checks a running backend and is run as a script
+# (python test_integration.py); its helpers are not pytest tests.
+collect_ignore = ["test_integration.py"]
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OmniTrack backend API.
+Serves simulated bags in the backend's JSON format so the frontend and the
+benchmarks can run offline, including the /ws/live-updates WebSocket feed
+(BAG_UPDATE / ALERT events for every bag that changes on a tick).
+
+Usage:
+    python mock_backend.py                  # http://localhost:8000, 1000 bags
+    python mock_backend.py --port 8001 --bags 100000 --latency 0.05
+    python mock_backend.py --tick-interval 1   # advance the simulation every second
+    python mock_backend.py --flood 50000       # 50k synthetic live-feed msgs/sec per client
+    python mock_backend.py --ws-drop-rate 0.2  # drop each live-feed connection every ~5 s
+"""
+
+import argparse
+import base64
+import collections
+import datetime
+import gzip
+import hashlib
+import json
+import queue
+import random
+import select
+import threading
+import time
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+import config
+from services.bag_store import STATUS_CODES, STATUS_LIST
+from services.models import BagStatus
+from services.simulation import SimulationEngine
+
+WS_PATHS = ("/ws/live-updates", "/ws")
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"  # RFC 6455 handshake constant
+LOST = STATUS_CODES[BagStatus.LOST]
+
+
+def ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    """Unmasked server-to-client WebSocket frame (FIN set)."""
+    n = len(payload)
+    if n < 126:
+        header = bytes([0x80 | opcode, n])
+    elif n < 1 << 16:
+        header = bytes([0x80 | opcode, 126]) + n.to_bytes(2, "big")
+    else:
+        header = bytes([0x80 | opcode, 127]) + n.to_bytes(8, "big")
+    return header + payload
+
+
+class MockBackend:
+    """
+    Threaded HTTP/1.1 server (keep-alive, gzip) backed by a SimulationEngine.
+    Counts accepted TCP connections, served requests and response bytes so
+    clients can measure connection reuse and bandwidth.
+
+    Every `advance()` bumps a version counter and stamps the rows that
+    changed, which is what GET /api/bags/changes?since=<version> serves,
+    and pushes one BAG_UPDATE event per changed bag (plus an ALERT when a
+    bag is lost) to every WebSocket subscriber.
+
+    Broadcast events carry a sequence number (`seq`) and the last
+    `ws_replay` of them are kept, so a client reconnecting with
+    ?since=<seq> gets the events it missed. Every connection starts with a
+    HELLO event whose `seq` is the point the stream continues after
+    (`since` when resumed, the current sequence number otherwise).
+    `ws_drop_rate` abruptly drops each connection that many times per
+    second on average, to exercise client reconnects.
+
+    Logins hand out one token per user (roles from config.TEST_USERS,
+    anyone else is an admin) and GET /api/bags answers by role: a
+    passenger only gets their own bag. `auth_log` counts requests per
+    (path, token).
+    """
+
+    def __init__(self, num_bags=1000, host="127.0.0.1", port=0, latency=0.0, delta_window=1000,
+                 ws_replay=10_000, ws_drop_rate=0.0):
+        self.engine = SimulationEngine(num_bags=num_bags)
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._data_lock = threading.RLock()
+
+        # Change tracking
+        self.version = 0
+        self.delta_window = delta_window  # versions a delta can span before forcing a full sync
+        self._row_version = np.zeros(num_bags, dtype=np.int64)
+        self._alive = np.ones(num_bags, dtype=bool)
+        self._deleted = {}  # bag id -> version
+
+        # Auth: token -> (role, target bag id)
+        self.tokens = {}
+        self.auth_log = collections.Counter()
+
+        # WebSocket subscribers: one outbox of encoded frames per connection
+        self.ws_messages = 0
+        self.ws_seq = 0
+        self.ws_connections = 0
+        self.ws_resumed = 0
+        self.ws_drop_rate = ws_drop_rate
+        self._ws_log = collections.deque(maxlen=ws_replay)  # (seq, frame)
+        self._subscribers = []
+        self._stopping = threading.Event()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
+            self.bytes_sent = 0
+            self.ws_messages = 0
+
+    def advance(self, ticks=1):
+        """Tick the simulation and record which bags changed."""
+        store = self.engine.store
+        with self._data_lock:
+            for _ in range(ticks):
+                status, lat, lon = store.status.copy(), store.lat.copy(), store.lon.copy()
+                self.engine.tick()
+                changed = (store.status != status) | (store.lat != lat) | (store.lon != lon)
+                self.version += 1
+                self._row_version[changed] = self.version
+                # Once a client has connected, keep numbering events while it
+                # is away so it can resume from the replay log
+                if self.ws_connections:
+                    rows = np.flatnonzero(changed & self._alive)
+                    lost = rows[(store.status[rows] == LOST) & (status[rows] != LOST)]
+                    self.broadcast([self.update_event(i) for i in rows] +
+                                   [self.alert_event(i) for i in lost])
+
+    def delete_bags(self, bag_ids):
+        """Remove bags from the fleet (served as tombstones in deltas)."""
+        with self._data_lock:
+            self.version += 1
+            for bag_id in bag_ids:
+                i = self.engine.store.row_of(bag_id)
+                if i is not None and self._alive[i]:
+                    self._alive[i] = False
+                    self._deleted[bag_id] = self.version
+
+    def changes(self, query):
+        since = query.get("since", [None])[0]
+        if since is None or self.version - int(since) > self.delta_window:
+            rows = np.flatnonzero(self._alive)
+            return {"watermark": str(self.version), "full": True,
+                    "bags": [self.bag_json(i) for i in rows], "deleted": []}
+        since = int(since)
+        rows = np.flatnonzero(self._alive & (self._row_version > since))
+        return {"watermark": str(self.version), "full": False,
+                "bags": [self.bag_json(i) for i in rows],
+                "deleted": [b for b, v in self._deleted.items() if v > since]}
+
+    # ==================== WEBSOCKET ====================
+
+    def update_event(self, i):
+        store = self.engine.store
+        return {
+            "type": "BAG_UPDATE",
+            "bag_id": store.ids[i],
+            "new_status": STATUS_LIST[store.status[i]].name,
+            "lat": float(store.lat[i]),
+            "lon": float(store.lon[i]),
+            "progress": float(store.progress[i]),
+        }
+
+    def alert_event(self, i):
+        store = self.engine.store
+        return {
+            "type": "ALERT",
+            "severity": "CRITICAL",
+            "message": f"{store.ids[i]} reported LOST at {store.airports[store.origin[i]].code}!",
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+
+    def broadcast(self, events):
+        """Number and send events (one WebSocket message each) to every subscriber."""
+        with self._lock:
+            frames = []
+            for event in events:
+                self.ws_seq += 1
+                frame = ws_frame(json.dumps({**event, "seq": self.ws_seq}).encode())
+                self._ws_log.append((self.ws_seq, frame))
+                frames.append(frame)
+            self.ws_messages += len(frames) * len(self._subscribers)
+            for outbox in self._subscribers:
+                for frame in frames:
+                    outbox.put(frame)
+
+    def flood(self, rate, duration=None, pool_size=10_000):
+        """
+        Push `rate` synthetic BAG_UPDATE messages per second to every
+        subscriber (for `duration` seconds, or until stop()). Frames are
+        pre-encoded from random bags with jittered positions so the server
+        side costs almost nothing; returns the flooding thread.
+        """
+        store = self.engine.store
+        rng = np.random.default_rng()
+        rows = rng.integers(0, len(store), pool_size)
+        frames = [ws_frame(json.dumps({
+            "type": "BAG_UPDATE",
+            "bag_id": store.ids[i],
+            "new_status": STATUS_LIST[store.status[i]].name,
+            "lat": float(store.lat[i] + rng.normal(0, 0.1)),
+            "lon": float(store.lon[i] + rng.normal(0, 0.1)),
+            "progress": float(store.progress[i]),
+        }).encode()) for i in rows]
+
+        def run():
+            step = 0.01
+            per_step = max(1, int(rate * step))
+            start = time.perf_counter()
+            sent = 0
+            while not self._stopping.is_set():
+                elapsed = time.perf_counter() - start
+                if duration is not None and elapsed >= duration:
+                    break
+                due = int(elapsed * rate) + per_step
+                with self._lock:
+                    subscribers = list(self._subscribers)
+                    self.ws_messages += (due - sent) * len(subscribers)
+                for outbox in subscribers:
+                    for k in range(sent, due):
+                        outbox.put(frames[k % pool_size])
+                sent = due
+                time.sleep(step)
+
+        thread = threading.Thread(target=run, name="ws-flood", daemon=True)
+        thread.start()
+        return thread
+
+    def _subscribe(self, since=None):
+        """New outbox, starting with HELLO and the replay after `since` when it is still logged."""
+        outbox = queue.SimpleQueue()
+        with self._lock:
+            self.ws_connections += 1
+            oldest = self._ws_log[0][0] if self._ws_log else self.ws_seq + 1
+            resumed = since is not None and oldest - 1 <= since <= self.ws_seq
+            start = since if resumed else self.ws_seq
+            outbox.put(ws_frame(json.dumps({"type": "HELLO", "seq": start}).encode()))
+            if resumed:
+                self.ws_resumed += 1
+                for seq, frame in self._ws_log:
+                    if seq > since:
+                        outbox.put(frame)
+            self._subscribers.append(outbox)
+        return outbox
+
+    def _unsubscribe(self, outbox):
+        with self._lock:
+            self._subscribers.remove(outbox)
+
+    @property
+    def ws_subscribers(self):
+        return len(self._subscribers)
+
+    # ==================== DATA ====================
+
+    def bag_json(self, i):
+        store = self.engine.store
+        return {
+            "id": store.ids[i],
+            "current_lat": float(store.lat[i]),
+            "current_lon": float(store.lon[i]),
+            "status": STATUS_LIST[store.status[i]].name,
+            "owner_name": store.owners[i],
+            "origin_code": store.airports[store.origin[i]].code,
+            "destination_code": store.airports[store.dest[i]].code,
+            "color": store.color[i],
+            "progress": float(store.progress[i]),
+        }
+
+    def login(self, body):
+        username = body.get("username") or "anonymous"
+        user = config.TEST_USERS.get(username, {})
+        role = "PASSENGER" if user.get("role") == "passenger" else "ADMIN"
+        token = f"mock-token-{username}"
+        self.tokens[token] = (role, user.get("bag_id"))
+        return {"token": token, "role": role, "user_id": username, "target_bag_id": user.get("bag_id")}
+
+    def list_bags(self, query, token=None):
+        """Page of bags (limit/offset) plus pagination headers."""
+        store = self.engine.store
+        limit = int(query.get("limit", ["100"])[0])
+        offset = int(query.get("offset", ["0"])[0])
+        status = query.get("status", [None])[0]
+        mask = self._alive
+        role, bag_id = self.tokens.get(token, ("ADMIN", None))
+        if role == "PASSENGER":
+            mask = mask & (store.ids == bag_id)
+        if status:
+            mask = mask & (store.status == STATUS_LIST.index(BagStatus[status]))
+        rows = np.flatnonzero(mask)
+        headers = {"X-Total-Count": str(len(rows)), "X-Watermark": str(self.version)}
+        return [self.bag_json(i) for i in rows[offset:offset + limit]], headers
+
+    def bag_details(self, bag_id):
+        store = self.engine.store
+        i = store.row_of(bag_id)
+        if i is not None and self._alive[i]:
+            details = self.bag_json(i)
+            details["history"] = [
+                {"timestamp": t.isoformat(), "message": m}
+                for t, m in self.engine.bags[i].history
+            ]
+            return details
+        return None
+
+    def route(self, method, path, query, body, token=None):
+        """Return (status_code, payload) or (status_code, payload, headers) for a request."""
+        airports = self.engine.store.airports
+        self.auth_log[path, token] += 1
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/api/auth/login":
+            return 200, self.login(body)
+        if path == "/api/airports":
+            return 200, [asdict(a) for a in airports]
+        if path.startswith("/api/airports/"):
+            code = path.rsplit("/", 1)[1]
+            match = [asdict(a) for a in airports if a.code == code]
+            return (200, match[0]) if match else (404, {"detail": "Not found"})
+        if path == "/api/bags":
+            bags, headers = self.list_bags(query, token)
+            return 200, bags, headers
+        if path == "/api/bags/changes":
+            return 200, self.changes(query)
+        if path == "/api/bags/scan" and method == "POST":
+            return 200, {"ok": True, **body}
+        if path.startswith("/api/bags/"):
+            details = self.bag_details(path.rsplit("/", 1)[1])
+            return (200, details) if details else (404, {"detail": "Not found"})
+        if path == "/api/ml/predict":
+            return 200, {"loss_probability": 0.12, "risk_level": "LOW"}
+        if path == "/api/analytics/dashboard":
+            df = self.engine.get_dataframe()
+            counts = df["status"].value_counts()
+            return 200, {"status_distribution": {k: int(v) for k, v in counts.items() if v},
+                         "busiest_airports": [], "session_trends": []}
+        if path == "/api/analytics/losses":
+            return 200, {"total_losses": 0, "loss_reasons": {}, "loss_status": {}, "avg_recovery_time_hours": 0}
+        if path == "/api/analytics/top-airports":
+            return 200, []
+        if path == "/api/analytics/hub-statistics":
+            return 200, {"total_hubs": 0, "data": []}
+        return 404, {"detail": "Not found"}
+
+    # ==================== HTTP ====================
+
+    def _make_handler(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with backend._lock:
+                    backend.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _handle(self, method):
+                with backend._lock:
+                    backend.requests += 1
+                if backend.latency:
+                    time.sleep(backend.latency)
+                url = urlparse(self.path)
+                body = {}
+                length = int(self.headers.get("Content-Length", 0))
+                if length:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                auth = self.headers.get("Authorization", "")
+                token = auth[len("Bearer "):] if auth.startswith("Bearer ") else None
+                with backend._data_lock:
+                    status, payload, *headers = backend.route(method, url.path, parse_qs(url.query), body, token)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                for name, value in (headers[0] if headers else {}).items():
+                    self.send_header(name, value)
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    data = gzip.compress(data, compresslevel=1)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                with backend._lock:
+                    backend.bytes_sent += len(data)
+
+            def do_GET(self):
+                if (self.headers.get("Upgrade", "").lower() == "websocket"
+                        and urlparse(self.path).path in WS_PATHS):
+                    self._websocket()
+                else:
+                    self._handle("GET")
+
+            def _websocket(self):
+                """Upgrade to a WebSocket and stream broadcast frames until either side closes."""
+                key = self.headers.get("Sec-WebSocket-Key", "")
+                accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+                self.send_response(101, "Switching Protocols")
+                self.send_header("Upgrade", "websocket")
+                self.send_header("Connection", "Upgrade")
+                self.send_header("Sec-WebSocket-Accept", accept)
+                self.end_headers()
+                self.close_connection = True
+                since = parse_qs(urlparse(self.path).query).get("since", [None])[0]
+                outbox = backend._subscribe(int(since) if since is not None else None)
+                drop_at = (time.monotonic() + random.expovariate(backend.ws_drop_rate)
+                           if backend.ws_drop_rate else float("inf"))
+                try:
+                    while not backend._stopping.is_set() and time.monotonic() < drop_at:
+                        readable, _, _ = select.select([self.connection], [], [], 0)
+                        if readable and not self._ws_read():
+                            break
+                        try:
+                            frames = [outbox.get(timeout=0.05)]
+                        except queue.Empty:
+                            continue
+                        while len(frames) < 1000:
+                            try:
+                                frames.append(outbox.get_nowait())
+                            except queue.Empty:
+                                break
+                        self.wfile.write(b"".join(frames))
+                except OSError:
+                    pass  # client went away
+                finally:
+                    backend._unsubscribe(outbox)
+
+            def _ws_read(self):
+                """Handle one client frame (close/ping); False once the client closed."""
+                head = self.rfile.read(2)
+                if len(head) < 2:
+                    return False
+                opcode, length = head[0] & 0x0F, head[1] & 0x7F
+                if length == 126:
+                    length = int.from_bytes(self.rfile.read(2), "big")
+                elif length == 127:
+                    length = int.from_bytes(self.rfile.read(8), "big")
+                mask = self.rfile.read(4) if head[1] & 0x80 else b""
+                data = self.rfile.read(length)
+                if mask:
+                    data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+                if opcode == 0x8:  # close: echo the status code back
+                    self.wfile.write(ws_frame(data[:2], opcode=0x8))
+                    return False
+                if opcode == 0x9:  # ping
+                    self.wfile.write(ws_frame(data, opcode=0xA))
+                return True
+
+            def do_POST(self):
+                self._handle("POST")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the OmniTrack backend")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--bags", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial delay per request (s)")
+    parser.add_argument("--tick-interval", type=float, default=0.0, help="Advance the simulation every N seconds")
+    parser.add_argument("--flood", type=float, default=0.0, help="Push N synthetic live-feed messages per second")
+    parser.add_argument("--ws-drop-rate", type=float, default=0.0,
+                        help="Abruptly drop each live-feed connection N times per second on average")
+    args = parser.parse_args()
+
+    backend = MockBackend(num_bags=args.bags, host="0.0.0.0", port=args.port, latency=args.latency,
+                          ws_drop_rate=args.ws_drop_rate)
+    print(f"🧪 Mock backend with {args.bags} bags on http://localhost:{args.port} "
+          f"(live feed: ws://localhost:{args.port}/ws/live-updates)")
+
+    if args.tick_interval:
+        def ticker():
+            while True:
+                time.sleep(args.tick_interval)
+                backend.advance()
+        threading.Thread(target=ticker, daemon=True).start()
+    if args.flood:
+        backend.flood(args.flood)
+    try:
+        backend._server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+
+
+if __name__ == "__main__":
+    main()
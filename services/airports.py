@@ -0,0 +1,175 @@
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .models import Airport
+
+
+def _unit_vectors(lat, lon) -> np.ndarray:
+    """Lat/lon in degrees -> points on the unit sphere (N x 3)."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+class _SphereIndex:
+    """
+    Nearest-neighbour index over airports as precomputed 3D unit vectors.
+
+    The closest airport is the one with the largest dot product with the
+    query vector, so a lookup is one matrix-vector product: no trig per
+    airport and no antimeridian or pole special cases. At registry sizes
+    (up to ~10k airports) this beats a cell grid walked in Python.
+    """
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray):
+        self.points = _unit_vectors(lat, lon)
+
+    def nearest(self, lat: float, lon: float) -> int:
+        return int(np.argmax(self.points @ _unit_vectors(lat, lon)))
+
+    def nearest_many(self, lat: np.ndarray, lon: np.ndarray, chunk: int = 4096) -> np.ndarray:
+        """Nearest airport index for many points, in bounded-memory chunks."""
+        q = _unit_vectors(lat, lon)
+        out = np.empty(len(q), dtype=np.int64)
+        for start in range(0, len(q), chunk):
+            out[start:start + chunk] = np.argmax(q[start:start + chunk] @ self.points.T, axis=1)
+        return out
+
+
+class GreatCircleRoutes:
+    """
+    Positions along the great circle between two airports, for many bags
+    at once.
+
+    Airport unit vectors are computed once per airport table (rebuilt only
+    when airports are added, e.g. from the API), and each position is a
+    spherical linear interpolation between the two endpoint vectors: a
+    handful of array operations for the whole fleet, exact at any
+    progress, with no per-pair polyline to store. Longitudes come back
+    through atan2, so routes crossing the antimeridian (SYD -> LAX) wrap
+    to [-180, 180] instead of sweeping back across the map.
+    """
+
+    def __init__(self):
+        self._points = np.zeros((0, 3))
+
+    def points(self, airports: List[Airport]) -> np.ndarray:
+        """Unit vectors of an (append-only) airport table, cached."""
+        if len(self._points) != len(airports):
+            self._points = _unit_vectors(np.array([a.lat for a in airports], dtype=np.float64),
+                                         np.array([a.lon for a in airports], dtype=np.float64))
+        return self._points
+
+    def position(self, airports: List[Airport], origin: np.ndarray, dest: np.ndarray,
+                 t: np.ndarray):
+        """(lat, lon) arrays at progress `t` (0..1) from airport indices `origin` to `dest`."""
+        points = self.points(airports)
+        a, b = points[origin], points[dest]
+        t = np.clip(t, 0.0, 1.0)
+        angle = np.arccos(np.clip(np.einsum("ij,ij->i", a, b), -1.0, 1.0))
+        sin_angle = np.sin(angle)
+        # Same airport (or antipodes): no unique great circle, fall back to a chord
+        short = sin_angle < 1e-9
+        sin_angle[short] = 1.0
+        wa = np.where(short, 1 - t, np.sin((1 - t) * angle) / sin_angle)
+        wb = np.where(short, t, np.sin(t * angle) / sin_angle)
+        p = wa[:, None] * a + wb[:, None] * b
+        lat = np.degrees(np.arctan2(p[:, 2], np.hypot(p[:, 0], p[:, 1])))
+        lon = np.degrees(np.arctan2(p[:, 1], p[:, 0]))
+        return lat, lon
+
+
+class AirportRegistry(Mapping):
+    """
+    Code-indexed airport table (code -> Airport) with nearest-airport
+    lookups by lat/lon.
+
+    Unknown codes resolve to a placeholder Airport that is created once and
+    reused (interned), so bags referencing the same unknown code share one
+    object. Placeholders are not part of the mapping or the spatial index.
+    """
+
+    def __init__(self, airports: Iterable[Airport] = ()):
+        self._by_code: Dict[str, Airport] = {}
+        self._placeholders: Dict[str, Airport] = {}
+        self._index: Optional[_SphereIndex] = None
+        self._index_airports: List[Airport] = []
+        self.update(airports)
+
+    # Mapping protocol
+    def __getitem__(self, code: str) -> Airport:
+        return self._by_code[code]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._by_code)
+
+    def __len__(self) -> int:
+        return len(self._by_code)
+
+    def add(self, airport: Airport):
+        """Register (or replace) an airport by code."""
+        self._by_code[airport.code] = airport
+        self._placeholders.pop(airport.code, None)
+        self._index = None
+
+    def update(self, airports: Iterable[Airport]):
+        for airport in airports:
+            self.add(airport)
+
+    def get_or_placeholder(self, code: str) -> Airport:
+        """Known airport for `code`, or a shared placeholder at (0, 0)."""
+        airport = self._by_code.get(code)
+        if airport is None:
+            airport = self._placeholders.get(code)
+            if airport is None:
+                airport = Airport(code=code, name=code, lat=0.0, lon=0.0)
+                self._placeholders[code] = airport
+        return airport
+
+    # ==================== SPATIAL ====================
+
+    def _get_index(self) -> _SphereIndex:
+        if self._index is None:
+            self._index_airports = list(self._by_code.values())
+            self._index = _SphereIndex(
+                np.array([a.lat for a in self._index_airports], dtype=np.float64),
+                np.array([a.lon for a in self._index_airports], dtype=np.float64),
+            )
+        return self._index
+
+    def nearest(self, lat: float, lon: float) -> Optional[Airport]:
+        """Closest known airport to a point (great-circle sense)."""
+        if not self._by_code:
+            return None
+        index = self._get_index()
+        return self._index_airports[index.nearest(lat, lon)]
+
+    def nearest_many(self, lat, lon) -> List[Airport]:
+        """Closest known airport for each point of two lat/lon arrays."""
+        if not self._by_code:
+            return [None] * len(lat)
+        index = self._get_index()
+        airports = self._index_airports
+        return [airports[i] for i in index.nearest_many(np.asarray(lat, dtype=np.float64),
+                                                        np.asarray(lon, dtype=np.float64))]
+
+
+# Verified Coordinates (Lat, Lon)
+AIRPORTS = AirportRegistry([
+    Airport("JFK", "New York JFK", 40.6413, -73.7781),
+    Airport("LHR", "London Heathrow", 51.4700, -0.4543),
+    Airport("DUB", "Dublin Airport", 53.4264, -6.2499),        # Ireland
+    Airport("HND", "Tokyo Haneda", 35.5494, 139.7798),
+    Airport("DXB", "Dubai Intl", 25.2532, 55.3657),            # UAE
+    Airport("CDG", "Paris Charles de Gaulle", 49.0097, 2.5479),
+    Airport("SIN", "Singapore Changi", 1.3644, 103.9915),
+    Airport("SYD", "Sydney Kingsford Smith", -33.9399, 151.1753),
+    Airport("BCN", "Barcelona El Prat", 41.2974, 2.0833),      # Spain
+    Airport("LAX", "Los Angeles Intl", 33.9416, -118.4085),
+    Airport("GRU", "São Paulo Guarulhos", -23.4356, -46.4731),
+    Airport("HKG", "Hong Kong Intl", 22.3080, 113.9185),       # Added for Asia coverage
+    Airport("FRA", "Frankfurt Airport", 50.0379, 8.5622),      # Added for EU coverage
+    Airport("FCO", "Rome Fiumicino", 41.7999, 12.2462),        # Added for Med coverage
+])
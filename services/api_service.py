@@ -1,24 +1,63 @@
-import requests
+import numpy as np
 import pandas as pd
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 from typing import List, Optional, Dict, Any
-from .models import Bag, Airport, BagStatus
+from .models import Bag, Airport
+from .airports import AIRPORTS, AirportRegistry
+from .bag_decoder import DecodeReport, decode_bags, decode_updates, load_json
+from .bag_store import BagSequence, BagStore, STATUS_LIST
+from .event_log import EventLog
+from .http_client import get_transport
+from .transitions import TransitionLog
 from datetime import datetime
 import streamlit as st
+import config
 
 # Backend API Configuration
-API_BASE_URL = "http://localhost:8000"
+API_BASE_URL = config.BACKEND_API_URL
+
+# Process-wide: one pool for every session and service in this Streamlit
+# server. Sessions share one fetch per interval through the DataHub
+# (analytics_bundle), so the pool sees few concurrent fan-outs
+_analytics_pool = ThreadPoolExecutor(max_workers=config.ANALYTICS_WORKERS, thread_name_prefix="analytics")
 
 class RealTimeService:
     """
     Service to interact with the OmniTrack Backend API.
     Provides methods for all available endpoints.
     """
-    def __init__(self):
-        self.bags: List[Bag] = []
+    def __init__(self, base_url: str = API_BASE_URL):
+        self.http = get_transport(base_url)
+        self.store = BagStore()
+        # Delta sync state: server watermark of the last applied change set,
+        # and ids deleted since the last full sync (id -> deletion time)
+        self.watermark: Optional[str] = None
+        self.tombstones: Dict[str, datetime] = {}
+        # Paginated ingestion state (see _fetch_all_bags)
+        self.lock = threading.RLock()
+        self._ingest_generation = 0
+        self._ingest_thread: Optional[threading.Thread] = None
+        self.ingest_progress = (0, None)  # (bags loaded, total or None if unknown)
+        self.last_decode_report: Optional[DecodeReport] = None  # malformed rows of the last payload
+        # Status changes seen on the live feed, keyed by a stable per-id key
+        # (store rows shift when bags are deleted)
+        self.events = EventLog()
+        self._event_keys: Dict[str, int] = {}
+        self._event_key_count = 0
+        self._update_kinds = [self.events.kind(f"Status update: {status.value}") for status in STATUS_LIST]
+        self.transitions = TransitionLog()  # status changes from live updates and delta syncs
+        self.bags = []
         self.airports: List[Airport] = []
+        # Indexed lookup by code; seeded with the built-in table so known
+        # codes resolve even if the backend's airport list lacks them
+        self.airport_registry = AirportRegistry(AIRPORTS.values())
         self.last_update = datetime.now()
+        # The poller's own token (see _authenticate); session users keep
+        # theirs in st.session_state and pass it to per-user calls
         self.token: Optional[str] = None
         self._check_health()
+        self._authenticate()
         self._load_airports()
         # Initial fetch of bags
         self._fetch_all_bags()
@@ -26,50 +65,103 @@ class RealTimeService:
     def _check_health(self) -> bool:
         """Check if backend is available."""
         try:
-            response = requests.get(f"{API_BASE_URL}/health", timeout=2)
+            response = self.http.get("/health")
             if response.status_code == 200:
                 return True
         except Exception as e:
             st.warning(f"⚠️ Backend no disponible: {e}")
         return False
 
-    def _get_headers(self) -> Dict[str, str]:
-        """Get authorization headers if token exists."""
+    def _get_headers(self, token: Optional[str] = None) -> Dict[str, str]:
+        """Request headers, authorized with `token` if given."""
         headers = {"Content-Type": "application/json"}
-        if self.token:
-            headers["Authorization"] = f"Bearer {self.token}"
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
         return headers
 
+    @property
+    def bags(self) -> BagSequence:
+        """List-like view over the bag store; Bag objects are built on access."""
+        return BagSequence(self)
+
+    @bags.setter
+    def bags(self, bags: List[Bag]):
+        with self.lock:
+            self.store.load_bags(bags)
+            self._reset_sync()
+
+    def _make_bag(self, i: int) -> Bag:
+        key = self._event_keys.get(self.store.ids[i])
+        history = self.events.timeline(key, self.store.airports) if key is not None else None
+        return self.store.make_bag(i, history=history)
+
+    def _event_key(self, bag_id: str) -> int:
+        key = self._event_keys.get(bag_id)
+        if key is None:
+            key = self._event_keys[bag_id] = self._event_key_count
+            self._event_key_count += 1
+        return key
+
+    def _replace_bags(self, batch: BagStore):
+        """Replace the fleet with a decoded batch (see _decode)."""
+        self.store.assign(batch)
+        self._reset_sync()
+
+    def _reset_sync(self):
+        # Any full replacement invalidates the delta watermark
+        self.watermark = None
+        self.tombstones.clear()
+
     # ==================== AUTHENTICATION ====================
 
     def login(self, username: str, password: str) -> Dict[str, Any]:
         """
         Login to the API and get authentication token.
         Returns: {token, role, user_id, target_bag_id}
+
+        The service is shared by every session, so the token is not kept
+        here: the caller stores it per session and passes it to per-user
+        calls (get_bag_details, scan_bag, report_bag_issue, ...).
         """
         try:
-            response = requests.post(
-                f"{API_BASE_URL}/api/auth/login",
-                json={"username": username, "password": password},
-                timeout=5
+            response = self.http.post(
+                "/api/auth/login",
+                json={"username": username, "password": password}
             )
             if response.status_code == 200:
                 data = response.json()
-                self.token = data.get("token")
-                # Fetch bags after login
-                self._fetch_all_bags()
+                # Fetch bags (with the poller's credential) if the fleet
+                # could not be loaded at startup
+                if not len(self.store):
+                    self._fetch_all_bags()
                 return data
             else:
                 return {"error": "Credenciales inválidas"}
         except Exception as e:
             return {"error": f"Error de conexión: {e}"}
 
+    def _authenticate(self):
+        """Log the shared poller in with its own account (config.POLLER_USERNAME)."""
+        if not config.POLLER_USERNAME:
+            return
+        try:
+            response = self.http.post(
+                "/api/auth/login",
+                json={"username": config.POLLER_USERNAME, "password": config.POLLER_PASSWORD}
+            )
+            if response.status_code == 200:
+                self.token = response.json().get("token")
+            else:
+                print(f"❌ Poller login failed: HTTP {response.status_code}")
+        except Exception as e:
+            print(f"❌ Poller login failed: {e}")
+
     # ==================== AIRPORTS ====================
 
     def _load_airports(self):
         """Load all airports from the backend."""
         try:
-            response = requests.get(f"{API_BASE_URL}/api/airports", timeout=5)
+            response = self.http.get("/api/airports")
             if response.status_code == 200:
                 data = response.json()
                 self.airports = [
@@ -80,6 +172,7 @@ class RealTimeService:
                         lon=a["lon"]
                     ) for a in data
                 ]
+                self.airport_registry.update(self.airports)
         except Exception as e:
             print(f"Error loading airports: {e}")
             # Fallback to some default airports
@@ -94,7 +187,7 @@ class RealTimeService:
     def get_airport(self, code: str) -> Optional[Airport]:
         """Get specific airport by code."""
         try:
-            response = requests.get(f"{API_BASE_URL}/api/airports/{code}", timeout=5)
+            response = self.http.get(f"/api/airports/{code}")
             if response.status_code == 200:
                 data = response.json()
                 return Airport(**data)
@@ -107,85 +200,277 @@ class RealTimeService:
     def tick(self):
         """
         In API mode, 'tick' fetches the latest data from the backend.
+        With config.ENABLE_DELTA_SYNC only the bags changed since the last
+        watermark are downloaded; backends without the changes endpoint
+        (or without a watermark) fall back to a full refetch. Does nothing
+        while a paginated fetch is still loading.
         """
+        if self.ingesting:
+            return
+        if self.token is None:
+            self._authenticate()
+        if config.ENABLE_DELTA_SYNC and self.watermark is not None and self._sync_changes():
+            return
         self._fetch_all_bags()
 
-    def fetch_bags_for_passenger(self, bag_id: str) -> str:
+    def _sync_changes(self) -> bool:
+        """
+        Apply the bag changes since `self.watermark` (GET /api/bags/changes).
+
+        Response: {watermark, full, bags: [...], deleted: [ids]}. The server
+        answers with full=True (a complete snapshot) when there is no
+        watermark yet or it is too old to serve a delta.
+        Returns False if the endpoint is unavailable.
+        """
+        params = {} if self.watermark is None else {"since": self.watermark}
+        try:
+            response = self.http.get(
+                "/api/bags/changes",
+                params=params,
+                headers=self._get_headers(self.token)
+            )
+            if response.status_code == 401:
+                self.token = None  # expired: log in again on the next tick
+            if response.status_code != 200:
+                return False
+            data = load_json(response.content)
+        except Exception as e:
+            print(f"API Connection Error: {e}")
+            return False
+
+        changed = self._decode(data.get("bags", []))
+        with self.lock:
+            if data.get("full"):
+                self._replace_bags(changed)
+            else:
+                self._apply_delta(changed, data.get("deleted", []))
+            self.watermark = data.get("watermark")
+        self.last_update = datetime.now()
+        return True
+
+    def _apply_delta(self, changed: BagStore, deleted: List[str]):
+        """Merge a decoded batch of changed bags and deletions into the store."""
+        now = datetime.now()
+        if self.tombstones:
+            for bag_id in changed.ids:
+                self.tombstones.pop(bag_id, None)
+        for bag_id in deleted:
+            self.tombstones[bag_id] = now
+            key = self._event_keys.pop(bag_id, None)
+            if key is not None:
+                self.events.forget(key)
+        self.transitions.record(self.store, self.store.merge(changed))
+        self.store.remove_ids(deleted)
+
+    def apply_live_updates(self, events: List[Dict[str, Any]]) -> int:
+        """
+        Apply bag events from the live feed (see websocket_client) in place:
+        status, position and progress, with a history entry per status
+        change. Bags not loaded yet are ignored until the next REST sync.
+        Returns the number of events decoded.
+        """
+        updates = decode_updates(events)
+        now = datetime.now()
+        with self.lock:
+            rows, codes = self.store.apply_updates(updates)
+            self.transitions.record(self.store, rows)
+            keys = [self._event_key(bag_id) for bag_id in self.store.ids[rows]]
+            self.events.append(keys, np.take(self._update_kinds, codes), when=now.timestamp())
+        self.last_update = now
+        return len(updates)
+
+    def fetch_bags_for_passenger(self, bag_id: str, token: Optional[str] = None) -> str:
         """
         Fetch a specific bag for a passenger.
         If bag_id doesn't exist, fetch all bags and filter or show first available.
-        Returns the actual bag_id that was loaded.
+        Returns the actual bag_id that was loaded. If no bag is available
+        the fleet is left as it was and None is returned.
         """
-        bag_details = self.get_bag_details(bag_id)
+        self._cancel_ingest()
+        bag_details = self.get_bag_details(bag_id, token)
         if bag_details:
             # Convert single bag to list
-            self.bags = self._parse_bags_from_api([bag_details])
-            return self.bags[0].id if self.bags else None
-        else:
-            # Bag not found - fallback: fetch all bags and try to find it
-            print(f"⚠️ Bag {bag_id} not found via details endpoint, fetching all bags...")
-            self._fetch_all_bags()
+            bags = self._parse_bags_from_api([bag_details])
+            if bags:
+                self.bags = bags
+                return bags[0].id
+        # Bag not found - fallback: fetch all bags and try to find it
+        print(f"⚠️ Bag {bag_id} not found via details endpoint, fetching all bags...")
+        self._fetch_all_bags(wait=True)
+        with self.lock:
             # Try to find the bag in the list
-            matching_bags = [b for b in self.bags if b.id == bag_id]
-            if matching_bags:
-                self.bags = matching_bags
+            row = self.store.row_of(bag_id)
+            if row is not None:
+                self.bags = [self.store.make_bag(row)]
                 print(f"✅ Found bag {bag_id} in list")
-                return matching_bags[0].id
-            else:
-                # Still not found - use first bag as demo or keep all bags
-                if self.bags:
-                    print(f"⚠️ Bag {bag_id} not found. Showing first available bag as demo.")
-                    actual_bag_id = self.bags[0].id
-                    self.bags = [self.bags[0]]
-                    return actual_bag_id
-                else:
-                    print(f"❌ No bags available")
-                    self.bags = []
-                    return None
+                return bag_id
+            # Still not found - use first bag as demo
+            if len(self.store):
+                print(f"⚠️ Bag {bag_id} not found. Showing first available bag as demo.")
+                bag = self.store.make_bag(0)
+                self.bags = [bag]
+                return bag.id
+        print(f"❌ No bags available")
+        return None
+
+    def locate_bag(self, bag_id: str, token: Optional[str] = None) -> Optional[str]:
+        """
+        Resolve the bag a passenger should track without narrowing the
+        fleet, for services shared between sessions (see DataHub): each
+        session filters by the returned id instead. Falls back like
+        fetch_bags_for_passenger: details endpoint, then the first
+        available bag as a demo.
+        """
+        with self.lock:
+            if self.store.row_of(bag_id) is not None:
+                return bag_id
+        bag_details = self.get_bag_details(bag_id, token)
+        if bag_details:
+            batch = self._decode([bag_details])
+            if len(batch):
+                with self.lock:
+                    self.store.merge(batch)
+                return batch.ids[0]
+        with self.lock:
+            if len(self.store):
+                print(f"⚠️ Bag {bag_id} not found. Showing first available bag as demo.")
+                return self.store.ids[0]
+        print(f"❌ No bags available")
+        return None
 
-    def _fetch_all_bags(self, status: Optional[str] = None, owner_id: Optional[str] = None, limit: int = 100):
+    def _fetch_all_bags(self, status: Optional[str] = None, owner_id: Optional[str] = None,
+                        limit: Optional[int] = None, wait: bool = False):
         """
         Fetch all bags from the backend with optional filters.
+
+        Pages through /api/bags (limit/offset, config.BAG_PAGE_SIZE per page).
+        The first page is loaded synchronously so the UI can render right
+        away; the remaining pages are fetched concurrently in a background
+        thread and merged into the bag store as they arrive (see
+        `ingest_progress`). `limit` caps the total number of bags; `wait`
+        blocks until the whole fleet is loaded.
         """
-        try:
-            params = {"limit": limit}
-            if status:
-                params["status"] = status
-            if owner_id:
-                params["owner_id"] = owner_id
-
-            response = requests.get(
-                f"{API_BASE_URL}/api/bags",
-                params=params,
-                headers=self._get_headers(),
-                timeout=5
-            )
+        params = {}
+        if status:
+            params["status"] = status
+        if owner_id:
+            params["owner_id"] = owner_id
+
+        page_size = config.BAG_PAGE_SIZE if limit is None else min(limit, config.BAG_PAGE_SIZE)
+        with self.lock:
+            self._ingest_generation += 1
+            generation = self._ingest_generation
 
+        try:
+            response = self._fetch_page(params, 0, page_size)
             if response.status_code == 200:
-                data = response.json()
+                data = load_json(response.content)
                 print(f"🔍 DEBUG: Received {len(data)} bags from API")
-                print(f"🔍 DEBUG: Sample data: {data[:2] if data else 'No bags'}")
-                self.bags = self._parse_bags_from_api(data)
+                batch = self._decode(data)
+                with self.lock:
+                    self._replace_bags(batch)
+                    # Changes after this point are picked up by delta sync
+                    self.watermark = response.headers.get("X-Watermark")
                 print(f"🔍 DEBUG: Parsed {len(self.bags)} bags")
                 self.last_update = datetime.now()
             else:
                 print(f"❌ Error fetching bags: HTTP {response.status_code}")
                 print(f"❌ Response: {response.text}")
-                self.bags = []
+                return  # keep the last good fleet
 
         except Exception as e:
             print(f"API Connection Error: {e}")
-            self.bags = []
+            return
+
+        total = response.headers.get("X-Total-Count")
+        total = int(total) if total is not None else None
+        if limit is not None:
+            total = limit if total is None else min(total, limit)
+        self.ingest_progress = (len(data), total)
+        if len(data) < page_size or (total is not None and len(data) >= total):
+            return
+
+        self._ingest_thread = threading.Thread(
+            target=self._ingest_pages,
+            args=(generation, params, page_size, len(data), total),
+            daemon=True
+        )
+        self._ingest_thread.start()
+        if wait:
+            self._ingest_thread.join()
+
+    def _fetch_page(self, params: Dict[str, Any], offset: int, page_size: int):
+        return self.http.get(
+            "/api/bags",
+            params={**params, "limit": page_size, "offset": offset},
+            headers=self._get_headers(self.token)
+        )
+
+    def _ingest_pages(self, generation: int, params: Dict[str, Any], page_size: int,
+                      offset: int, total: Optional[int]):
+        """
+        Background ingestion of the pages after the first one.
+        With a known total every page is scheduled up front; otherwise pages
+        are requested in waves until one comes back short. A newer fetch
+        (higher generation) makes this one stop merging.
+        """
+        loaded = offset
+
+        def fetch(page_offset):
+            size = page_size if total is None else min(page_size, total - page_offset)
+            response = self._fetch_page(params, page_offset, size)
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            data = load_json(response.content)
+            return self._decode(data), len(data), size
+
+        with ThreadPoolExecutor(max_workers=config.INGEST_CONCURRENCY,
+                                thread_name_prefix="ingest") as pool:
+            done = False
+            while not done:
+                if total is not None:
+                    offsets = range(offset, total, page_size)
+                else:
+                    offsets = range(offset, offset + page_size * config.INGEST_CONCURRENCY, page_size)
+                futures = [pool.submit(fetch, o) for o in offsets]
+                offset = offsets[-1] + page_size if offsets else offset
+                done = total is not None or not offsets
+                for future in as_completed(futures):
+                    try:
+                        batch, received, size = future.result()
+                    except Exception as e:
+                        print(f"❌ Error fetching bag page: {e}")
+                        done = True
+                        continue
+                    with self.lock:
+                        if generation != self._ingest_generation:
+                            return
+                        self._apply_delta(batch, [])
+                    loaded += received
+                    self.ingest_progress = (loaded, total)
+                    if received < size:
+                        done = True
+        self.last_update = datetime.now()
+
+    def _cancel_ingest(self):
+        """Stop merging pages from a background fetch still in progress."""
+        with self.lock:
+            self._ingest_generation += 1
+
+    @property
+    def ingesting(self) -> bool:
+        """True while background pages are still being loaded."""
+        return self._ingest_thread is not None and self._ingest_thread.is_alive()
 
-    def get_bag_details(self, bag_id: str) -> Optional[Dict[str, Any]]:
+    def get_bag_details(self, bag_id: str, token: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
-        Get detailed information about a specific bag including history.
+        Get detailed information about a specific bag including history,
+        as the user of `token` (their login token).
         """
         try:
-            response = requests.get(
-                f"{API_BASE_URL}/api/bags/{bag_id}",
-                headers=self._get_headers(),
-                timeout=5
+            response = self.http.get(
+                f"/api/bags/{bag_id}",
+                headers=self._get_headers(token)
             )
             if response.status_code == 200:
                 return response.json()
@@ -193,13 +478,14 @@ class RealTimeService:
             print(f"Error fetching bag {bag_id}: {e}")
         return None
 
-    def scan_bag(self, bag_id: str, scanner_id: str, status: str, lat: float, lon: float) -> Dict[str, Any]:
+    def scan_bag(self, bag_id: str, scanner_id: str, status: str, lat: float, lon: float,
+                 token: Optional[str] = None) -> Dict[str, Any]:
         """
-        Update bag position (simulate RFID scan).
+        Update bag position (simulate RFID scan), as the user of `token`.
         """
         try:
-            response = requests.post(
-                f"{API_BASE_URL}/api/bags/scan",
+            response = self.http.post(
+                "/api/bags/scan",
                 json={
                     "bag_id": bag_id,
                     "scanner_id": scanner_id,
@@ -207,8 +493,7 @@ class RealTimeService:
                     "lat": lat,
                     "lon": lon
                 },
-                headers=self._get_headers(),
-                timeout=5
+                headers=self._get_headers(token)
             )
             if response.status_code == 200:
                 return response.json()
@@ -216,7 +501,8 @@ class RealTimeService:
             return {"error": str(e)}
         return {}
 
-    def report_bag_issue(self, bag_id: str, report_data: Dict[str, Any]) -> Dict[str, Any]:
+    def report_bag_issue(self, bag_id: str, report_data: Dict[str, Any],
+                         token: Optional[str] = None) -> Dict[str, Any]:
         """
         Report a bag issue (lost, delayed, damaged, misplaced).
 
@@ -231,6 +517,7 @@ class RealTimeService:
                 "passenger_location_lat": float,
                 "passenger_location_lon": float
             }
+            token: The reporting passenger's login token
 
         Returns:
             {
@@ -247,11 +534,10 @@ class RealTimeService:
             }
         """
         try:
-            response = requests.post(
-                f"{API_BASE_URL}/api/bags/{bag_id}/report",
+            response = self.http.post(
+                f"/api/bags/{bag_id}/report",
                 json=report_data,
-                headers=self._get_headers(),
-                timeout=5
+                headers=self._get_headers(token)
             )
             if response.status_code == 200:
                 return response.json()
@@ -271,10 +557,9 @@ class RealTimeService:
           transfers, airport_risk, viajero_vip, peso_kg
         """
         try:
-            response = requests.post(
-                f"{API_BASE_URL}/api/ml/predict",
-                json=prediction_data,
-                timeout=5
+            response = self.http.post(
+                "/api/ml/predict",
+                json=prediction_data
             )
             if response.status_code == 200:
                 return response.json()
@@ -290,7 +575,7 @@ class RealTimeService:
         Returns: {status_distribution, busiest_airports, session_trends}
         """
         try:
-            response = requests.get(f"{API_BASE_URL}/api/analytics/dashboard", timeout=5)
+            response = self.http.get("/api/analytics/dashboard")
             if response.status_code == 200:
                 return response.json()
         except Exception as e:
@@ -303,7 +588,7 @@ class RealTimeService:
         Returns: {total_losses, loss_reasons, loss_status, avg_recovery_time_hours}
         """
         try:
-            response = requests.get(f"{API_BASE_URL}/api/analytics/losses", timeout=5)
+            response = self.http.get("/api/analytics/losses")
             if response.status_code == 200:
                 return response.json()
         except Exception as e:
@@ -316,7 +601,7 @@ class RealTimeService:
         Returns: [{airport_code, loss_count}, ...]
         """
         try:
-            response = requests.get(f"{API_BASE_URL}/api/analytics/top-airports", timeout=5)
+            response = self.http.get("/api/analytics/top-airports")
             if response.status_code == 200:
                 return response.json()
         except Exception as e:
@@ -329,93 +614,67 @@ class RealTimeService:
         Returns: {total_hubs, data: [...]}
         """
         try:
-            response = requests.get(f"{API_BASE_URL}/api/analytics/hub-statistics", timeout=5)
+            response = self.http.get("/api/analytics/hub-statistics")
             if response.status_code == 200:
                 return response.json()
         except Exception as e:
             print(f"Error fetching hub statistics: {e}")
         return {}
 
+    def get_analytics_bundle(self, deadline: Optional[float] = None,
+                             names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Fetch the four analytics endpoints in parallel (or only `names`).
+        Returns: {dashboard, losses, top_airports, hub_statistics, missing}
+
+        Waits at most `deadline` seconds (config.ANALYTICS_DEADLINE) overall;
+        calls that have not finished by then keep their empty default and are
+        listed in `missing`, so the tab renders whatever arrived.
+        """
+        calls = {
+            "dashboard": (self.get_analytics_dashboard, {}),
+            "losses": (self.get_loss_analytics, {}),
+            "top_airports": (self.get_top_airports, []),
+            "hub_statistics": (self.get_hub_statistics, {}),
+        }
+        if names is not None:
+            calls = {name: calls[name] for name in names}
+        futures = {name: _analytics_pool.submit(fn) for name, (fn, _) in calls.items()}
+        wait(futures.values(), timeout=config.ANALYTICS_DEADLINE if deadline is None else deadline)
+
+        bundle = {"missing": []}
+        for name, future in futures.items():
+            if future.done():
+                bundle[name] = future.result()
+            else:
+                bundle[name] = calls[name][1]
+                bundle["missing"].append(name)
+        return bundle
+
     # ==================== HELPERS ====================
 
+    def _decode(self, data: List[Any]) -> BagStore:
+        """
+        Decode an API bag list into a new batch store (see bag_decoder).
+        Malformed rows are skipped and kept in `last_decode_report`.
+        """
+        batch = self.store.new_batch()
+        self.last_decode_report = decode_bags(data, self.airport_registry, batch)
+        return batch
+
     def _parse_bags_from_api(self, data: List[Dict]) -> List[Bag]:
         """Convert API response to Bag objects."""
-        bags = []
-        for item in data:
-            try:
-                # Map API status to BagStatus enum
-                status_map = {
-                    "CHECK_IN": BagStatus.CHECK_IN,
-                    "IN_TRANSIT": BagStatus.IN_TRANSIT,
-                    "LANDED": BagStatus.LANDED,
-                    "AT_GATE": BagStatus.AT_GATE,
-                    "LOST": BagStatus.LOST,
-                    "SECURITY": BagStatus.SECURITY,
-                    "BAGGAGE_CLAIM": BagStatus.BAGGAGE_CLAIM,
-                }
-
-                status = status_map.get(item.get("status", "CHECK_IN"), BagStatus.CHECK_IN)
-
-                # Get or create airports
-                # API returns origin_code/destination_code, not origin/destination
-                origin_code = item.get("origin_code", item.get("origin", "JFK"))
-                destination_code = item.get("destination_code", item.get("destination", "LHR"))
-
-                origin = self._get_or_create_airport(origin_code)
-                destination = self._get_or_create_airport(destination_code)
-
-                # API returns owner_name, not owner
-                owner = item.get("owner_name", item.get("owner", "Unknown"))
-
-                bag = Bag(
-                    id=item["id"],
-                    owner=owner,
-                    origin=origin,
-                    destination=destination,
-                    current_lat=item.get("current_lat", item.get("lat", 0.0)),
-                    current_lon=item.get("current_lon", item.get("lon", 0.0)),
-                    status=status,
-                    color=item.get("color", [0, 255, 0, 255]),
-                    progress=item.get("progress", 0.0)
-                )
-                bags.append(bag)
-            except Exception as e:
-                print(f"❌ Error parsing bag: {e}")
-                print(f"   Item data: {item}")
-                continue
-        return bags
+        batch = self._decode(data)
+        return [batch.make_bag(i) for i in range(len(batch))]
 
     def _get_or_create_airport(self, code: str) -> Airport:
-        """Get airport from cache or create a default one."""
-        for airport in self.airports:
-            if airport.code == code:
-                return airport
-        # Default fallback
-        return Airport(code=code, name=code, lat=0.0, lon=0.0)
+        """Get airport from the registry, or the shared placeholder for unknown codes."""
+        return self.airport_registry.get_or_placeholder(code)
 
     def get_dataframe(self) -> pd.DataFrame:
         """
-        Converts the fetched bag data into a DataFrame compatible with the Map Component.
-        """
-        if not self.bags:
-            return pd.DataFrame(columns=[
-                "id", "lat", "lon", "status", "origin", "destination",
-                "owner", "color", "size_scale", "dest_lat", "dest_lon"
-            ])
-
-        data = []
-        for bag in self.bags:
-            data.append({
-                "id": bag.id,
-                "lat": bag.current_lat,
-                "lon": bag.current_lon,
-                "status": bag.status.value,
-                "origin": bag.origin.name,
-                "destination": bag.destination.name,
-                "owner": bag.owner,
-                "color": bag.color,
-                "size_scale": 200 if bag.status == BagStatus.LOST else 50,
-                "dest_lat": bag.destination.lat,
-                "dest_lon": bag.destination.lon,
-            })
-        return pd.DataFrame(data)
+        Returns the fetched bag data as a DataFrame compatible with the Map Component.
+        The frame is a view over the bag store, rebuilt only when new bags are loaded.
+        """
+        with self.lock:
+            return self.store.dataframe()
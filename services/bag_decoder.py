@@ -0,0 +1,192 @@
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .airports import AirportRegistry
+from .bag_store import BagStore, SIZE_TABLE, STATUS_CODES, STATUS_LIST
+from .models import BagStatus
+
+# Fast JSON parsing if available (pip install orjson)
+try:
+    import orjson
+
+    def load_json(raw: Union[bytes, str]) -> Any:
+        return orjson.loads(raw)
+except ImportError:
+    def load_json(raw: Union[bytes, str]) -> Any:
+        return json.loads(raw)
+
+# API status name -> status code; unknown names fall back to CHECK_IN
+API_STATUS_CODES = {status.name: STATUS_CODES[status] for status in STATUS_LIST}
+DEFAULT_STATUS = STATUS_CODES[BagStatus.CHECK_IN]
+DEFAULT_COLOR = [0, 255, 0, 255]
+
+
+@dataclass
+class DecodeReport:
+    """Outcome of a bulk decode: malformed rows are skipped and listed here."""
+    total: int = 0
+    decoded: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)  # {index, id, reason}
+
+    def add_error(self, index: int, item: Any, reason: str):
+        bag_id = item.get("id") if isinstance(item, dict) else None
+        self.errors.append({"index": index, "id": bag_id, "reason": reason})
+
+
+_MISSING = object()
+
+
+def _column(items: List[dict], key: str, fallback: str, default: Any) -> List[Any]:
+    """`item.get(key, item.get(fallback, default))` for every item, with the
+    fallback key only looked up for the items that lack `key`."""
+    values = [item.get(key, _MISSING) for item in items]
+    for i, value in enumerate(values):
+        if value is _MISSING:
+            values[i] = items[i].get(fallback, default)
+    return values
+
+
+def _numeric(values: List[Any]) -> np.ndarray:
+    """Column of numbers; anything non-numeric becomes NaN."""
+    return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _objects(values: List[Any]) -> np.ndarray:
+    """1-D object column (np.array would nest equal-length list values into 2-D)."""
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
+
+
+def _coordinate(values: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Column of numbers with null values as 0.0, and the mask of values
+    present but not numeric."""
+    numbers = _numeric(values)
+    missing = np.isnan(numbers)
+    bad = missing & np.array([v is not None for v in values], dtype=bool)
+    return np.where(missing, 0.0, numbers), bad
+
+
+def decode_bags(data: List[Any], airports: AirportRegistry, into: BagStore) -> DecodeReport:
+    """
+    Decode an API bag list straight into the columns of `into` (reset first).
+
+    Each field is pulled out with one comprehension per column, honouring
+    the API's field fallbacks (origin_code/origin, owner_name/owner,
+    current_lat/lat, ...). Statuses and airport codes are mapped once per
+    distinct value and broadcast back with integer indexing. A null status
+    takes the default (CHECK_IN), null or missing coordinates default to
+    0.0 and a null, missing or non-numeric progress to 0.0. Rows without
+    an id, with a non-string status, with coordinates that are present but
+    not numeric or with a non-string airport code are dropped and listed
+    in the returned report.
+    """
+    report = DecodeReport(total=len(data))
+    items = []
+    for index, item in enumerate(data):
+        if isinstance(item, dict):
+            items.append(item)
+        else:
+            report.add_error(index, item, "not an object")
+    positions = [i for i, item in enumerate(data) if isinstance(item, dict)]
+
+    ids = [item.get("id") for item in items]
+    owners = _column(items, "owner_name", "owner", "Unknown")
+    statuses = [item.get("status", "CHECK_IN") for item in items]
+    # Null statuses take the default; anything else that isn't a name is malformed
+    bad_status = np.array([not (s is None or isinstance(s, str)) for s in statuses], dtype=bool)
+    statuses = [s if isinstance(s, str) else None for s in statuses]
+    origins = _column(items, "origin_code", "origin", "JFK")
+    dests = _column(items, "destination_code", "destination", "LHR")
+    lat, bad_lat = _coordinate(_column(items, "current_lat", "lat", 0.0))
+    lon, bad_lon = _coordinate(_column(items, "current_lon", "lon", 0.0))
+    progress = np.nan_to_num(_numeric([item.get("progress") for item in items]), nan=0.0)
+    colors = [item.get("color", DEFAULT_COLOR) for item in items]
+
+    # Status names -> codes, one dict lookup per distinct name
+    status_idx, status_names = pd.factorize(pd.Series(statuses, dtype=object))
+    status_lut = np.array([API_STATUS_CODES.get(name, DEFAULT_STATUS) for name in status_names]
+                          + [DEFAULT_STATUS], dtype=np.int8)
+    status = status_lut[status_idx]  # -1 (missing) picks the trailing default
+
+    # Airport codes -> store airport indices, one registry lookup per distinct code
+    codes = [c if isinstance(c, str) else None for c in origins + dests]
+    code_idx, code_names = pd.factorize(pd.Series(codes, dtype=object))
+    airport_lut = np.array([into.add_airport(airports.get_or_placeholder(c)) for c in code_names]
+                           + [-1], dtype=np.int16)
+    n = len(items)
+    origin, dest = airport_lut[code_idx[:n]], airport_lut[code_idx[n:]]
+
+    # Malformed rows
+    bad_id = np.array([not isinstance(b, str) or not b for b in ids], dtype=bool)
+    bad_number = bad_lat | bad_lon
+    bad_airport = (origin < 0) | (dest < 0)
+    valid = ~(bad_id | bad_status | bad_number | bad_airport)
+    for row in np.flatnonzero(~valid):
+        reason = ("missing id" if bad_id[row] else
+                  "invalid status" if bad_status[row] else
+                  "invalid number" if bad_number[row] else "invalid airport code")
+        report.add_error(positions[row], items[row], reason)
+    report.errors.sort(key=lambda e: e["index"])
+
+    rows = np.flatnonzero(valid)
+    into.reset(len(rows))
+    into.ids[:] = _objects(ids)[rows]
+    into.owners[:] = _objects(owners)[rows]
+    into.lat[:] = lat[rows]
+    into.lon[:] = lon[rows]
+    into.progress[:] = progress[rows]
+    into.status[:] = status[rows]
+    into.size_scale[:] = SIZE_TABLE[into.status]
+    into.recount_status()
+    into.color[:] = _objects(colors)[rows]
+    into.set_route(slice(None), origin[rows], dest[rows])
+    report.decoded = len(rows)
+    return report
+
+
+@dataclass
+class BagUpdates:
+    """
+    Columns of a batch of live bag updates. Fields an event did not carry
+    are marked missing: status -1, lat/lon/progress NaN.
+    """
+    ids: List[str]
+    status: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    progress: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _floats(values: List[Any]) -> np.ndarray:
+    """Like _numeric, without the pandas overhead that dominates small batches."""
+    return np.array([v if isinstance(v, (int, float)) else np.nan for v in values], dtype=np.float64)
+
+
+def decode_updates(events: List[Dict[str, Any]]) -> BagUpdates:
+    """
+    Decode live-feed bag events into update columns.
+
+    Accepts both the BAG_UPDATE event of /ws/live-updates
+    ({bag_id, new_status, lat, lon, progress}) and the full bag object
+    pushed on /ws ({id, status, current_lat, current_lon, ...}). Events
+    without a bag id are skipped. Live batches are small, so this sticks
+    to plain comprehensions.
+    """
+    events = [e for e in events if isinstance(e.get("bag_id", e.get("id")), str)]
+    return BagUpdates(
+        ids=_column(events, "bag_id", "id", None),
+        status=np.array([API_STATUS_CODES.get(s, -1) if isinstance(s, str) else -1
+                         for s in _column(events, "new_status", "status", None)], dtype=np.int8),
+        lat=_floats(_column(events, "lat", "current_lat", None)),
+        lon=_floats(_column(events, "lon", "current_lon", None)),
+        progress=_floats([e.get("progress") for e in events]),
+    )
@@ -0,0 +1,353 @@
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple
+from .models import Bag, Airport, BagStatus, CompactBag, STATUS_COLORS
+
+# Status codes: index into STATUS_LIST
+STATUS_LIST = list(BagStatus)
+STATUS_CODES = {status: code for code, status in enumerate(STATUS_LIST)}
+STATUS_VALUES = [s.value for s in STATUS_LIST]
+
+# Lookup tables indexed by status code
+COLOR_TABLE = np.empty(len(STATUS_LIST), dtype=object)
+for _status, _color in STATUS_COLORS.items():
+    COLOR_TABLE[STATUS_CODES[_status]] = _color
+SIZE_TABLE = np.array([200 if s == BagStatus.LOST else 50 for s in STATUS_LIST])
+
+DATAFRAME_COLUMNS = [
+    "id", "lat", "lon", "status", "origin", "destination",
+    "owner", "color", "size_scale", "dest_lat", "dest_lon"
+]
+
+
+def _unique_rows(idx):
+    """Row selector without repeated rows (an integer index may name a row twice)."""
+    if isinstance(idx, (list, np.ndarray)):
+        idx = np.asarray(idx)
+        if idx.dtype.kind in "iu":
+            return np.unique(idx)
+    return idx
+
+
+def count_statuses(df: pd.DataFrame) -> Dict[str, int]:
+    """Bags per status value in one pass over a bag DataFrame (when no store counter is at hand)."""
+    return {status: int(n) for status, n in df['status'].value_counts(sort=False).items()}
+
+
+class BagSequence:
+    """
+    Read-only list-like view over a service's bag store (`owner.store`).
+    Bag objects are built on access, so only the bags that are actually
+    looked at (search box, details panel) pay the object cost.
+    """
+    def __init__(self, owner):
+        self._owner = owner
+
+    def __len__(self):
+        return len(self._owner.store)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._owner._make_bag(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("bag index out of range")
+        return self._owner._make_bag(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._owner._make_bag(i)
+
+    def __bool__(self):
+        return len(self) > 0
+
+
+class BagStore:
+    """
+    Columnar storage for the bag fleet: one NumPy array per attribute.
+
+    Services update the columns in place (`set_status`, `set_route`, or plain
+    array writes for lat/lon/progress) and `dataframe()` hands out a DataFrame
+    that wraps those same arrays, so a rerun never rebuilds per-bag rows.
+    Status is exposed as a Categorical over the int8 code column, which keeps
+    it zero-copy as bags change state. Bags per status are counted as rows
+    change, so `status_counts()` is O(1) instead of a scan over the fleet.
+    """
+
+    def __init__(self, size: int = 0):
+        self.airports: List[Airport] = []
+        self._airport_index: Dict[str, int] = {}
+        self._airport_labels: List[str] = []
+        self._airport_lock = threading.Lock()  # batches decoded on other threads share the table
+        self._airport_arrays = None
+        self._rows: Optional[Dict[str, int]] = None
+        self._frame_airports = 0
+        self.reset(size)
+
+    def __len__(self):
+        return len(self.status)
+
+    # ==================== AIRPORTS ====================
+
+    def add_airport(self, airport: Airport) -> int:
+        """Register an airport and return its index (idempotent by code)."""
+        idx = self._airport_index.get(airport.code)
+        if idx is not None:
+            return idx
+        with self._airport_lock:
+            idx = self._airport_index.get(airport.code)
+            if idx is not None:
+                return idx
+            idx = len(self.airports)
+            self.airports.append(airport)
+            # Categorical labels must be unique
+            label = airport.name
+            if label in self._airport_labels:
+                label = f"{airport.name} ({airport.code})"
+            self._airport_labels.append(label)
+            self._airport_index[airport.code] = idx
+        self._airport_arrays = None
+        self._frame = None
+        return idx
+
+    @property
+    def airport_lat(self) -> np.ndarray:
+        return self._get_airport_arrays()[0]
+
+    @property
+    def airport_lon(self) -> np.ndarray:
+        return self._get_airport_arrays()[1]
+
+    def _get_airport_arrays(self):
+        if self._airport_arrays is None:
+            self._airport_arrays = (
+                np.array([a.lat for a in self.airports], dtype=np.float64),
+                np.array([a.lon for a in self.airports], dtype=np.float64),
+            )
+        return self._airport_arrays
+
+    # ==================== ROWS ====================
+
+    def reset(self, size: int):
+        """Allocate empty columns for `size` bags."""
+        self.ids = np.empty(size, dtype=object)
+        self.owners = np.empty(size, dtype=object)
+        self.lat = np.zeros(size)
+        self.lon = np.zeros(size)
+        self.progress = np.zeros(size)
+        self.status = np.zeros(size, dtype=np.int8)
+        self.origin = np.zeros(size, dtype=np.int16)
+        self.dest = np.zeros(size, dtype=np.int16)
+        self.color = COLOR_TABLE[self.status]
+        self.size_scale = SIZE_TABLE[self.status]
+        self.dest_lat = np.zeros(size)
+        self.dest_lon = np.zeros(size)
+        self._counts = np.zeros(len(STATUS_LIST), dtype=np.int64)
+        self._counts[0] = size
+        self._rows = None
+        self._frame = None
+
+    def row_of(self, bag_id: str) -> Optional[int]:
+        """Row index of a bag id (None if not stored)."""
+        if self._rows is None:
+            self._rows = {bag_id: i for i, bag_id in enumerate(self.ids)}
+        return self._rows.get(bag_id)
+
+    def set_status(self, idx, codes):
+        """Update status codes, the columns derived from them and the status counts."""
+        codes = np.broadcast_to(np.asarray(codes, dtype=np.int8), self.status[idx].shape)
+        rows = _unique_rows(idx)
+        self._count(rows, -1)
+        self.status[idx] = codes
+        self._count(rows, 1)
+        self.color[idx] = COLOR_TABLE[codes]
+        self.size_scale[idx] = SIZE_TABLE[codes]
+
+    # ==================== STATUS COUNTS ====================
+
+    def _count(self, rows, sign: int):
+        self._counts += sign * np.bincount(np.atleast_1d(self.status[rows]), minlength=len(STATUS_LIST))
+
+    def recount_status(self):
+        """Rebuild the status counts after writing the status column directly."""
+        self._counts = np.bincount(self.status, minlength=len(STATUS_LIST)).astype(np.int64)
+
+    def status_counts(self) -> Dict[str, int]:
+        """Bags per status value (e.g. "In Transit"), maintained incrementally."""
+        return dict(zip(STATUS_VALUES, self._counts.tolist()))
+
+    def set_route(self, idx, origin, dest):
+        """Update origin/destination airport indices and the arc endpoints."""
+        self.origin[idx] = origin
+        self.dest[idx] = dest
+        self.dest_lat[idx] = self.airport_lat[dest]
+        self.dest_lon[idx] = self.airport_lon[dest]
+        # Route columns are re-wrapped on the next dataframe() call
+        self._frame = None
+
+    def load_bags(self, bags: Sequence[Bag]):
+        """Replace the store contents with a list of Bag objects."""
+        n = len(bags)
+        self.reset(n)
+        status = np.empty(n, dtype=np.int8)
+        origin = np.empty(n, dtype=np.int16)
+        dest = np.empty(n, dtype=np.int16)
+        for i, bag in enumerate(bags):
+            self.ids[i] = bag.id
+            self.owners[i] = bag.owner
+            self.lat[i] = bag.current_lat
+            self.lon[i] = bag.current_lon
+            self.progress[i] = bag.progress
+            status[i] = STATUS_CODES[bag.status]
+            origin[i] = self.add_airport(bag.origin)
+            dest[i] = self.add_airport(bag.destination)
+            self.color[i] = bag.color
+        self.status[:] = status
+        self.size_scale[:] = SIZE_TABLE[status]
+        self.recount_status()
+        self.set_route(slice(None), origin, dest)
+
+    def apply_updates(self, updates) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Write a batch of live updates (bag_decoder.BagUpdates) in place.
+        Fields an update did not carry keep their value; unknown ids are
+        skipped. Returns (rows, codes) of the bags whose status changed.
+        """
+        rows = np.array([-1 if r is None else r for r in map(self.row_of, updates.ids)], dtype=np.int64)
+        known = rows >= 0
+        for column, values in ((self.lat, updates.lat), (self.lon, updates.lon),
+                               (self.progress, updates.progress)):
+            mask = known & ~np.isnan(values)
+            column[rows[mask]] = values[mask]
+        mask = known & (updates.status >= 0)
+        target, codes = rows[mask], updates.status[mask]
+        changed = self.status[target] != codes
+        self.set_status(target, codes)
+        return target[changed], codes[changed]
+
+    def merge(self, batch: "BagStore") -> np.ndarray:
+        """
+        Upsert the rows of `batch` (a store from `new_batch()`) by id.
+        Existing rows are overwritten with vectorized writes; new ids are
+        appended, which reallocates the columns once. Returns the rows of
+        existing bags whose status changed.
+        """
+        rows = np.array([-1 if r is None else r for r in map(self.row_of, batch.ids)], dtype=np.int64)
+        known = rows >= 0
+        target = rows[known]
+        changed = target[self.status[target] != batch.status[known]]
+        self._airport_arrays = None  # the batch may have registered airports
+        if len(target):
+            if (np.any(self.origin[target] != batch.origin[known]) or
+                    np.any(self.dest[target] != batch.dest[known]) or
+                    np.any(self.owners[target] != batch.owners[known])):
+                self._frame = None
+            unique = _unique_rows(target)
+            self._count(unique, -1)
+            for name in self._COLUMNS:
+                getattr(self, name)[target] = getattr(batch, name)[known]
+            self._count(unique, 1)
+        if not known.all():
+            new = ~known
+            self._counts += np.bincount(batch.status[new], minlength=len(STATUS_LIST))
+            for name in self._COLUMNS:
+                setattr(self, name, np.concatenate([getattr(self, name), getattr(batch, name)[new]]))
+            self._rows = None
+            self._frame = None
+        return changed
+
+    def assign(self, batch: "BagStore"):
+        """Replace the store contents with the rows of `batch` (no copy)."""
+        self._airport_arrays = None
+        for name in self._COLUMNS:
+            setattr(self, name, getattr(batch, name))
+        self._counts = batch._counts.copy()
+        self._rows = None
+        self._frame = None
+
+    def remove_ids(self, bag_ids: Sequence[str]):
+        """Drop bags by id (unknown ids are ignored)."""
+        rows = [i for i in (self.row_of(b) for b in bag_ids) if i is not None]
+        if not rows:
+            return
+        keep = np.ones(len(self), dtype=bool)
+        keep[rows] = False
+        self._count(~keep, -1)
+        for name in self._COLUMNS:
+            setattr(self, name, getattr(self, name)[keep])
+        self._rows = None
+        self._frame = None
+
+    _COLUMNS = ("ids", "owners", "lat", "lon", "progress", "status", "origin",
+                "dest", "color", "size_scale", "dest_lat", "dest_lon")
+
+    def new_batch(self) -> "BagStore":
+        """Empty store sharing this store's airport table, for merge()/assign()."""
+        other = BagStore()
+        other.airports = self.airports
+        other._airport_index = self._airport_index
+        other._airport_labels = self._airport_labels
+        other._airport_lock = self._airport_lock
+        return other
+
+    def make_bag(self, i: int, history: Optional[list] = None) -> Bag:
+        """Build a Bag object for row `i`."""
+        return Bag(
+            id=self.ids[i],
+            owner=self.owners[i],
+            origin=self.airports[self.origin[i]],
+            destination=self.airports[self.dest[i]],
+            current_lat=float(self.lat[i]),
+            current_lon=float(self.lon[i]),
+            status=STATUS_LIST[self.status[i]],
+            color=self.color[i],
+            history=history if history is not None else [],
+            progress=float(self.progress[i]),
+        )
+
+    def make_compact_bag(self, i: int, history: Sequence = ()) -> CompactBag:
+        """Build a read-only CompactBag for row `i` (for keeping many bags as objects)."""
+        return CompactBag(
+            id=self.ids[i],
+            owner=self.owners[i],
+            origin=self.airports[self.origin[i]],
+            destination=self.airports[self.dest[i]],
+            current_lat=float(self.lat[i]),
+            current_lon=float(self.lon[i]),
+            status=STATUS_LIST[self.status[i]],
+            history=tuple(history),
+            progress=float(self.progress[i]),
+        )
+
+    # ==================== EXPORT ====================
+
+    def dataframe(self) -> pd.DataFrame:
+        """
+        DataFrame view over the store columns (same layout as the old
+        per-bag dict export). Numeric and status columns share memory with
+        the store, so in-place updates show up without rebuilding the frame.
+        """
+        # Airports added through a batch store extend the shared label list
+        if self._frame is None or self._frame_airports != len(self._airport_labels):
+            self._frame = self._build_frame()
+            self._frame_airports = len(self._airport_labels)
+        return self._frame
+
+    def _build_frame(self) -> pd.DataFrame:
+        labels = self._airport_labels
+        return pd.DataFrame({
+            "id": self.ids,
+            "lat": self.lat,
+            "lon": self.lon,
+            "status": pd.Categorical.from_codes(self.status, categories=STATUS_VALUES),
+            "origin": pd.Categorical.from_codes(self.origin, categories=labels),
+            "destination": pd.Categorical.from_codes(self.dest, categories=labels),
+            "owner": self.owners,
+            "color": self.color,
+            "size_scale": self.size_scale,
+            # For arcs
+            "dest_lat": self.dest_lat,
+            "dest_lon": self.dest_lon,
+        }, columns=DATAFRAME_COLUMNS, copy=False)
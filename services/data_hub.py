@@ -0,0 +1,300 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+import config
+from .heat_grid import HeatGrid
+from .models import Bag
+from .transitions import Transitions
+
+SIMULATION = "Simulation"
+REAL_API = "Real Backend API"
+
+
+@dataclass(frozen=True)
+class HubSnapshot:
+    """Fleet DataFrame at one hub version. Shared by every session: filter it, don't mutate it."""
+    version: int
+    dataframe: pd.DataFrame
+    updated_at: datetime
+    status_counts: Dict[str, int]  # bags per status value, read from the store's counter
+
+
+class DataHub:
+    """
+    Process-wide owner of one data service (SimulationEngine or
+    RealTimeService) and its bag store.
+
+    One background thread ticks the simulation or polls the backend while
+    at least one session is live, instead of every browser session running
+    its own poller over its own copy of the fleet. Sessions subscribe with
+    a heartbeat on each rerun, read `snapshot()` and apply their own
+    filters. A snapshot is copied once per hub version and shared by all
+    sessions, so the background thread can keep updating the store while
+    reruns render.
+
+    In API mode the hub also owns the WebSocket live feed: its bag events
+    are applied to the store as they arrive, and REST polling pauses while
+    the feed is connected. Events the feed missed (a reconnect the server
+    couldn't resume, or overflow drops) are recovered by one REST delta
+    sync on the next tick; a gap starts the background thread for that
+    sync even while no session is live.
+    """
+
+    def __init__(self, service, interval: float, session_ttl: float = 30.0):
+        self.service = service
+        self.interval = interval          # seconds between background ticks
+        self.session_ttl = session_ttl    # sessions silent for longer are dropped
+        self.version = 0
+        self.ticks = 0
+        self.warped_s = 0.0  # simulated seconds skipped by advance(), ahead of the wall clock
+        self.updated_at = datetime.now()
+        # Services with their own `lock` (RealTimeService) apply updates under
+        # it, so a poll waiting on the network doesn't block readers; others
+        # (SimulationEngine) are ticked while holding it
+        self._lock = getattr(service, "lock", None) or threading.RLock()
+        self._self_locking = hasattr(service, "lock")
+        self._tick_lock = threading.Lock()  # serializes ticks and live-feed batches
+        self._changed = threading.Condition(self._lock)
+        self._sessions: Dict[str, Tuple[float, bool]] = {}  # session id -> (last seen, live)
+        self._snapshot: Optional[HubSnapshot] = None
+        self._snapshot_frame = None
+        self._heat_grid: Optional[HeatGrid] = None  # built on the first heatmap request
+        self._heat: Optional[Tuple[int, pd.DataFrame, pd.DataFrame]] = None  # (version, frame, cells)
+        self._analytics_lock = threading.Lock()  # one analytics fetch at a time
+        self._analytics: Optional[Tuple[float, Dict[str, Any]]] = None  # (fetched at, bundle)
+        self._stop = threading.Event()
+        self._resync = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.live_feed = None  # WebSocketClient, see attach_live_feed
+
+    # ==================== SESSIONS ====================
+
+    def subscribe(self, session_id: str, live: bool = False):
+        """Register (or refresh) a session; live sessions keep the background loop ticking."""
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic(), live)
+        if live:
+            self._ensure_thread()
+
+    def unsubscribe(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def sessions(self) -> int:
+        """Sessions seen within the TTL."""
+        with self._lock:
+            self._prune()
+            return len(self._sessions)
+
+    def live_sessions(self) -> int:
+        with self._lock:
+            self._prune()
+            return sum(live for _, live in self._sessions.values())
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.session_ttl
+        for session_id in [s for s, (seen, _) in self._sessions.items() if seen < cutoff]:
+            del self._sessions[session_id]
+
+    # ==================== UPDATES ====================
+
+    def tick(self):
+        """Advance the simulation / poll the backend once (serialized across sessions)."""
+        with self._tick_lock:
+            if self._self_locking:
+                self.service.tick()
+            else:
+                with self._lock:
+                    self.service.tick()
+        with self._lock:
+            self.ticks += 1
+            self.publish()
+
+    def advance(self, ticks: int):
+        """
+        Fast-forward the simulation `ticks` ticks in one step (see
+        SimulationEngine.advance) and publish once; returns the bags per
+        status after each tick.
+        """
+        with self._tick_lock:
+            with self._lock:
+                counts = self.service.advance(ticks)
+        with self._lock:
+            self.ticks += ticks
+            self.warped_s += ticks * self.interval
+            self.publish()
+        return counts
+
+    def save_snapshot(self, path: str):
+        """Write the simulation state to `path` between ticks (see SimulationEngine.save_snapshot)."""
+        with self._tick_lock:
+            with self._lock:
+                self.service.save_snapshot(path)
+
+    def now(self) -> datetime:
+        """Simulated time: the wall clock plus what advance() skipped."""
+        return datetime.now() + timedelta(seconds=self.warped_s)
+
+    def publish(self):
+        """Announce new data (a tick or a live-feed update) to the sessions."""
+        with self._lock:
+            self.version += 1
+            self.updated_at = datetime.now()
+            self._changed.notify_all()
+
+    def attach_live_feed(self, feed):
+        """Apply a live feed's bag events to the service as they arrive and connect it."""
+        self.live_feed = feed
+        feed.on_updates = self._apply_live
+        feed.on_gap = self._request_resync
+        feed.connect()
+
+    def _apply_live(self, events) -> int:
+        # Serialized with ticks: events arriving during a REST sync wait in
+        # the feed's buffer and land after it in order, so an older REST
+        # snapshot never overwrites newer live state
+        with self._tick_lock:
+            applied = self.service.apply_live_updates(events)
+        self.publish()
+        return applied
+
+    def _request_resync(self, last_seq, seq):
+        # The loop stays up until the pending sync has run, live sessions or not
+        self._resync.set()
+        self._ensure_thread()
+
+    def wait_for_update(self, version: int, timeout: float) -> int:
+        """Block until the hub moves past `version` (or `timeout` seconds); returns the current version."""
+        with self._lock:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="data-hub", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        # Exits once no live session is left and no resync is pending; the
+        # next live subscribe (or feed gap) restarts it
+        while not self._stop.wait(self.interval):
+            with self._lock:  # same lock as _ensure_thread: a gap can't slip in as the loop exits
+                if not self.live_sessions() and not self._resync.is_set():
+                    self._thread = None
+                    break
+            if (self.live_feed is not None and self.live_feed.is_connected()
+                    and not self._resync.is_set()):
+                continue  # the feed pushes updates, no need to poll
+            self._resync.clear()
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"❌ Data hub update failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+    # ==================== READS ====================
+
+    def snapshot(self) -> HubSnapshot:
+        """Fleet DataFrame for the current version, copied at most once per version."""
+        with self._lock:
+            frame = self.service.get_dataframe()
+            # Background page ingestion swaps the service frame without a tick
+            if (self._snapshot is None or self._snapshot.version != self.version
+                    or self._snapshot_frame is not frame):
+                self._snapshot = HubSnapshot(self.version, frame.copy(), self.updated_at,
+                                             self.service.store.status_counts())
+                self._snapshot_frame = frame
+            return self._snapshot
+
+    def heat_cells(self) -> pd.DataFrame:
+        """Heatmap cells for the current version (see HeatGrid), rebinning only the bags that moved."""
+        with self._lock:
+            frame = self.service.get_dataframe()
+            # Same staleness rule as snapshot(): page ingestion swaps the frame without a tick
+            if self._heat is None or self._heat[0] != self.version or self._heat[1] is not frame:
+                if self._heat_grid is None:
+                    self._heat_grid = HeatGrid()
+                store = self.service.store
+                self._heat_grid.update(store.lat, store.lon, store.status)
+                self._heat = (self.version, frame, self._heat_grid.cells())
+            return self._heat[2]
+
+    def analytics_bundle(self) -> Dict[str, Any]:
+        """
+        Backend analytics (RealTimeService.get_analytics_bundle), fetched at
+        most once per config.ANALYTICS_REFRESH_S for all sessions. Calls that
+        missed the deadline are retried on the next request, alone; the rest
+        of the bundle stays cached. One fetch runs at a time: sessions
+        arriving during it get the bundle they would have had before it
+        (and only wait when there is none yet).
+        """
+        cached = self._analytics
+        if (cached is not None and not cached[1]["missing"]
+                and time.monotonic() - cached[0] < config.ANALYTICS_REFRESH_S):
+            return cached[1]
+        if not self._analytics_lock.acquire(blocking=cached is None):
+            return cached[1]
+        try:
+            cached = self._analytics
+            if cached is None or time.monotonic() - cached[0] >= config.ANALYTICS_REFRESH_S:
+                self._analytics = (time.monotonic(), self.service.get_analytics_bundle())
+            elif cached[1]["missing"]:
+                retry = self.service.get_analytics_bundle(names=cached[1]["missing"])
+                self._analytics = (cached[0], {**cached[1], **retry})
+            return self._analytics[1]
+        finally:
+            self._analytics_lock.release()
+
+    def get_bag(self, bag_id: str) -> Optional[Bag]:
+        """Bag object (with history) for one id, or None."""
+        with self._lock:
+            row = self.service.store.row_of(bag_id)
+            return self.service.bags[row] if row is not None else None
+
+    def transitions_since(self, seq: Optional[int]) -> Transitions:
+        """Status transitions after a session's cursor (see TransitionLog.since)."""
+        with self._lock:
+            return self.service.transitions.since(seq)
+
+
+def create_hub(source: str) -> DataHub:
+    """Build the hub for a data source ("Simulation" or "Real Backend API")."""
+    if source == SIMULATION:
+        from .simulation import SimulationEngine
+        path = config.SIMULATION_SNAPSHOT_PATH
+        if path and os.path.exists(path):
+            # Resume the saved run instead of starting a new fleet
+            try:
+                engine = SimulationEngine.load_snapshot(path)
+            except Exception as e:
+                print(f"❌ Could not restore simulation snapshot {path}: {e}")
+            else:
+                hub = DataHub(engine, interval=config.SIMULATION_TICK_SPEED)
+                hub.ticks = engine.ticks
+                return hub
+        return DataHub(SimulationEngine(num_bags=config.SIMULATION_NUM_BAGS),
+                       interval=config.SIMULATION_TICK_SPEED)
+    # Lazy import to avoid circular defaults
+    from .api_service import RealTimeService
+    hub = DataHub(RealTimeService(), interval=config.POLLING_INTERVAL_MS / 1000)
+    if config.ENABLE_WEBSOCKET:
+        from .websocket_client import WebSocketClient
+        hub.attach_live_feed(WebSocketClient(config.WEBSOCKET_URL))
+    return hub
+
+
+@st.cache_resource(show_spinner=False)
+def get_hub(source: str) -> DataHub:
+    """The process-wide hub for a data source, shared by every browser session."""
+    return create_hub(source)
@@ -0,0 +1,133 @@
+import datetime
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import Airport
+
+NO_AIRPORT = -1
+
+
+class EventLog:
+    """
+    Append-only tracking history of every bag, shared across the fleet.
+
+    One row per event in preallocated columns: bag key (the owner's stable
+    bag index), epoch milliseconds, event kind (index into `kinds`, a
+    message template such as "Landed at {airport}") and airport index. A
+    per-bag chain (`_prev` / `_last`) links each bag's events, so
+    `timeline()` builds the human-readable history of one bag, when a
+    details panel asks for it, without scanning the log.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.kinds: List[str] = []
+        self._kind_index: Dict[str, int] = {}
+        self.size = 0
+        self.bag = np.zeros(capacity, dtype=np.int32)
+        self.time = np.zeros(capacity, dtype=np.int64)
+        self.kind_code = np.zeros(capacity, dtype=np.int16)
+        self.airport = np.zeros(capacity, dtype=np.int16)
+        self._prev = np.zeros(capacity, dtype=np.int64)  # previous event of the same bag (-1: none)
+        self._last = np.zeros(0, dtype=np.int64)         # latest event per bag key (-1: none)
+
+    def __len__(self):
+        return self.size
+
+    def kind(self, template: str) -> int:
+        """Code of a message template (registered on first use)."""
+        code = self._kind_index.get(template)
+        if code is None:
+            code = self._kind_index[template] = len(self.kinds)
+            self.kinds.append(template)
+        return code
+
+    def append(self, bags, kinds, airports=NO_AIRPORT, when: Optional[float] = None):
+        """Log one event per bag key in `bags` (kinds/airports: scalars or matching arrays)."""
+        bags = np.asarray(bags, dtype=np.int64)
+        n = len(bags)
+        if not n:
+            return
+        self._reserve(self.size + n, int(bags.max()) + 1)
+        span = slice(self.size, self.size + n)
+        self.bag[span] = bags
+        self.time[span] = int((time.time() if when is None else when) * 1000)
+        self.kind_code[span] = kinds
+        self.airport[span] = airports
+        events = np.arange(self.size, self.size + n)
+        self._prev[span] = self._last[bags]
+        self._last[bags] = events
+        if not np.array_equal(self._last[bags], events):
+            # A bag twice in one batch: undo and chain its events in order
+            self._last[bags] = self._prev[span]
+            for event, bag in zip(events.tolist(), bags.tolist()):
+                self._prev[event] = self._last[bag]
+                self._last[bag] = event
+        self.size += n
+
+    def _reserve(self, size: int, bags: int):
+        if size > len(self.bag):
+            capacity = max(size, 2 * len(self.bag))
+            for name in ("bag", "time", "kind_code", "airport", "_prev"):
+                column = getattr(self, name)
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[:self.size] = column[:self.size]
+                setattr(self, name, grown)
+        if bags > len(self._last):
+            grown = np.full(max(bags, 2 * len(self._last)), -1, dtype=np.int64)
+            grown[:len(self._last)] = self._last
+            self._last = grown
+
+    def forget(self, bag: int):
+        """Detach a bag key from its events (e.g. a deleted bag); they stay in the log."""
+        if bag < len(self._last):
+            self._last[bag] = -1
+
+    def timeline(self, bag: int, airports: Sequence[Airport]) -> List[Tuple[datetime.datetime, str]]:
+        """(time, message) events of one bag, oldest first."""
+        events = []
+        event = self._last[bag] if bag < len(self._last) else -1
+        while event >= 0:
+            events.append(event)
+            event = self._prev[event]
+        history = []
+        for event in reversed(events):
+            airport = self.airport[event]
+            history.append((
+                datetime.datetime.fromtimestamp(self.time[event] / 1000),
+                self.kinds[self.kind_code[event]].format(
+                    airport=airports[airport].name if airport != NO_AIRPORT else ""),
+            ))
+        return history
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the logged events and the per-bag chain heads."""
+        per_event = sum(getattr(self, name).itemsize
+                        for name in ("bag", "time", "kind_code", "airport", "_prev"))
+        return per_event * self.size + self._last.nbytes
+
+    # ==================== SNAPSHOT ====================
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Columns trimmed to the events logged, for a snapshot (see from_arrays)."""
+        return {
+            "event_bag": self.bag[:self.size], "event_time": self.time[:self.size],
+            "event_kind": self.kind_code[:self.size], "event_airport": self.airport[:self.size],
+            "event_prev": self._prev[:self.size], "event_last": self._last,
+        }
+
+    @classmethod
+    def from_arrays(cls, kinds: List[str], arrays) -> "EventLog":
+        log = cls(capacity=max(len(arrays["event_bag"]), 1))
+        for template in kinds:
+            log.kind(template)
+        log.size = len(arrays["event_bag"])
+        log.bag[:log.size] = arrays["event_bag"]
+        log.time[:log.size] = arrays["event_time"]
+        log.kind_code[:log.size] = arrays["event_kind"]
+        log.airport[:log.size] = arrays["event_airport"]
+        log._prev[:log.size] = arrays["event_prev"]
+        log._last = np.array(arrays["event_last"], dtype=np.int64)
+        return log
@@ -0,0 +1,91 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+from .bag_store import STATUS_VALUES
+
+HEAT_COLUMNS = ["lon", "lat", "status", "weight"]
+
+
+class HeatGrid:
+    """
+    Bags binned on a regular lat/lon grid (`cell_deg` degrees), per status.
+
+    Each (cell, status) bin keeps a bag count and the sum of the bags'
+    coordinates, so the heatmap gets one weighted point per occupied bin,
+    at the centroid of its bags, instead of every bag. `update` compares
+    the store columns with the positions seen last time and only moves the
+    bags that changed between bins, whoever wrote them (tick, live update,
+    delta merge).
+    """
+
+    def __init__(self, cell_deg: float = config.HEATMAP_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.rows = int(np.ceil(180 / cell_deg))
+        self.cols = int(np.ceil(360 / cell_deg))
+        self.bins = self.rows * self.cols * len(STATUS_VALUES)
+        self.count = np.zeros(self.bins)
+        self.sum_lat = np.zeros(self.bins)
+        self.sum_lon = np.zeros(self.bins)
+        # Per bag, as of the last update
+        self._lat = np.zeros(0)
+        self._lon = np.zeros(0)
+        self._status = np.zeros(0, dtype=np.int8)
+        self._bin = np.zeros(0, dtype=np.int64)
+
+    def _bins_of(self, lat, lon, status) -> np.ndarray:
+        row = np.clip(np.floor((lat + 90) / self.cell_deg), 0, self.rows - 1).astype(np.int64)
+        col = np.floor((lon + 180) / self.cell_deg).astype(np.int64) % self.cols
+        return (row * self.cols + col) * len(STATUS_VALUES) + status
+
+    def update(self, lat: np.ndarray, lon: np.ndarray, status: np.ndarray) -> int:
+        """Sync with the bag columns; returns the bags re-binned."""
+        if len(lat) != len(self._lat):
+            # Bags added or removed: rebin everything
+            self.count[:] = 0
+            self.sum_lat[:] = 0
+            self.sum_lon[:] = 0
+            moved = np.arange(len(lat))
+            old = old_lat = old_lon = np.zeros(0)
+            self._bin = np.zeros(len(lat), dtype=np.int64)
+        else:
+            moved = np.flatnonzero((lat != self._lat) | (lon != self._lon) | (status != self._status))
+            old, old_lat, old_lon = self._bin[moved], self._lat[moved], self._lon[moved]
+        if not len(moved):
+            return 0
+        new = self._bins_of(lat[moved], lon[moved], status[moved])
+        # Old positions leave their bins and new ones enter theirs, in one pass
+        bins = np.concatenate([old, new]).astype(np.int64)
+        sign = np.repeat([-1.0, 1.0], [len(old), len(new)])
+        for total, before, after in ((self.count, np.ones(len(old)), np.ones(len(new))),
+                                     (self.sum_lat, old_lat, lat[moved]),
+                                     (self.sum_lon, old_lon, lon[moved])):
+            total += np.bincount(bins, weights=sign * np.concatenate([before, after]), minlength=self.bins)
+        self._bin[moved] = new
+        if len(old):
+            self._lat[moved], self._lon[moved], self._status[moved] = lat[moved], lon[moved], status[moved]
+        else:
+            self._lat, self._lon, self._status = lat.copy(), lon.copy(), status.copy()
+        return len(moved)
+
+    def cells(self) -> pd.DataFrame:
+        """Occupied bins: centroid, status and bag count (`weight`)."""
+        occupied = np.flatnonzero(self.count > 0.5)
+        count = self.count[occupied]
+        return pd.DataFrame({
+            "lon": self.sum_lon[occupied] / count,
+            "lat": self.sum_lat[occupied] / count,
+            "status": pd.Categorical.from_codes(occupied % len(STATUS_VALUES), categories=STATUS_VALUES),
+            "weight": count.astype(np.int64),
+        }, columns=HEAT_COLUMNS)
+
+
+def heat_cells(df: pd.DataFrame, cell_deg: Optional[float] = None) -> pd.DataFrame:
+    """One-off binning of a bag DataFrame (for frames without a HeatGrid kept up to date)."""
+    grid = HeatGrid(cell_deg or config.HEATMAP_CELL_DEG)
+    codes = pd.Categorical(df['status'], categories=STATUS_VALUES).codes.astype(np.int64)
+    known = codes >= 0
+    grid.update(df['lat'].to_numpy()[known], df['lon'].to_numpy()[known], codes[known])
+    return grid.cells()
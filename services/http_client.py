@@ -0,0 +1,85 @@
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+
+class ApiTransport:
+    """
+    Shared HTTP transport for the backend API.
+
+    Wraps a single requests.Session with a pooled keep-alive adapter so every
+    RealTimeService call reuses open TCP connections instead of opening a new
+    one per request. Timeouts come from config.API_TIMEOUT, with per-endpoint
+    overrides in config.API_ENDPOINT_TIMEOUTS (longest path prefix wins).
+    """
+
+    def __init__(self, base_url: str = config.BACKEND_API_URL,
+                 pool_size: int = config.API_POOL_SIZE,
+                 timeout: float = config.API_TIMEOUT,
+                 endpoint_timeouts: Optional[Dict[str, float]] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.endpoint_timeouts = dict(config.API_ENDPOINT_TIMEOUTS if endpoint_timeouts is None
+                                      else endpoint_timeouts)
+
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+
+    def timeout_for(self, path: str) -> float:
+        """Timeout for an endpoint path (e.g. '/api/bags/BAG-1')."""
+        best, best_len = self.timeout, -1
+        for prefix, timeout in self.endpoint_timeouts.items():
+            if path.startswith(prefix) and len(prefix) > best_len:
+                best, best_len = timeout, len(prefix)
+        return best
+
+    def request(self, method: str, path: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        return self.session.request(
+            method,
+            f"{self.base_url}{path}",
+            timeout=timeout if timeout is not None else self.timeout_for(path),
+            **kwargs
+        )
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def stats(self) -> Dict[str, int]:
+        """Connections opened and requests sent through the pool so far."""
+        connections = sent = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            connections += pool.num_connections
+            sent += pool.num_requests
+        return {"connections": connections, "requests": sent}
+
+    def close(self):
+        self.session.close()
+
+
+_transports: Dict[str, ApiTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(base_url: str = config.BACKEND_API_URL) -> ApiTransport:
+    """Process-wide transport per backend URL, shared by all sessions."""
+    with _transports_lock:
+        transport = _transports.get(base_url)
+        if transport is None:
+            transport = ApiTransport(base_url)
+            _transports[base_url] = transport
+        return transport
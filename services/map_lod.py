@@ -0,0 +1,148 @@
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+from .bag_store import COLOR_TABLE, STATUS_CODES, STATUS_VALUES
+from .models import BagStatus
+
+IN_TRANSIT = STATUS_CODES[BagStatus.IN_TRANSIT]
+LOST = STATUS_CODES[BagStatus.LOST]
+
+# Columns shipped to the browser per layer (tooltip fields included)
+POINT_COLUMNS = ["lon", "lat", "color", "size_scale", "id", "status", "route"]
+ARC_COLUMNS = ["lon", "lat", "dest_lon", "dest_lat", "id", "status", "route"]
+CLUSTER_COLUMNS = ["lon", "lat", "color", "radius", "id", "status", "route"]
+COORD_COLUMNS = ["lon", "lat", "dest_lon", "dest_lat"]
+
+
+@dataclass(frozen=True)
+class Viewport:
+    """
+    Map view known to the server (pydeck does not report the browser's pan
+    and zoom back), in Web Mercator zoom levels over a map of
+    `width_px` x `height_px`.
+    """
+    latitude: float = 20.0
+    longitude: float = 0.0
+    zoom: float = 1.5
+    width_px: int = 1200
+    height_px: int = 500
+
+    def half_spans(self, margin: float = 0.25) -> Tuple[float, float]:
+        """Half the visible (lat, lon) span in degrees, widened by `margin`."""
+        lon_span = 360.0 * self.width_px / (256 * 2 ** self.zoom) * (1 + margin)
+        lat_span = lon_span * self.height_px / self.width_px * np.cos(np.radians(self.latitude))
+        return lat_span / 2, lon_span / 2
+
+    def contains(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Mask of the points inside the view (longitudes wrap at the antimeridian)."""
+        half_lat, half_lon = self.half_spans()
+        if half_lon >= 180:
+            inside = np.ones(len(lon), dtype=bool)
+        else:
+            inside = np.abs((lon - self.longitude + 180) % 360 - 180) <= half_lon
+        return inside & (np.abs(lat - self.latitude) <= half_lat)
+
+
+@dataclass
+class MapLayers:
+    """Map data after level of detail: what actually goes to the browser."""
+    points: pd.DataFrame    # individual bags
+    clusters: pd.DataFrame  # grid cells standing in for the bags not drawn as points
+    arcs: pd.DataFrame      # sampled in-transit bags
+    total: int              # bags before culling
+    visible: int            # bags inside the viewport
+
+
+def _sample(rows: np.ndarray, limit: int) -> np.ndarray:
+    """At most `limit` rows, evenly strided, so the picked bags stay put across reruns."""
+    if len(rows) <= limit:
+        return rows
+    return rows[np.linspace(0, len(rows) - 1, limit).astype(np.int64)]
+
+
+def _routes(df: pd.DataFrame, rows: np.ndarray) -> np.ndarray:
+    origin = df['origin'].to_numpy()[rows].astype(str)
+    dest = df['destination'].to_numpy()[rows].astype(str)
+    return np.char.add(np.char.add(origin, " ➝ "), dest)
+
+
+def _bag_frame(df: pd.DataFrame, rows: np.ndarray, columns) -> pd.DataFrame:
+    frame = df.iloc[rows][[c for c in columns if c != "route"]].reset_index(drop=True)
+    frame["status"] = frame["status"].astype(str)
+    frame["route"] = _routes(df, rows)
+    return frame[columns]
+
+
+def _clusters(lat, lon, codes, zoom: float) -> pd.DataFrame:
+    """Grid cells sized to the zoom: count, centroid and dominant status per occupied cell."""
+    cell = 360.0 / 2 ** (zoom + config.MAP_CLUSTER_DETAIL)
+    cols = int(np.ceil(360 / cell))
+    keys = (np.floor((lat + 90) / cell).astype(np.int64) * cols
+            + np.floor((lon + 180) / cell).astype(np.int64) % cols)
+    cells, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    n_status = len(STATUS_VALUES)
+    by_status = np.bincount(inverse * n_status + codes, minlength=len(cells) * n_status)
+    dominant = by_status.reshape(len(cells), n_status).argmax(axis=1)
+    lost = by_status.reshape(len(cells), n_status)[:, LOST]
+    return pd.DataFrame({
+        "lon": np.bincount(inverse, weights=lon) / counts,
+        "lat": np.bincount(inverse, weights=lat) / counts,
+        "color": COLOR_TABLE[dominant],
+        "radius": np.sqrt(counts),
+        "id": [f"{n:,} bags" for n in counts],
+        "status": [f"Mostly {STATUS_VALUES[s]}" for s in dominant],
+        "route": [f"{n:,} lost" if n else "" for n in lost],
+    }, columns=CLUSTER_COLUMNS)
+
+
+def compact(frame: pd.DataFrame, decimals: int = config.MAP_COORD_DECIMALS) -> pd.DataFrame:
+    """
+    Layer data trimmed for the JSON sent to the browser: coordinates rounded
+    to `decimals` (what a float32 position keeps anyway), cluster radii to
+    one decimal. Colors already travel as small integer lists.
+    """
+    rounded = {c: frame[c].round(decimals) for c in COORD_COLUMNS if c in frame}
+    if "radius" in frame:
+        rounded["radius"] = frame["radius"].round(1)
+    return frame.assign(**rounded)
+
+
+def level_of_detail(df: pd.DataFrame, viewport: Viewport,
+                    max_points: int = config.MAX_BAGS_DISPLAY,
+                    max_arcs: int = config.MAX_ARCS_DISPLAY) -> MapLayers:
+    """
+    Reduce a bag DataFrame to what the map can usefully draw at `viewport`.
+
+    Bags outside the view are culled. If more than `max_points` remain,
+    lost bags are kept as points first and the rest are either clustered
+    into grid cells (zoomed out, below config.MAP_CLUSTER_ZOOM) or sampled
+    down to `max_points`. In-transit arcs are sampled to `max_arcs`.
+    """
+    lat, lon = df['lat'].to_numpy(), df['lon'].to_numpy()
+    codes = pd.Categorical(df['status'], categories=STATUS_VALUES).codes.astype(np.int64)
+    visible = np.flatnonzero(viewport.contains(lat, lon))
+
+    clusters = pd.DataFrame(columns=CLUSTER_COLUMNS)
+    if len(visible) <= max_points:
+        points = visible
+    else:
+        lost = visible[codes[visible] == LOST]
+        points = _sample(lost, max_points)
+        rest = visible[codes[visible] != LOST]
+        if viewport.zoom < config.MAP_CLUSTER_ZOOM:
+            clusters = _clusters(lat[rest], lon[rest], codes[rest], viewport.zoom)
+        else:
+            points = np.sort(np.concatenate([points, _sample(rest, max_points - len(points))]))
+
+    flying = _sample(visible[codes[visible] == IN_TRANSIT], max_arcs)
+    return MapLayers(
+        points=_bag_frame(df, points, POINT_COLUMNS),
+        clusters=clusters,
+        arcs=_bag_frame(df, flying, ARC_COLUMNS),
+        total=len(df),
+        visible=len(visible),
+    )
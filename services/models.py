@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 import random
 import datetime
 
@@ -14,14 +14,32 @@ class BagStatus(Enum):
     CLAIMED = "Claimed"
     LOST = "Lost"
 
-@dataclass
+# Shared RGBA palette: a bag's color is determined by its status
+STATUS_COLORS = {
+    BagStatus.CHECK_IN: [169, 169, 169, 200],      # Grey
+    BagStatus.SECURITY: [255, 255, 0, 200],        # Yellow
+    BagStatus.AT_GATE: [100, 149, 237, 200],       # Cornflower Blue
+    BagStatus.IN_TRANSIT: [30, 144, 255, 255],     # Dodger Blue (Bright)
+    BagStatus.LANDED: [50, 205, 50, 200],          # Lime Green
+    BagStatus.BAGGAGE_CLAIM: [255, 165, 0, 200],   # Orange
+    BagStatus.CLAIMED: [0, 128, 0, 150],           # Dark Green
+    BagStatus.LOST: [255, 0, 0, 255],              # Red
+}
+
+@dataclass(frozen=True, slots=True)
 class Airport:
     code: str
     name: str
     lat: float
     lon: float
 
-@dataclass
+_INTERNED_AIRPORTS: Dict[Airport, Airport] = {}
+
+def intern_airport(airport: Airport) -> Airport:
+    """The one shared instance of an airport value (equal airports become the same object)."""
+    return _INTERNED_AIRPORTS.setdefault(airport, airport)
+
+@dataclass(slots=True)
 class Bag:
     id: str
     owner: str
@@ -36,3 +54,39 @@ class Bag:
 
     def update_history(self, message: str):
         self.history.append((datetime.datetime.now(), message))
+
+    def compact(self) -> "CompactBag":
+        """Frozen, memory-compact copy of this bag."""
+        return CompactBag(self.id, self.owner, self.origin, self.destination, self.current_lat,
+                          self.current_lon, self.status, tuple(self.history), self.progress)
+
+@dataclass(frozen=True, slots=True)
+class CompactBag:
+    """
+    Read-only Bag for holding many bags as objects: no per-instance
+    `__dict__`, airports interned (every bag on a route points at the same
+    two Airport objects) and `color` looked up from STATUS_COLORS instead
+    of a list per bag. Exposes the same attributes the components read.
+    """
+    id: str
+    owner: str
+    origin: Airport
+    destination: Airport
+    current_lat: float
+    current_lon: float
+    status: BagStatus
+    history: Tuple[Tuple[datetime.datetime, str], ...] = ()
+    progress: float = 0.0
+
+    def __post_init__(self):
+        object.__setattr__(self, "origin", intern_airport(self.origin))
+        object.__setattr__(self, "destination", intern_airport(self.destination))
+
+    @property
+    def color(self) -> List[int]: # RGBA
+        return STATUS_COLORS[self.status]
+
+    def thaw(self) -> Bag:
+        """Mutable Bag copy (with its own color and history lists)."""
+        return Bag(self.id, self.owner, self.origin, self.destination, self.current_lat,
+                   self.current_lon, self.status, list(self.color), list(self.history), self.progress)
@@ -0,0 +1,79 @@
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class TransitionSchedule:
+    """
+    Timing wheel of the tick at which each bag next changes status.
+
+    `due[i]` is the scheduled tick of bag `i` (-1: none) and each tick
+    has a bucket of the rows scheduled for it, so `pop(tick)` only touches
+    the bags that actually transition. Rescheduling a bag just overwrites
+    `due`; the entry left in the old bucket is dropped when that bucket
+    is popped.
+    """
+
+    def __init__(self, size: int = 0):
+        self.reset(size)
+
+    def reset(self, size: int):
+        self.due = np.full(size, -1, dtype=np.int64)
+        self._buckets: Dict[int, List[np.ndarray]] = defaultdict(list)
+
+    def __len__(self):
+        """Bags with a pending transition."""
+        return int(np.count_nonzero(self.due >= 0))
+
+    def schedule(self, rows: np.ndarray, ticks: np.ndarray):
+        """Set the next transition tick of `rows` (replacing any earlier one)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        ticks = np.asarray(ticks, dtype=np.int64)
+        self.due[rows] = ticks
+        if not len(rows):
+            return
+        # Waits span a few hundred ticks: a 16-bit key gets NumPy's radix sort
+        offset = ticks - ticks.min()
+        key = offset.astype(np.uint16) if offset.max() < 2 ** 16 else offset
+        order = np.argsort(key, kind="stable")
+        ticks, rows = ticks[order], rows[order]
+        starts = np.flatnonzero(np.r_[True, ticks[1:] != ticks[:-1]])
+        for tick, group in zip(ticks[starts].tolist(), np.split(rows, starts[1:])):
+            self._buckets[tick].append(group)
+
+    def cancel(self, rows: np.ndarray):
+        """Drop the pending transition of `rows`."""
+        self.due[rows] = -1
+
+    def pop(self, tick: int) -> np.ndarray:
+        """Rows due at `tick` (each once, in no particular order); they are unscheduled."""
+        groups = self._buckets.pop(tick, None)
+        if not groups:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.concatenate(groups)
+        rows = rows[self.due[rows] == tick]
+        # A row queued twice for the same tick: keep the copy whose stamp survives
+        stamp = -2 - np.arange(len(rows))
+        self.due[rows] = stamp
+        rows = rows[self.due[rows] == stamp]
+        self.due[rows] = -1
+        return rows
+
+    # ==================== SNAPSHOT ====================
+
+    def state(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Arrays for a snapshot: due ticks, then each queued group's tick, size and rows."""
+        ticks = np.array(list(self._buckets), dtype=np.int64)
+        groups = [group for tick in self._buckets for group in self._buckets[tick]]
+        counts = np.array([len(self._buckets[tick]) for tick in self._buckets], dtype=np.int64)
+        sizes = np.array([len(group) for group in groups], dtype=np.int64)
+        rows = np.concatenate(groups) if groups else np.zeros(0, dtype=np.int64)
+        return self.due, np.repeat(ticks, counts), sizes, rows
+
+    def restore(self, due: np.ndarray, group_ticks: np.ndarray, sizes: np.ndarray, rows: np.ndarray):
+        """Rebuild the exact queue of state(), so pops come back in the same order."""
+        self.due = due.astype(np.int64, copy=True)
+        self._buckets = defaultdict(list)
+        for tick, group in zip(group_ticks.tolist(), np.split(rows, np.cumsum(sizes)[:-1])):
+            self._buckets[tick].append(group)
@@ -1,167 +1,294 @@
-import random
-import math
-import pandas as pd
-from typing import List, Dict
+import json
+import os
+import numpy as np
+from typing import Optional
+import config
 from .models import Bag, Airport, BagStatus
+from .airports import AIRPORTS, GreatCircleRoutes
+from .bag_store import BagSequence, BagStore, STATUS_CODES, STATUS_LIST
+from .event_log import NO_AIRPORT, EventLog
+from .scheduler import TransitionSchedule
+from .transitions import TransitionLog
 
 # Configuration
-# Verified Coordinates (Lat, Lon)
-AIRPORTS = {
-    "JFK": Airport("JFK", "New York JFK", 40.6413, -73.7781),
-    "LHR": Airport("LHR", "London Heathrow", 51.4700, -0.4543),
-    "DUB": Airport("DUB", "Dublin Airport", 53.4264, -6.2499),        # Ireland
-    "HND": Airport("HND", "Tokyo Haneda", 35.5494, 139.7798),
-    "DXB": Airport("DXB", "Dubai Intl", 25.2532, 55.3657),            # UAE
-    "CDG": Airport("CDG", "Paris Charles de Gaulle", 49.0097, 2.5479),
-    "SIN": Airport("SIN", "Singapore Changi", 1.3644, 103.9915),
-    "SYD": Airport("SYD", "Sydney Kingsford Smith", -33.9399, 151.1753),
-    "BCN": Airport("BCN", "Barcelona El Prat", 41.2974, 2.0833),      # Spain
-    "LAX": Airport("LAX", "Los Angeles Intl", 33.9416, -118.4085),
-    "GRU": Airport("GRU", "São Paulo Guarulhos", -23.4356, -46.4731),
-    "HKG": Airport("HKG", "Hong Kong Intl", 22.3080, 113.9185),       # Added for Asia coverage
-    "FRA": Airport("FRA", "Frankfurt Airport", 50.0379, 8.5622),      # Added for EU coverage
-    "FCO": Airport("FCO", "Rome Fiumicino", 41.7999, 12.2462),        # Added for Med coverage
-}
+# AIRPORTS (code -> Airport) lives in services/airports.py, shared with the API service
+# Status codes used by the array engine
+CHECK_IN = STATUS_CODES[BagStatus.CHECK_IN]
+SECURITY = STATUS_CODES[BagStatus.SECURITY]
+AT_GATE = STATUS_CODES[BagStatus.AT_GATE]
+IN_TRANSIT = STATUS_CODES[BagStatus.IN_TRANSIT]
+LANDED = STATUS_CODES[BagStatus.LANDED]
+BAGGAGE_CLAIM = STATUS_CODES[BagStatus.BAGGAGE_CLAIM]
+CLAIMED = STATUS_CODES[BagStatus.CLAIMED]
+LOST = STATUS_CODES[BagStatus.LOST]
 
-STATUS_COLORS = {
-    BagStatus.CHECK_IN: [169, 169, 169, 200],      # Grey
-    BagStatus.SECURITY: [255, 255, 0, 200],        # Yellow
-    BagStatus.AT_GATE: [100, 149, 237, 200],       # Cornflower Blue
-    BagStatus.IN_TRANSIT: [30, 144, 255, 255],     # Dodger Blue (Bright)
-    BagStatus.LANDED: [50, 205, 50, 200],          # Lime Green
-    BagStatus.BAGGAGE_CLAIM: [255, 165, 0, 200],   # Orange
-    BagStatus.CLAIMED: [0, 128, 0, 150],           # Dark Green
-    BagStatus.LOST: [255, 0, 0, 255],              # Red
+# Random transitions: status -> (probability per tick, next status, history message)
+TRANSITIONS = {
+    CHECK_IN: (0.1, SECURITY, "Cleared Check-in"),
+    SECURITY: (0.1, AT_GATE, "Cleared Security"),
+    AT_GATE: (0.05, IN_TRANSIT, "Boarded Flight"),
+    LANDED: (0.1, BAGGAGE_CLAIM, "Unloaded to Baggage Claim"),
+    BAGGAGE_CLAIM: (0.05, CLAIMED, "Picked up by owner"),
 }
 
+FLIGHT_SPEED = 0.02  # Progress per tick (2%)
+
+SCHEDULERS = ("events", "dice")
+
+# Lookup tables indexed by status code
+TRANSITION_PROB = np.zeros(len(STATUS_LIST))
+NEXT_STATUS = np.arange(len(STATUS_LIST), dtype=np.int8)
+for _code, (_prob, _next, _msg) in TRANSITIONS.items():
+    TRANSITION_PROB[_code] = _prob
+    NEXT_STATUS[_code] = _next
+
+
 class SimulationEngine:
-    def __init__(self, num_bags=50):
-        self.bags: List[Bag] = []
+    """
+    Struct-of-arrays simulation: bag state lives in a BagStore (one NumPy
+    array per attribute), so each tick is a handful of batched array
+    operations instead of a Python loop over Bag objects.
+
+    Random transitions are scheduled with `scheduler`:
+      - "events": when a bag enters a status, the tick of its next move is
+        drawn once from the geometric distribution of that status's
+        per-tick probability and queued (TransitionSchedule), so a tick
+        only touches the bags that move
+      - "dice": every waiting bag rolls against its probability each tick
+    Both give the same transition statistics (see `benchmark.py scheduler`).
+
+    With a `seed` the run is reproducible, and `save_snapshot` /
+    `load_snapshot` write and read the full engine state (bags, histories,
+    queue, tick counter, RNG state), so a restored engine continues with
+    exactly the ticks the original would have run.
+    """
+    def __init__(self, num_bags=50, scheduler: str = config.SIMULATION_SCHEDULER,
+                 seed: Optional[int] = config.SIMULATION_SEED):
+        if scheduler not in SCHEDULERS:
+            raise ValueError(f"Unknown scheduler {scheduler!r} (expected one of {SCHEDULERS})")
+        # Every random draw goes through this generator: a seed replays the same run
+        self._rng = np.random.default_rng(seed)
+        self.scheduler = scheduler
+        self.schedule = TransitionSchedule()
+        self.ticks = 0  # ticks simulated so far
+        self.store = BagStore()
+        self.transitions = TransitionLog()
+        self._use_event_log(EventLog())
+        self.routes = GreatCircleRoutes()
+        for airport in AIRPORTS.values():
+            self.store.add_airport(airport)
         self._initialize_bags(num_bags)
 
+    @property
+    def bags(self) -> BagSequence:
+        return BagSequence(self)
+
     def _initialize_bags(self, count):
-        codes = list(AIRPORTS.keys())
-        for i in range(count):
-            origin_code = random.choice(codes)
-            dest_code = random.choice([c for c in codes if c != origin_code])
-            
-            origin = AIRPORTS[origin_code]
-            dest = AIRPORTS[dest_code]
-            
-            # Randomize initial state logic
-            state_val = random.random()
-            if state_val < 0.2:
-                status = BagStatus.CHECK_IN
-                lat, lon = self._jitter(origin.lat, origin.lon)
-            elif state_val < 0.3:
-                status = BagStatus.SECURITY
-                lat, lon = self._jitter(origin.lat, origin.lon)
-            elif state_val < 0.4:
-                status = BagStatus.AT_GATE
-                lat, lon = self._jitter(origin.lat, origin.lon)
-            elif state_val < 0.7:
-                status = BagStatus.IN_TRANSIT
-                # Start somewhere on the path
-                progress = random.random()
-                lat, lon = self._interpolate_pos(origin, dest, progress)
-            elif state_val < 0.8:
-                status = BagStatus.LANDED
-                lat, lon = dest.lat, dest.lon
-            elif state_val < 0.95:
-                status = BagStatus.BAGGAGE_CLAIM
-                lat, lon = self._jitter(dest.lat, dest.lon)
-            else:
-                status = BagStatus.LOST
-                lat, lon = self._jitter(origin.lat, origin.lon) # Stuck at origin?
-
-            bag = Bag(
-                id=f"BAG-{1000+i}",
-                owner=f"Passenger {i}",
-                origin=origin,
-                destination=dest,
-                current_lat=lat,
-                current_lon=lon,
-                status=status,
-                color=STATUS_COLORS[status]
-            )
-            
-            if status == BagStatus.IN_TRANSIT:
-                bag.progress = random.random()
-                
-            bag.update_history(f"Bag created at {origin.name}")
-            self.bags.append(bag)
+        rng = self._rng
+        store = self.store
+        store.reset(count)
+        n_airports = len(store.airports)
+        ap_lat, ap_lon = store.airport_lat, store.airport_lon
+
+        store.ids[:] = "BAG-" + np.arange(1000, 1000 + count).astype(str).astype(object)
+        store.owners[:] = "Passenger " + np.arange(count).astype(str).astype(object)
+
+        # Destination is drawn from the other airports (never equal to origin)
+        origin = rng.integers(0, n_airports, count)
+        dest = (origin + rng.integers(1, n_airports, count)) % n_airports
+        store.set_route(slice(None), origin, dest)
+
+        # Randomize initial state logic
+        thresholds = [0.2, 0.3, 0.4, 0.7, 0.8, 0.95]
+        initial = np.array([CHECK_IN, SECURITY, AT_GATE, IN_TRANSIT,
+                            LANDED, BAGGAGE_CLAIM, LOST], dtype=np.int8)
+        status = initial[np.searchsorted(thresholds, rng.random(count), side="right")]
+        store.set_status(slice(None), status)
+
+        # Bags waiting at origin (and lost ones, stuck at origin)
+        at_origin = np.isin(status, [CHECK_IN, SECURITY, AT_GATE, LOST])
+        store.lat[at_origin], store.lon[at_origin] = self._jitter(
+            ap_lat[origin[at_origin]], ap_lon[origin[at_origin]])
+
+        # Start somewhere on the path
+        flying = status == IN_TRANSIT
+        store.progress[flying] = rng.random(flying.sum())
+        store.lat[flying], store.lon[flying] = self._interpolate_pos(
+            origin[flying], dest[flying], store.progress[flying])
+
+        landed = status == LANDED
+        store.lat[landed] = ap_lat[dest[landed]]
+        store.lon[landed] = ap_lon[dest[landed]]
+
+        claim = status == BAGGAGE_CLAIM
+        store.lat[claim], store.lon[claim] = self._jitter(
+            ap_lat[dest[claim]], ap_lon[dest[claim]])
+
+        self.schedule.reset(count)
+        self._schedule(np.arange(count))
+
+        self.events.append(np.arange(count), self._created_kind, origin)
+
+    def _use_event_log(self, events: EventLog):
+        """Set the tracking history of every bag (keyed by row) and its event kind codes."""
+        self.events = events
+        self._event_kinds = np.zeros(len(STATUS_LIST), dtype=np.int16)  # status left -> event kind
+        for code, (_prob, _next, message) in TRANSITIONS.items():
+            self._event_kinds[code] = events.kind(message)
+        self._created_kind = events.kind("Bag created at {airport}")
+        self._landed_kind = events.kind("Landed at {airport}")
+
+    def _make_bag(self, i) -> Bag:
+        return self.store.make_bag(i, history=self.events.timeline(i, self.store.airports))
 
     def _jitter(self, lat, lon, scale=0.02):
-        return lat + random.normalvariate(0, scale), lon + random.normalvariate(0, scale)
+        return (lat + self._rng.normal(0, scale, np.shape(lat)),
+                lon + self._rng.normal(0, scale, np.shape(lon)))
 
     def _interpolate_pos(self, origin, dest, t):
-        # Simple linear interpolation for now (could be Great Circle)
-        lat = origin.lat + (dest.lat - origin.lat) * t
-        lon = origin.lon + (dest.lon - origin.lon) * t
-        return lat, lon
+        # Great-circle position; origin/dest are airport index arrays, t the progress array
+        return self.routes.position(self.store.airports, origin, dest, t)
+
+    def _schedule(self, rows):
+        """Queue the next random transition of `rows` for their current status ("events")."""
+        if self.scheduler != "events":
+            return
+        prob = TRANSITION_PROB[self.store.status[rows]]
+        waiting = prob > 0
+        # Ticks until the first success of a per-tick Bernoulli(p) roll: Geometric(p), >= 1
+        self.schedule.schedule(rows[waiting], self.ticks + self._rng.geometric(prob[waiting]))
+        self.schedule.cancel(rows[~waiting])
 
-    def _great_circle_pos(self, origin, dest, t):
-        # Placeholder for more complex visualization logic if needed
-        return self._interpolate_pos(origin, dest, t)
+    def _moving(self, status) -> np.ndarray:
+        """Rows that take their random transition this tick."""
+        if self.scheduler == "events":
+            return self.schedule.pop(self.ticks)
+        return np.flatnonzero(self._rng.random(len(status)) < TRANSITION_PROB[status])
 
     def tick(self):
         """Advances the state of the simulation."""
-        for bag in self.bags:
-            if bag.status == BagStatus.CHECK_IN:
-                if random.random() < 0.1:
-                    bag.status = BagStatus.SECURITY
-                    bag.update_history("Cleared Check-in")
-            
-            elif bag.status == BagStatus.SECURITY:
-                if random.random() < 0.1:
-                    bag.status = BagStatus.AT_GATE
-                    bag.update_history("Cleared Security")
-
-            elif bag.status == BagStatus.AT_GATE:
-                if random.random() < 0.05:
-                    bag.status = BagStatus.IN_TRANSIT
-                    bag.progress = 0.0
-                    bag.update_history("Boarded Flight")
-
-            elif bag.status == BagStatus.IN_TRANSIT:
-                bag.progress += 0.02 # Move 2% per tick
-                if bag.progress >= 1.0:
-                    bag.status = BagStatus.LANDED
-                    bag.current_lat, bag.current_lon = bag.destination.lat, bag.destination.lon
-                    bag.update_history(f"Landed at {bag.destination.name}")
-                else:
-                    lat, lon = self._interpolate_pos(bag.origin, bag.destination, bag.progress)
-                    bag.current_lat = lat
-                    bag.current_lon = lon
-
-            elif bag.status == BagStatus.LANDED:
-                if random.random() < 0.1:
-                    bag.status = BagStatus.BAGGAGE_CLAIM
-                    bag.update_history("Unloaded to Baggage Claim")
-
-            elif bag.status == BagStatus.BAGGAGE_CLAIM:
-                if random.random() < 0.05:
-                    bag.status = BagStatus.CLAIMED
-                    bag.update_history("Picked up by owner")
-                    
-            # Lost bags stay lost... until found? (Not implemented)
+        self._step(positions=True)
+
+    def advance(self, ticks: int = 0, seconds: float = 0.0) -> np.ndarray:
+        """
+        Fast-forward `ticks` ticks (or `seconds` of simulated time at
+        config.SIMULATION_TICK_SPEED per tick) in one call.
+
+        Statuses, transitions and history advance exactly as with tick(),
+        but in-flight positions are only computed once at the end. Returns
+        the bags per status after each tick, one row per tick with columns
+        in STATUS_VALUES order, for the stats history.
+        """
+        ticks += int(round(seconds / config.SIMULATION_TICK_SPEED))
+        counts = np.zeros((ticks, len(STATUS_LIST)), dtype=np.int64)
+        for k in range(ticks):
+            self._step(positions=False)
+            counts[k] = list(self.store.status_counts().values())
+        if ticks:
+            self._place_flying()
+        return counts
+
+    def _place_flying(self):
+        store = self.store
+        flying = store.status == IN_TRANSIT
+        store.lat[flying], store.lon[flying] = self._interpolate_pos(
+            store.origin[flying], store.dest[flying], store.progress[flying])
+
+    def _step(self, positions: bool):
+        store = self.store
+        status = store.status
+        self.ticks += 1
+        # Each bag moves at most one step per tick, decided on the pre-tick status
+        changed = self._moving(status)
+        flying = status == IN_TRANSIT
+
+        # Flight progress
+        store.progress[flying] += FLIGHT_SPEED
+        arrived = flying & (store.progress >= 1.0)
+        if positions:
+            en_route = flying & ~arrived
+            store.lat[en_route], store.lon[en_route] = self._interpolate_pos(
+                store.origin[en_route], store.dest[en_route], store.progress[en_route])
+
+        # Boarding resets progress
+        old = status[changed]
+        store.progress[changed[old == AT_GATE]] = 0.0
+
+        store.set_status(changed, NEXT_STATUS[old])
+        self.transitions.record(store, changed)
+
+        landed = np.flatnonzero(arrived)
+        store.set_status(landed, LANDED)
+        self.transitions.record(store, landed)
+        store.lat[landed] = store.dest_lat[landed]
+        store.lon[landed] = store.dest_lon[landed]
+        self._schedule(np.concatenate([changed, landed]))
+
+        # History only for bags that actually changed
+        self.events.append(changed, self._event_kinds[old])
+        self.events.append(landed, self._landed_kind, store.dest[landed])
+
+        # Lost bags stay lost... until found? (Not implemented)
+
+    # ==================== SNAPSHOT ====================
+
+    def save_snapshot(self, path: str):
+        """Write the engine state to `path` (NumPy .npz: one binary array per column, event log included)."""
+        store = self.store
+        meta = {
+            "ticks": self.ticks,
+            "scheduler": self.scheduler,
+            "rng": self._rng.bit_generator.state,
+            "airports": [[a.code, a.name, a.lat, a.lon] for a in store.airports],
+            "event_kinds": self.events.kinds,
+        }
+        due, group_ticks, group_sizes, queued = self.schedule.state()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+                # Text columns as one UTF-8 blob each, newline separated
+                ids=np.frombuffer("\n".join(store.ids).encode(), dtype=np.uint8),
+                owners=np.frombuffer("\n".join(store.owners).encode(), dtype=np.uint8),
+                lat=store.lat, lon=store.lon, progress=store.progress,
+                status=store.status, origin=store.origin, dest=store.dest,
+                **self.events.arrays(),
+                due=due, group_ticks=group_ticks, group_sizes=group_sizes, queued=queued,
+            )
+
+    @classmethod
+    def load_snapshot(cls, path: str) -> "SimulationEngine":
+        """Engine restored from a save_snapshot file."""
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode())
+            engine = cls(num_bags=0, scheduler=meta["scheduler"])
+            engine._rng.bit_generator.state = meta["rng"]
+            engine.ticks = meta["ticks"]
+
+            store = engine.store
+            # Snapshot airport index -> index in this store (the registry may have changed)
+            airport_index = np.array([store.add_airport(Airport(code, name, lat, lon))
+                                      for code, name, lat, lon in meta["airports"]], dtype=np.int16)
+            n = len(data["status"])
+            store.reset(n)
+            if n:
+                store.ids[:] = data["ids"].tobytes().decode().split("\n")
+                store.owners[:] = data["owners"].tobytes().decode().split("\n")
+            store.lat[:], store.lon[:], store.progress[:] = data["lat"], data["lon"], data["progress"]
+            store.set_route(slice(None), airport_index[data["origin"]], airport_index[data["dest"]])
+            store.set_status(slice(None), data["status"])
+
+            events = EventLog.from_arrays(meta["event_kinds"], data)
+            logged = events.airport[:len(events)]
+            known = logged != NO_AIRPORT
+            logged[known] = airport_index[logged[known]]
+            engine._use_event_log(events)
+            engine.schedule.restore(data["due"], data["group_ticks"], data["group_sizes"], data["queued"])
+        return engine
 
     def get_dataframe(self):
-        """Returns a Pandas DataFrame for Pydeck."""
-        data = []
-        for bag in self.bags:
-            data.append({
-                "id": bag.id,
-                "lat": bag.current_lat,
-                "lon": bag.current_lon,
-                "status": bag.status.value,
-                "origin": bag.origin.name,
-                "destination": bag.destination.name,
-                "owner": bag.owner,
-                "color": bag.color,
-                "size_scale": 200 if bag.status == BagStatus.LOST else 50,
-                # For arcs
-                "dest_lat": bag.destination.lat,
-                "dest_lon": bag.destination.lon,
-            })
-        return pd.DataFrame(data)
+        """Returns a Pandas DataFrame for Pydeck (a view over the bag store)."""
+        return self.store.dataframe()
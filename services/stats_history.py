@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+from .bag_store import STATUS_VALUES
+
+METRICS = ("Total Active", "In Transit", "Landed", "Lost")
+RESOLUTIONS = ("Raw", "1 min", "1 h")
+
+# Status values summed into each metric
+METRIC_STATUSES = {
+    "Total Active": STATUS_VALUES,
+    "In Transit": ["In Transit"],
+    "Landed": ["Landed", "Baggage Claim"],
+    "Lost": ["Lost"],
+}
+# Status counts (columns in STATUS_VALUES order) @ _METRIC_MATRIX -> metric rows
+_METRIC_MATRIX = np.array([[status in METRIC_STATUSES[metric] for metric in METRICS]
+                           for status in STATUS_VALUES], dtype=np.float64)
+
+
+def fleet_stats(status_counts: Dict[str, int]) -> Dict[str, float]:
+    """Metrics of one fleet state (bags per status value)."""
+    return {metric: sum(status_counts.get(s, 0) for s in statuses)
+            for metric, statuses in METRIC_STATUSES.items()}
+
+
+class RingSeries:
+    """Last `capacity` rows of a fixed set of metrics, in preallocated arrays."""
+
+    def __init__(self, capacity: int, width: int):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype="datetime64[ms]")
+        self.values = np.zeros((capacity, width))
+        self.size = 0
+        self._next = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, t: np.datetime64, row: np.ndarray):
+        i = self._next
+        self.times[i] = t
+        self.values[i] = row
+        self._next = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(times, values) oldest first."""
+        if self.size < self.capacity:
+            return self.times[:self.size], self.values[:self.size]
+        order = np.r_[self._next:self.capacity, 0:self._next]
+        return self.times[order], self.values[order]
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + self.values.nbytes
+
+
+class Rollup:
+    """Means of the raw rows over fixed time buckets, the open bucket included."""
+
+    def __init__(self, period_s: int, capacity: int, width: int):
+        self.period = np.timedelta64(period_s * 1000, "ms")
+        self.series = RingSeries(capacity, width)
+        self._bucket: Optional[np.datetime64] = None
+        self._sum = np.zeros(width)
+        self._count = 0
+
+    def add(self, t: np.datetime64, row: np.ndarray):
+        bucket = t - (t - np.datetime64(0, "ms")) % self.period
+        if self._bucket is not None and bucket != self._bucket:
+            self.series.append(self._bucket, self._sum / self._count)
+            self._sum[:] = 0
+            self._count = 0
+        self._bucket = bucket
+        self._sum += row
+        self._count += 1
+
+    def rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        times, values = self.series.rows()
+        if not self._count:
+            return times, values
+        return (np.append(times, self._bucket),
+                np.vstack([values, self._sum / self._count]))
+
+
+class StatsHistory:
+    """
+    Fleet stats over the session in constant memory.
+
+    Keeps the last `config.MAX_HISTORY_LENGTH` raw points plus 1-minute
+    and 1-hour means (`config.HISTORY_MINUTE_POINTS` /
+    `config.HISTORY_HOUR_POINTS` buckets), each in a ring buffer, so a
+    shift-long session neither grows memory nor slows down the trend
+    chart.
+    """
+
+    def __init__(self, raw: int = config.MAX_HISTORY_LENGTH,
+                 minutes: int = config.HISTORY_MINUTE_POINTS,
+                 hours: int = config.HISTORY_HOUR_POINTS):
+        width = len(METRICS)
+        self.raw = RingSeries(raw, width)
+        self.rollups = {"1 min": Rollup(60, minutes, width), "1 h": Rollup(3600, hours, width)}
+        self.recorded = 0  # points recorded over the session
+
+    def __len__(self):
+        return self.recorded
+
+    def record(self, stats: Dict[str, float], now: Optional[datetime] = None):
+        """Add one point (a value per METRICS name) at `now` (default: current time)."""
+        t = np.datetime64(now or datetime.now(), "ms")
+        row = np.array([stats.get(metric, 0) for metric in METRICS], dtype=np.float64)
+        self.raw.append(t, row)
+        for rollup in self.rollups.values():
+            rollup.add(t, row)
+        self.recorded += 1
+
+    def record_counts(self, counts: np.ndarray, start: datetime, step_s: float):
+        """
+        Add one point per row of bags-per-status `counts` (columns in
+        STATUS_VALUES order, e.g. the ticks of SimulationEngine.advance),
+        `step_s` seconds apart after `start`.
+        """
+        rows = counts @ _METRIC_MATRIX
+        for k, row in enumerate(rows, start=1):
+            t = np.datetime64(start + timedelta(seconds=k * step_s), "ms")
+            self.raw.append(t, row)
+            for rollup in self.rollups.values():
+                rollup.add(t, row)
+        self.recorded += len(rows)
+
+    def frame(self, resolution: str = "Raw") -> pd.DataFrame:
+        """Points at one of RESOLUTIONS as a DataFrame: timestamp plus one column per metric."""
+        times, values = self.raw.rows() if resolution == "Raw" else self.rollups[resolution].rows()
+        frame = pd.DataFrame(values, columns=list(METRICS))
+        frame.insert(0, "timestamp", times)
+        return frame
+
+    @property
+    def nbytes(self) -> int:
+        return self.raw.nbytes + sum(r.series.nbytes for r in self.rollups.values())
@@ -0,0 +1,74 @@
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+import config
+from .models import Airport
+
+
+@dataclass
+class Transitions:
+    """Status transitions after a cursor, as columns (see TransitionLog.since)."""
+    ids: np.ndarray      # bag ids
+    status: np.ndarray   # new status codes (index into STATUS_LIST)
+    origin: np.ndarray   # airport indices into `airports`
+    dest: np.ndarray
+    times: np.ndarray    # epoch seconds
+    airports: List[Airport]
+    seq: int             # cursor to pass to the next since()
+    missed: int = 0      # transitions that fell out of the log before being read
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class TransitionLog:
+    """
+    Status transitions of a bag store, recorded by the service as they
+    happen (simulation tick, live update, delta merge).
+
+    The last `capacity` transitions are kept in fixed-size columns and
+    numbered in order, so each reader (e.g. a session's notification
+    center) only asks for the ones after its own cursor instead of
+    diffing the whole fleet.
+    """
+
+    def __init__(self, capacity: int = config.TRANSITION_LOG_SIZE):
+        self.capacity = capacity
+        self.ids = np.empty(capacity, dtype=object)
+        self.status = np.zeros(capacity, dtype=np.int8)
+        self.origin = np.zeros(capacity, dtype=np.int16)
+        self.dest = np.zeros(capacity, dtype=np.int16)
+        self.times = np.zeros(capacity)
+        self.seq = 0  # transitions recorded so far
+        self.airports: List[Airport] = []
+
+    def record(self, store, rows):
+        """Log the current status of `rows` in `store` as transitions."""
+        rows = np.asarray(rows)
+        n = len(rows)
+        if not n:
+            return
+        if n > self.capacity:
+            self.seq += n - self.capacity
+            rows, n = rows[-self.capacity:], self.capacity
+        pos = (self.seq + np.arange(n)) % self.capacity
+        self.ids[pos] = store.ids[rows]
+        self.status[pos] = store.status[rows]
+        self.origin[pos] = store.origin[rows]
+        self.dest[pos] = store.dest[rows]
+        self.times[pos] = time.time()
+        self.airports = store.airports
+        self.seq += n
+
+    def since(self, seq: Optional[int]) -> Transitions:
+        """Transitions after cursor `seq` (None: none yet, just the current cursor)."""
+        start = self.seq if seq is None else max(seq, self.seq - self.capacity)
+        pos = np.arange(start, self.seq) % self.capacity
+        return Transitions(
+            ids=self.ids[pos], status=self.status[pos], origin=self.origin[pos],
+            dest=self.dest[pos], times=self.times[pos], airports=self.airports,
+            seq=self.seq, missed=0 if seq is None else start - seq,
+        )
@@ -0,0 +1,217 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+from .bag_decoder import load_json
+
+POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class UpdateBuffer:
+    """
+    Bounded hand-off between the WebSocket thread and the bag store.
+
+    The socket thread only appends raw messages (`put`). A drain thread
+    parses them in batches, coalesces the events for each bag into its
+    latest state (later fields override earlier ones) and hands one batch
+    to `apply`. ALERT events are never coalesced; they go to `on_alert` in
+    arrival order.
+
+    When `capacity` raw messages are waiting, `policy` decides:
+      - "drop_oldest": discard the oldest waiting message (newer positions
+        supersede it anyway)
+      - "drop_newest": discard the incoming message
+      - "block": make the socket thread wait, which pushes back on the
+        server through TCP flow control
+    """
+
+    def __init__(self, apply: Callable[[List[Dict[str, Any]]], Any],
+                 on_alert: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 on_gap: Optional[Callable[[Optional[int], Optional[int]], Any]] = None,
+                 capacity: int = config.WS_BUFFER_SIZE,
+                 policy: str = config.WS_OVERFLOW_POLICY,
+                 max_batch: int = config.WS_MAX_BATCH):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r} (expected one of {POLICIES})")
+        self.apply = apply
+        self.on_alert = on_alert
+        self.on_gap = on_gap
+        self.last_seq: Optional[int] = None  # last server sequence number applied
+        self.capacity = capacity
+        self.policy = policy
+        self.max_batch = max_batch
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._draining = 0
+        # Metrics
+        self.received = 0       # raw messages offered by the socket thread
+        self.dropped = 0        # raw messages discarded by the overflow policy
+        self.blocked_s = 0.0    # time the socket thread spent waiting ("block")
+        self.max_depth = 0
+        self.events = 0         # bag events parsed
+        self.applied = 0        # bag updates applied after coalescing
+        self.batches = 0
+        self.errors = 0         # unparseable messages
+        self.duplicates = 0     # replayed events already applied
+        self.gaps = 0           # sequence jumps reported to on_gap
+
+    # ==================== PRODUCER ====================
+
+    def put(self, message):
+        """Queue a raw message (called on the socket thread; never parses)."""
+        with self._cond:
+            self.received += 1
+            if len(self._queue) >= self.capacity:
+                if self.policy == "drop_newest":
+                    self.dropped += 1
+                    return
+                if self.policy == "drop_oldest":
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    start = time.perf_counter()
+                    while len(self._queue) >= self.capacity and not self._stopped:
+                        self._cond.wait(0.1)
+                    self.blocked_s += time.perf_counter() - start
+            self._queue.append(message)
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._cond.notify_all()
+
+    # ==================== CONSUMER ====================
+
+    def start(self):
+        with self._cond:
+            self._stopped = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ws-drain", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"Error applying updates: {e}")
+
+    def drain(self) -> int:
+        """Parse, coalesce and apply up to `max_batch` waiting messages; returns bags updated."""
+        with self._cond:
+            n = min(len(self._queue), self.max_batch)
+            raw = [self._queue.popleft() for _ in range(n)]
+            self._cond.notify_all()  # wake a blocked producer
+            if not raw:
+                return 0
+            self._draining += 1
+        try:
+            return self._apply_batch(raw)
+        finally:
+            with self._cond:
+                self._draining -= 1
+                self._cond.notify_all()
+
+    def _apply_batch(self, raw: List[Any]) -> int:
+        latest: Dict[str, Dict[str, Any]] = {}
+        events = 0
+        for message in raw:
+            try:
+                data = load_json(message)
+            except ValueError:
+                self.errors += 1
+                continue
+            for event in (data if isinstance(data, list) else [data]):
+                if not isinstance(event, dict):
+                    continue
+                seq = event.get("seq")
+                if isinstance(seq, int) and not self._in_sequence(seq, event.get("type") == "HELLO"):
+                    continue
+                if event.get("type") == "HELLO":
+                    continue
+                if event.get("type") == "ALERT":
+                    if self.on_alert is not None:
+                        self.on_alert(event)
+                    continue
+                bag_id = event.get("bag_id", event.get("id"))
+                if not isinstance(bag_id, str):
+                    continue
+                events += 1
+                pending = latest.get(bag_id)
+                if pending is None:
+                    latest[bag_id] = event
+                else:
+                    pending.update(event)
+
+        updates = list(latest.values())
+        if updates:
+            self.apply(updates)
+        self.events += events
+        self.applied += len(updates)
+        self.batches += 1
+        return len(updates)
+
+    def _in_sequence(self, seq: int, hello: bool) -> bool:
+        """Advance `last_seq`; False for an event that was already applied."""
+        last = self.last_seq
+        if hello:
+            # Stream continues after `seq`: anything else means missed events
+            # (or a restarted server whose counter went backwards)
+            if last is not None and seq != last:
+                self._gap(last, seq)
+            self.last_seq = seq
+            return True
+        if last is not None and seq <= last:
+            self.duplicates += 1
+            return False
+        if last is not None and seq > last + 1:
+            self._gap(last, seq)
+        self.last_seq = seq
+        return True
+
+    def _gap(self, last: Optional[int], seq: int):
+        self.gaps += 1
+        if self.on_gap is not None:
+            self.on_gap(last, seq)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued message has been applied; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._draining, timeout)
+
+    # ==================== METRICS ====================
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, coalesce ratio (events per applied update) and drop counts."""
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "capacity": self.capacity,
+            "policy": self.policy,
+            "received": self.received,
+            "dropped": self.dropped,
+            "blocked_s": self.blocked_s,
+            "events": self.events,
+            "applied": self.applied,
+            "coalesce_ratio": self.events / self.applied if self.applied else 1.0,
+            "batches": self.batches,
+            "errors": self.errors,
+            "last_seq": self.last_seq,
+            "duplicates": self.duplicates,
+            "gaps": self.gaps,
+        }
@@ -1,72 +1,74 @@
 import streamlit as st
-import json
+import random
 import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
 from streamlit_autorefresh import st_autorefresh
 import threading
-import queue
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import config
+from .bag_decoder import load_json
+from .update_buffer import UpdateBuffer
 
-# Note: WebSocket integration in Streamlit requires careful handling
-# This module provides utilities for WebSocket connection
-
-WS_URL = "ws://localhost:8000/ws"
+WS_URL = config.WEBSOCKET_URL
 
 class WebSocketClient:
     """
-    WebSocket client for real-time bag updates.
+    Consumer for the backend live feed (/ws/live-updates).
+
+    Runs websocket-client's WebSocketApp on a daemon thread that only
+    queues raw messages in a bounded UpdateBuffer. The buffer's drain
+    thread parses them, coalesces bag events (BAG_UPDATE, or full bag
+    objects) per bag and hands each batch to `on_updates`, which applies
+    it to the bag store (see DataHub.attach_live_feed). ALERT events are
+    kept in `alerts`, newest first.
 
-    Note: Streamlit's architecture makes direct WebSocket integration challenging.
-    This implementation uses polling as a fallback, but provides the structure
-    for WebSocket integration using external libraries.
+    A dropped connection is retried on the same thread with jittered
+    exponential backoff. Each reconnect asks the server to resume after
+    the last applied sequence number (`?since=<seq>`). Unless the server
+    confirms that with a HELLO at that seq as its first message (within
+    config.WS_HELLO_TIMEOUT_S), the missed events are reported to
+    `on_gap` so the owner can resync them over REST.
     """
 
-    def __init__(self):
-        self.ws_url = WS_URL
+    def __init__(self, ws_url: str = WS_URL,
+                 on_updates: Optional[Callable[[List[Dict[str, Any]]], int]] = None,
+                 on_gap: Optional[Callable[[Optional[int], Optional[int]], Any]] = None):
+        self.ws_url = ws_url
+        self.on_updates = on_updates
+        self.on_gap = on_gap
         self.connected = False
-        self.message_queue = queue.Queue()
+        self.alerts = deque(maxlen=100)
+        self.buffer = UpdateBuffer(self._apply, on_alert=self.alerts.appendleft, on_gap=self._gap)
+        self.last_message_at: Optional[float] = None
+        self.attempt = 0          # failed attempts since the last successful connect
+        self.reconnects = 0
+        self.next_retry_at: Optional[float] = None
+        self.connections = 0      # successful connects (the first one plus reconnects)
+        self._since: Optional[int] = None  # seq the current connection asked to resume after
+        self._awaiting_hello: Optional[int] = None  # reconnect whose resume is unconfirmed
+        self._hello_lock = threading.Lock()
+        self._ws = None
+        self._thread: Optional[threading.Thread] = None
+        self._closing = threading.Event()
+        self._wake = threading.Event()
 
     def connect(self):
         """
-        Attempt to connect to WebSocket server.
-        In production, this would use websocket-client library.
+        Start the connection thread (once per client; it reconnects by itself).
+        Returns False if websocket-client is not installed.
         """
         try:
             # Import websocket library if available
-            import websocket
-
-            def on_message(ws, message):
-                """Handle incoming WebSocket messages."""
-                try:
-                    data = json.loads(message)
-                    self.message_queue.put(data)
-                except Exception as e:
-                    print(f"Error processing message: {e}")
-
-            def on_error(ws, error):
-                print(f"WebSocket error: {error}")
-                self.connected = False
-
-            def on_close(ws, close_status_code, close_msg):
-                print("WebSocket connection closed")
-                self.connected = False
-
-            def on_open(ws):
-                print("WebSocket connection established")
-                self.connected = True
-
-            # Create WebSocket connection
-            ws = websocket.WebSocketApp(
-                self.ws_url,
-                on_message=on_message,
-                on_error=on_error,
-                on_close=on_close,
-                on_open=on_open
-            )
+            import websocket  # noqa: F401
 
-            # Run in a separate thread
-            wst = threading.Thread(target=ws.run_forever)
-            wst.daemon = True
-            wst.start()
+            if self._thread is not None and self._thread.is_alive():
+                return True
 
+            self._closing.clear()
+            self.buffer.start()
+            self._thread = threading.Thread(target=self._run, name="ws-live-updates", daemon=True)
+            self._thread.start()
             return True
 
         except ImportError:
@@ -76,20 +78,142 @@ class WebSocketClient:
             st.error(f"Error conectando WebSocket: {e}")
             return False
 
-    def get_updates(self):
-        """Get all pending updates from the queue."""
-        updates = []
-        while not self.message_queue.empty():
-            try:
-                updates.append(self.message_queue.get_nowait())
-            except queue.Empty:
+    def _run(self):
+        import websocket
+
+        def on_error(ws, error):
+            print(f"WebSocket error: {error}")
+
+        while not self._closing.is_set():
+            self._ws = websocket.WebSocketApp(
+                self._resume_url(),
+                on_message=lambda ws, message: self._on_message(message),
+                on_error=on_error,
+                on_open=self._on_open
+            )
+            self._ws.run_forever(ping_interval=config.WS_PING_INTERVAL_S,
+                                 ping_timeout=config.WS_PING_INTERVAL_S / 2)
+            self.connected = False
+            if self._closing.is_set():
                 break
-        return updates
+            delay = self.backoff(self.attempt)
+            self.attempt += 1
+            self.reconnects += 1
+            self.next_retry_at = time.time() + delay
+            print(f"WebSocket connection lost, retrying in {delay:.1f}s")
+            self._wake.wait(delay)
+            self._wake.clear()
+        print("WebSocket connection closed")
+
+    @staticmethod
+    def backoff(attempt: int) -> float:
+        """Delay before reconnect `attempt` (0-based): full jitter over a capped exponential."""
+        return random.uniform(0, min(config.WS_RECONNECT_MAX_S, config.WS_RECONNECT_BASE_S * 2 ** attempt))
+
+    def _on_open(self, ws):
+        if self._closing.is_set():  # close() raced with this attempt
+            ws.close()
+            return
+        print("WebSocket connection established")
+        self.connected = True
+        self.attempt = 0
+        self.next_retry_at = None
+        self.connections += 1
+        if self.connections > 1:
+            # Events were missed while disconnected: wait for the server to
+            # confirm the resume
+            with self._hello_lock:
+                self._awaiting_hello = self.connections
+            timer = threading.Timer(config.WS_HELLO_TIMEOUT_S, self._hello_timeout, args=(self.connections,))
+            timer.daemon = True
+            timer.start()
+
+    def _hello_timeout(self, connection: int):
+        with self._hello_lock:
+            if self._awaiting_hello != connection:
+                return
+            self._awaiting_hello = None
+        self._gap(self._since, None)
+
+    def _check_resumed(self, message):
+        """
+        First message after a reconnect: a HELLO at the seq we asked to
+        resume after confirms nothing was missed. A HELLO elsewhere is
+        reported by the buffer (it compares with the last applied seq);
+        anything else, or no resume request at all, is a gap here.
+        """
+        try:
+            data = load_json(message)
+        except ValueError:
+            data = None
+        event = data[0] if isinstance(data, list) and data else data
+        seq = event.get("seq") if isinstance(event, dict) else None
+        if isinstance(event, dict) and event.get("type") == "HELLO" and isinstance(seq, int):
+            if self._since is None:
+                self._gap(None, seq)
+            return
+        self._gap(self._since, seq if isinstance(seq, int) else None)
+
+    def _resume_url(self) -> str:
+        seq = self._since = self.buffer.last_seq
+        if seq is None:
+            return self.ws_url
+        parts = urlsplit(self.ws_url)
+        query = urlencode([*parse_qsl(parts.query), ("since", seq)])
+        return urlunsplit(parts._replace(query=query))
+
+    def reconnect_now(self):
+        """Skip the remaining backoff delay."""
+        self._wake.set()
+
+    def _on_message(self, message):
+        if self._awaiting_hello is not None:
+            with self._hello_lock:
+                awaiting, self._awaiting_hello = self._awaiting_hello, None
+            if awaiting is not None:
+                self._check_resumed(message)
+        self.buffer.put(message)
+        self.last_message_at = time.time()
+
+    def _apply(self, updates: List[Dict[str, Any]]):
+        if self.on_updates is not None:
+            self.on_updates(updates)
+
+    def _gap(self, last_seq: Optional[int], seq: Optional[int]):
+        print(f"WebSocket missed events after seq {last_seq} (now at {seq})")
+        if self.on_gap is not None:
+            self.on_gap(last_seq, seq)
+
+    @property
+    def received(self) -> int:
+        """Raw messages received on the socket."""
+        return self.buffer.received
+
+    @property
+    def applied(self) -> int:
+        """Bag updates applied to the store (after coalescing)."""
+        return self.buffer.applied
+
+    def close(self):
+        self._closing.set()
+        self._wake.set()
+        if self._ws is not None:
+            self._ws.close()
+        self.buffer.stop()
+        self.connected = False
 
     def is_connected(self):
         """Check if WebSocket is connected."""
         return self.connected
 
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the status panel."""
+        age = None if self.last_message_at is None else time.time() - self.last_message_at
+        retry = None if self.next_retry_at is None else max(0.0, self.next_retry_at - time.time())
+        return {"connected": self.connected, "alerts": len(self.alerts), "last_message_age": age,
+                "reconnects": self.reconnects, "attempt": self.attempt, "retry_in": retry,
+                **self.buffer.metrics()}
+
 
 def setup_realtime_updates(interval_ms: int = 5000):
     """
@@ -111,32 +235,37 @@ def setup_realtime_updates(interval_ms: int = 5000):
         return 0
 
 
-def show_websocket_status():
-    """Display WebSocket connection status in sidebar."""
-    if 'ws_client' not in st.session_state:
-        st.session_state.ws_client = WebSocketClient()
-
-    ws_client = st.session_state.ws_client
-
+def show_websocket_status(ws_client: Optional[WebSocketClient] = None):
+    """Display the status of the live feed (owned by the data hub) in the sidebar."""
     with st.sidebar:
         st.divider()
         st.caption("🔴 Conexión en Tiempo Real")
 
+        if ws_client is None:
+            st.caption("WebSocket desactivado (config.ENABLE_WEBSOCKET)")
+            return
+
+        stats = ws_client.stats()
         if ws_client.is_connected():
             st.success("✅ WebSocket Conectado")
 
-            # Show update count
-            updates = ws_client.get_updates()
-            if updates:
-                st.info(f"📦 {len(updates)} actualizaciones recibidas")
+            # Show update counts
+            if stats["received"]:
+                age = stats["last_message_age"]
+                st.info(f"📦 {stats['applied']:,} actualizaciones aplicadas"
+                        + (f" (última hace {age:.1f}s)" if age is not None else ""))
+                st.caption(f"Cola: {stats['depth']:,}/{stats['capacity']:,} · "
+                           f"coalescencia {stats['coalesce_ratio']:.1f}x · "
+                           f"descartados {stats['dropped']:,}")
+            if stats["reconnects"] or stats["gaps"]:
+                st.caption(f"Reconexiones: {stats['reconnects']:,} · "
+                           f"huecos resincronizados: {stats['gaps']:,}")
         else:
             st.warning("⚠️ WebSocket Desconectado")
+            if stats["retry_in"] is not None:
+                st.caption(f"Reintento {stats['attempt']} en {stats['retry_in']:.1f}s")
 
+            # The connection thread keeps retrying; the button only skips the wait
             if st.button("🔄 Reconectar WebSocket"):
-                with st.spinner("Conectando..."):
-                    if ws_client.connect():
-                        st.success("Conectado!")
-                        time.sleep(1)
-                        st.rerun()
-                    else:
-                        st.error("No se pudo conectar")
+                ws_client.connect()
+                ws_client.reconnect_now()
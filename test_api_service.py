@@ -0,0 +1,65 @@
+"""
+Tests for the API-mode data service (services/api_service.py) against the
+mock backend.
+Run with: python -m pytest test_api_service.py
+"""
+
+import time
+
+import pytest
+
+from mock_backend import MockBackend
+from services.api_service import RealTimeService
+
+
+@pytest.fixture
+def backend():
+    backend = MockBackend(num_bags=200).start()
+    yield backend
+    backend.stop()
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_session_login_does_not_change_the_poller_token(backend):
+    service = RealTimeService(backend.url)
+    assert wait_until(lambda: not service.ingesting)
+    fleet = len(service.bags)
+    assert service.token == "mock-token-admin"
+
+    user = service.login("passenger_1", "password")
+    assert user["token"] == "mock-token-passenger_1"
+    assert service.token == "mock-token-admin"
+
+    # The shared poller still syncs with its own account (a passenger
+    # token would only get one bag back)
+    backend.advance()
+    service.tick()
+    assert len(service.bags) == fleet
+    polls = [token for (path, token) in backend.auth_log if path.startswith("/api/bags")]
+    assert polls and set(polls) == {"mock-token-admin"}
+
+    bag_id = service.bags[0].id
+    service.get_bag_details(bag_id, user["token"])
+    assert backend.auth_log[f"/api/bags/{bag_id}", "mock-token-passenger_1"] == 1
+
+
+def test_failed_fetch_keeps_the_last_good_fleet(backend):
+    service = RealTimeService(backend.url)
+    assert wait_until(lambda: not service.ingesting)
+    fleet = [bag.id for bag in service.bags]
+
+    route = backend.route
+    backend.route = lambda *args: (500, {"detail": "Unavailable"})
+    service.watermark = None  # force a full refetch
+    service.tick()
+    assert [bag.id for bag in service.bags] == fleet
+
+    # Unknown bag and no fresh list: the first bag of the kept fleet is the demo
+    assert service.fetch_bags_for_passenger("missing") == fleet[0]
+    backend.route = route
@@ -0,0 +1,46 @@
+"""
+Tests for the bulk API JSON decoder (services/bag_decoder.py).
+Run with: python -m pytest test_bag_decoder.py
+"""
+
+import numpy as np
+
+from services.airports import AIRPORTS
+from services.bag_decoder import decode_bags
+from services.bag_store import BagStore
+
+BAG = {"id": "A", "status": "LOST", "origin_code": "JFK", "destination_code": "LHR",
+       "current_lat": 1.5, "current_lon": 2.0, "progress": 0.5}
+
+
+def decode(*items):
+    store = BagStore()
+    return decode_bags(list(items), AIRPORTS, store), store
+
+
+def test_null_or_missing_progress_defaults_to_zero():
+    missing = {k: v for k, v in BAG.items() if k != "progress"}
+    report, store = decode(dict(BAG, progress=None), dict(missing, id="B"), dict(BAG, id="C"))
+    assert report.decoded == 3 and not report.errors
+    np.testing.assert_array_equal(store.progress, [0.0, 0.0, 0.5])
+
+
+def test_null_coordinates_default_to_zero():
+    report, store = decode(dict(BAG, current_lat=None, current_lon=None))
+    assert report.decoded == 1
+    assert (store.lat[0], store.lon[0]) == (0.0, 0.0)
+
+
+def test_non_numeric_coordinates_are_rejected():
+    report, store = decode(dict(BAG, current_lat="north"), dict(BAG, id="B"))
+    assert list(store.ids) == ["B"]
+    assert report.errors == [{"index": 0, "id": "A", "reason": "invalid number"}]
+
+
+def test_malformed_status_and_id_skip_only_their_row():
+    report, store = decode(dict(BAG, status=["LOST"]), dict(BAG, id=["X", "Y"]),
+                           dict(BAG, id=["Z", "W"]), dict(BAG, id="B", status=None))
+    assert list(store.ids) == ["B"]
+    assert store.status_counts()["Check In"] == 1
+    assert [(e["index"], e["reason"]) for e in report.errors] == [
+        (0, "invalid status"), (1, "missing id"), (2, "missing id")]
@@ -0,0 +1,182 @@
+"""
+Tests for the process-wide data hub (services/data_hub.py).
+Run with: python -m pytest test_data_hub.py
+"""
+
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import config
+from mock_backend import MockBackend
+from services.api_service import RealTimeService
+from services.data_hub import DataHub
+from services.websocket_client import WebSocketClient
+
+
+class FakeService:
+    """Stands in for RealTimeService: counts REST syncs and live updates."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.syncs = 0
+        self.updates = 0
+
+    def tick(self):
+        self.syncs += 1
+
+    def apply_live_updates(self, events):
+        self.updates += len(events)
+        return len(events)
+
+
+def connected_hub():
+    service = FakeService()
+    hub = DataHub(service, interval=0.01)
+    feed = WebSocketClient("ws://localhost:1")
+    feed.connect = lambda: True  # no socket: messages are fed to the buffer directly
+    hub.attach_live_feed(feed)
+    feed.connected = True
+    return hub, service, feed
+
+
+def push(feed, seq):
+    feed.buffer.put(json.dumps({"type": "BAG_UPDATE", "seq": seq, "bag_id": "A", "new_status": "LOST"}))
+    feed.buffer.drain()
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_feed_gap_triggers_delta_sync_without_live_sessions():
+    hub, service, feed = connected_hub()
+    push(feed, 1)
+    push(feed, 2)
+    assert service.updates == 2 and service.syncs == 0
+
+    push(feed, 5)  # seq 3 and 4 were missed
+    assert feed.buffer.gaps == 1
+    assert wait_until(lambda: service.syncs == 1)
+
+    # Only the one sync: with no live session the loop stops afterwards
+    assert wait_until(lambda: hub._thread is None)
+    assert service.syncs == 1
+    hub.stop()
+
+
+def reconnect(feed, first_message):
+    feed._resume_url()  # asks to resume after the last applied seq
+    feed._on_open(None)
+    feed._on_message(json.dumps(first_message))
+    feed.buffer.drain()
+
+
+def test_reconnect_is_resynced_unless_hello_confirms_the_resume():
+    hub, service, feed = connected_hub()
+    feed._on_open(None)
+    push(feed, 1)
+
+    reconnect(feed, {"type": "HELLO", "seq": 1})  # resumed after seq 1
+    assert feed.buffer.gaps == 0
+
+    reconnect(feed, {"type": "HELLO", "seq": 7})  # resume refused: events 2-7 missed
+    assert feed.buffer.gaps == 1
+    assert wait_until(lambda: service.syncs == 1)
+
+    # A server without HELLO can't confirm anything
+    reconnect(feed, {"type": "BAG_UPDATE", "bag_id": "A", "new_status": "LOST"})
+    assert wait_until(lambda: service.syncs == 2)
+    hub.stop()
+
+
+def test_connected_feed_without_gap_does_not_poll():
+    hub, service, feed = connected_hub()
+    hub.subscribe("session", live=True)
+    push(feed, 1)
+    push(feed, 2)
+    time.sleep(0.1)
+    assert service.syncs == 0
+    hub.stop()
+
+
+def store_matches(service, backend):
+    with service.lock:
+        server, store = backend.engine.store, service.store
+        rows = [store.row_of(bag_id) for bag_id in server.ids]
+        if None in rows:
+            return False
+        return (np.array_equal(store.status[rows], server.status)
+                and np.array_equal(store.lat[rows], server.lat))
+
+
+@pytest.mark.parametrize("replay", [10_000, 0], ids=["resume", "rest-resync"])
+def test_dropped_connections_converge_on_one_thread(monkeypatch, replay):
+    monkeypatch.setattr(config, "WS_RECONNECT_BASE_S", 0.05)
+    backend = MockBackend(num_bags=500, ws_replay=replay, ws_drop_rate=4.0).start()
+    service = RealTimeService(backend.url)
+    assert wait_until(lambda: not service.ingesting)
+    hub = DataHub(service, interval=0.1)
+    feed = WebSocketClient(backend.url.replace("http", "ws", 1) + "/ws/live-updates")
+    earlier = set(threading.enumerate())
+    hub.attach_live_feed(feed)
+
+    threads = set()
+    end = time.monotonic() + 2.0
+    while time.monotonic() < end:
+        backend.advance()
+        hub.subscribe("session", live=True)
+        threads.update(t for t in threading.enumerate() if t.name == "ws-live-updates" and t not in earlier)
+        time.sleep(0.02)
+
+    backend.ws_drop_rate = 0.0
+    try:
+        assert feed.reconnects > 0
+        assert wait_until(lambda: store_matches(service, backend), timeout=15)
+        assert len(threads) == 1
+        if replay:
+            assert backend.ws_resumed > 0
+        else:
+            assert feed.buffer.gaps > 0
+    finally:
+        hub.stop()
+        feed.close()
+        backend.stop()
+
+
+class SlowAnalyticsService:
+    """Analytics where the loss call misses the deadline once."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_analytics_bundle(self, deadline=None, names=None):
+        names = names or ["dashboard", "losses", "top_airports", "hub_statistics"]
+        self.calls.append(list(names))
+        late = len(self.calls) == 1 and "losses" in names
+        bundle = {name: {"from_call": len(self.calls)} for name in names if not (late and name == "losses")}
+        bundle["missing"] = ["losses"] if late else []
+        if late:
+            bundle["losses"] = {}
+        return bundle
+
+
+def test_partial_analytics_bundle_retries_only_missing_calls():
+    service = SlowAnalyticsService()
+    hub = DataHub(service, interval=1.0)
+    assert hub.analytics_bundle()["missing"] == ["losses"]
+
+    bundle = hub.analytics_bundle()
+    assert service.calls[1] == ["losses"]
+    assert bundle["missing"] == []
+    assert bundle["losses"] == {"from_call": 2} and bundle["dashboard"] == {"from_call": 1}
+
+    # Complete now: served from the cache
+    hub.analytics_bundle()
+    assert len(service.calls) == 2
@@ -0,0 +1,49 @@
+"""
+Tests for the bounded live-update buffer (services/update_buffer.py).
+Run with: python -m pytest test_update_buffer.py
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from services.update_buffer import POLICIES, UpdateBuffer
+
+MESSAGES = 5000
+CAPACITY = 200
+
+
+def message(i):
+    return json.dumps({"type": "BAG_UPDATE", "bag_id": f"BAG-{i % 50}", "progress": i})
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_flood_with_slow_consumer_stays_within_capacity(policy):
+    applied = {}
+
+    def slow_apply(events):
+        time.sleep(0.02)  # a rerun holding the store lock
+        applied.update((event["bag_id"], event["progress"]) for event in events)
+
+    buffer = UpdateBuffer(slow_apply, capacity=CAPACITY, policy=policy, max_batch=CAPACITY)
+    buffer.start()
+    producer = threading.Thread(target=lambda: [buffer.put(message(i)) for i in range(MESSAGES)])
+    producer.start()
+    producer.join(timeout=10)
+    assert not producer.is_alive()
+    assert buffer.wait_idle(timeout=5)
+    buffer.stop()
+
+    assert buffer.received == MESSAGES
+    assert 0 < buffer.max_depth <= CAPACITY
+    if policy == "block":
+        assert buffer.dropped == 0 and buffer.blocked_s > 0
+        assert buffer.events == MESSAGES
+    else:
+        assert buffer.dropped > 0
+        assert buffer.events == MESSAGES - buffer.dropped
+    if policy != "drop_newest":
+        # The newest position of every bag survives the flood
+        assert applied == {f"BAG-{i % 50}": i for i in range(MESSAGES - 50, MESSAGES)}